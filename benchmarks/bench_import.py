@@ -0,0 +1,57 @@
+"""Measure the cold-start import time of the package.
+
+Every measurement runs in a fresh interpreter, so nothing is cached between runs.
+
+    uv run python benchmarks/bench_import.py
+"""
+
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+RUNS = 10
+STATEMENTS = {
+    "package": "import brostar_api_requests",
+    "connection": "from brostar_api_requests import BROSTARConnection",
+    "upload_models": "from brostar_api_requests import UploadTask",
+    "first validation": (
+        "from brostar_api_requests import UploadTaskMetadata; "
+        "UploadTaskMetadata(request_reference='x', quality_regime='IMBRO')"
+    ),
+    "workflows": "import brostar_api_requests.brostar_api_requests",
+    "polars (reference)": "import polars",
+}
+TIMER = (
+    "import sys, time; start = time.perf_counter(); {statement}; "
+    "print(time.perf_counter() - start, 'polars' in sys.modules "
+    "and type(sys.modules['polars']).__name__ == 'module')"
+)
+
+
+def measure(statement: str) -> tuple[float, bool]:
+    durations = []
+    polars_loaded = False
+    for _ in range(RUNS):
+        output = subprocess.run(
+            [sys.executable, "-c", TIMER.format(statement=statement)],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=SRC,
+        ).stdout.split()
+        durations.append(float(output[0]))
+        polars_loaded = output[1] == "True"
+    return statistics.median(durations) * 1000, polars_loaded
+
+
+def main() -> None:
+    print(f"{'import':<20} {'median (ms)':>12}  polars loaded")
+    for name, statement in STATEMENTS.items():
+        duration, polars_loaded = measure(statement)
+        print(f"{name:<20} {duration:>12.1f}  {polars_loaded}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""Micro-benchmark of validation and dump cost per model family.
+
+uv run python benchmarks/bench_models.py
+"""
+
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from brostar_api_requests.upload_models import (  # noqa: E402
+    GAR,
+    Electrode,
+    GLDAddition,
+    GMWConstruction,
+    GMWTubeStatus,
+    TimeValuePair,
+    UploadTask,
+    list_adapter,
+)
+
+TUBE = {
+    "tubeNumber": 1,
+    "tubeType": "standaardbuis",
+    "artesianWellCapPresent": "nee",
+    "sedimentSumpPresent": "ja",
+    "tubeStatus": "gebruiksklaar",
+    "tubeTopPosition": 1.5,
+    "tubeTopPositioningMethod": "RTKGPS0tot4cm",
+    "tubePackingMaterial": "bentoniet",
+    "tubeMaterial": "pvc",
+    "glue": "geen",
+    "screenLength": 1.0,
+    "sockMaterial": "geen",
+    "plainTubePartLength": 10.0,
+}
+GMW = {
+    "objectIdAccountableParty": "PUT-1",
+    "deliveryContext": "publiekeTaak",
+    "constructionStandard": "onbekend",
+    "initialFunction": "stand",
+    "nitgCode": "B00000000",
+    "numberOfMonitoringTubes": 3,
+    "groundLevelStable": "ja",
+    "wellHeadProtector": "potNietWaterdicht",
+    "wellConstructionDate": "2020-01-01",
+    "deliveredLocation": "155000 463000",
+    "horizontalPositioningMethod": "RTKGPS0tot2cm",
+    "localVerticalReferencePoint": "NAP",
+    "offset": 0.0,
+    "verticalDatum": "NAP",
+    "groundLevelPositioningMethod": "RTKGPS0tot4cm",
+    "monitoringTubes": [{**TUBE, "tubeNumber": number} for number in (1, 2, 3)],
+}
+GLD = {
+    "investigatorKvk": "12345678",
+    "observationType": "reguliereMeting",
+    "evaluationProcedure": "oordeelDeskundige",
+    "measurementInstrumentType": "druksensor",
+    "processReference": "NEN5120",
+    "beginPosition": "2024-01-01",
+    "endPosition": "2024-01-31",
+    "timeValuePairs": [
+        {"time": "2024-01-01T00:00:00+01:00", "value": float(i)} for i in range(1000)
+    ],
+}
+GAR_DATA = {
+    "objectIdAccountableParty": "PUT-1",
+    "qualityControlMethod": "onbekend",
+    "gmwBroId": "GMW000000000001",
+    "tubeNumber": 1,
+    "fieldResearch": {
+        "samplingDateTime": "2024-03-01T10:00:00",
+        "samplingStandard": "onbekend",
+        "pumpType": "onbekend",
+        "abnormalityInCooling": "nee",
+        "abnormalityInDevice": "nee",
+        "pollutedByEngine": "nee",
+        "filterAerated": "nee",
+        "groundWaterLevelDroppedTooMuch": "nee",
+        "abnormalFilter": "nee",
+        "sampleAerated": "nee",
+        "hoseReused": "nee",
+        "temperatureDifficultToMeasure": "nee",
+    },
+    "laboratoryAnalyses": [
+        {
+            "analysisProcesses": [
+                {
+                    "date": "2024-03-05",
+                    "analyticalTechnique": "ICPMS",
+                    "valuationMethod": "onbekend",
+                    "analyses": [
+                        {
+                            "parameter": i,
+                            "unit": "mg/l",
+                            "analysisMeasurementValue": 0.5,
+                            "qualityControlStatus": "goedgekeurd",
+                        }
+                        for i in range(100)
+                    ],
+                }
+            ]
+        }
+    ],
+}
+METADATA = {"requestReference": "benchmark", "qualityRegime": "IMBRO"}
+TUBE_STATUS = {"eventDate": "2024-01-01", "monitoringTubes": [{"tubeNumber": 1, "tubeStatus": "x"}]}
+
+
+def per_call_us(func, number: int) -> float:
+    func()
+    return timeit.timeit(func, number=number) / number * 1e6
+
+
+def report(name: str, model, data: dict, registration_type: str, number: int) -> None:
+    instance = model.model_validate(data)
+    task = UploadTask(
+        bro_domain=registration_type[:3],
+        project_number="1",
+        registration_type=registration_type,
+        request_type="registration",
+        sourcedocument_data=instance,
+        metadata=METADATA,
+    )
+    validate = per_call_us(lambda: model.model_validate(data), number)
+    dump = per_call_us(lambda: instance.model_dump(mode="json", by_alias=True), number)
+    task_dump = per_call_us(lambda: task.model_dump(mode="json", by_alias=True), number)
+    print(f"{name:<18} {validate:>12.1f} {dump:>12.1f} {task_dump:>16.1f}")
+
+
+def main() -> None:
+    print(f"{'model':<18} {'validate us':>12} {'dump us':>12} {'task dump us':>16}")
+    report("GMWConstruction", GMWConstruction, GMW, "GMW_Construction", 2000)
+    report("GMWTubeStatus", GMWTubeStatus, TUBE_STATUS, "GMW_TubeStatus", 20000)
+    report("GLDAddition[1000]", GLDAddition, GLD, "GLD_Addition", 100)
+    report("GAR[100]", GAR, GAR_DATA, "GAR", 500)
+
+    print()
+    electrodes = [
+        {
+            "electrodeNumber": i,
+            "electrodePackingMaterial": "zand",
+            "electrodeStatus": "gebruiksklaar",
+            "electrodePosition": 1.0,
+        }
+        for i in range(1000)
+    ]
+    pairs = GLD["timeValuePairs"]
+    loop = per_call_us(lambda: [Electrode(**e) for e in electrodes], 100)
+    adapter = per_call_us(lambda: list_adapter(Electrode).validate_python(electrodes), 100)
+    print(f"{'Electrode[1000] per model':<34} {loop:>10.1f} us")
+    print(f"{'Electrode[1000] list adapter':<34} {adapter:>10.1f} us")
+    loop = per_call_us(lambda: [TimeValuePair(**p) for p in pairs], 100)
+    adapter = per_call_us(lambda: list_adapter(TimeValuePair).validate_python(pairs), 100)
+    print(f"{'TimeValuePair[1000] per model':<34} {loop:>10.1f} us")
+    print(f"{'TimeValuePair[1000] list adapter':<34} {adapter:>10.1f} us")
+
+
+if __name__ == "__main__":
+    main()
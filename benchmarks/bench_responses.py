@@ -0,0 +1,73 @@
+"""Micro-benchmark of decoding a large uploadtasks page, repeated vs. once.
+
+uv run python benchmarks/bench_responses.py
+"""
+
+import json
+import sys
+import timeit
+from pathlib import Path
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from brostar_api_requests.response import BROSTARResponse, orjson  # noqa: E402
+
+TASK = {
+    "uuid": "00000000-0000-0000-0000-000000000000",
+    "bro_id": "GLD000000012345",
+    "registration_type": "GLD_Addition",
+    "status": "COMPLETED",
+    "metadata": {"broId": "GLD000000012345", "qualityRegime": "IMBRO"},
+    "sourcedocument_data": {
+        "timeValuePairs": [
+            {"time": "2024-01-01T00:00:00+01:00", "value": float(i)} for i in range(200)
+        ],
+    },
+}
+PAGE = {
+    "count": 10000,
+    "next": "https://www.brostar.nl/api/uploadtasks/?page=2",
+    "results": [TASK] * 100,
+}
+CONTENT = json.dumps(PAGE).encode()
+
+
+def make_response() -> requests.Response:
+    r = requests.Response()
+    r.status_code = 200
+    r._content = CONTENT
+    r.encoding = "utf-8"
+    return r
+
+
+def per_call_ms(func, number: int) -> float:
+    func()
+    return timeit.timeit(func, number=number) / number * 1e3
+
+
+def hot_loop_requests() -> None:
+    r = make_response()
+    # Typical access pattern of the workflows: every access decodes the body again
+    r.json().get("results")
+    r.json().get("next")
+    r.json().get("count")
+
+
+def hot_loop_wrapper() -> None:
+    r = BROSTARResponse(make_response())
+    _ = r.results
+    _ = r.next
+    _ = r.count
+
+
+def main() -> None:
+    size = len(CONTENT) / 1e6
+    print(f"page of {size:.1f} MB, orjson {'enabled' if orjson is not None else 'not installed'}")
+    print(f"{'requests.Response.json() x3':<32} {per_call_ms(hot_loop_requests, 20):>8.1f} ms")
+    print(f"{'BROSTARResponse':<32} {per_call_ms(hot_loop_wrapper, 20):>8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,20 @@
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
+
 __all__ = (
     "BROSTARConnection",
+    "BROSTARMirror",
+    "BROServicesConnection",
+    "ConnectionRegistry",
+    "DeliveryIndex",
+    "ThreadSafeBROSTARConnection",
+    "LizardConnection",
+    "LizardLocationIndex",
     "PayloadFormatter",
     "UploadTask",
     "UploadTaskMetadata",
+    "UploadTaskStatistics",
+    "WellDateIndex",
     "GMWConstruction",
     "GMWEvent",
     "GMWElectrodeStatus",
@@ -40,49 +52,139 @@ __all__ = (
     "GeoOhmCable",
     "Electrode",
     "TimeValuePair",
+    "TimeValueSeries",
+    "build_gar_sourcedocuments",
+    "register_gld_starts",
+    "upload_gld_bulk",
 )
 
-# from .brostar_api_requests import *
-from .connection import BROSTARConnection
-from .formatter import PayloadFormatter
-from .upload_models import (
-    GAR,
-    Electrode,
-    GeoOhmCable,
-    GLDAddition,
-    GLDBulkUploadMetadata,
-    GLDBulkUploadSourcedocumentData,
-    GLDClosure,
-    GLDStartregistration,
-    GMNBulkUploadMetadata,
-    GMNClosure,
-    GMNMeasuringPoint,
-    GMNMeasuringPointEndDate,
-    GMNStartregistration,
-    GMNTubeReference,
-    GMWConstruction,
-    GMWElectrodeStatus,
-    GMWEvent,
-    GMWGroundLevel,
-    GMWGroundLevelMeasuring,
-    GMWInsertion,
-    GMWLengthening,
-    GMWMaintainer,
-    GMWOwner,
-    GMWPositions,
-    GMWPositionsMeasuring,
-    GMWRemoval,
-    GMWShift,
-    GMWShortening,
-    GMWTubeStatus,
-    GMWWellHeadProtector,
-    MeasuringPoint,
-    MonitoringTube,
-    MonitoringTubeLengthening,
-    MonitoringTubePositions,
-    MonitoringTubeShortening,
-    MonitoringTubeStatus,
-    TimeValuePair,
-    UploadTask,
-    UploadTaskMetadata,
-)
+# Submodules are imported on first attribute access (PEP 562), so importing the
+# package does not load pydantic models, requests or polars until they are used.
+_LAZY_ATTRIBUTES = {
+    "build_gar_sourcedocuments": "bulk",
+    "register_gld_starts": "bulk",
+    "upload_gld_bulk": "bulk",
+    "BROSTARConnection": "connection",
+    "LizardConnection": "connection",
+    "BROServicesConnection": "connection",
+    "ConnectionRegistry": "connection",
+    "ThreadSafeBROSTARConnection": "connection",
+    "DeliveryIndex": "deliveries",
+    "LizardLocationIndex": "lizard",
+    "BROSTARMirror": "mirror",
+    "UploadTaskStatistics": "statistics",
+    "WellDateIndex": "validation",
+    "PayloadFormatter": "formatter",
+    "GAR": "upload_models",
+    "Electrode": "upload_models",
+    "GeoOhmCable": "upload_models",
+    "GLDAddition": "upload_models",
+    "GLDBulkUploadMetadata": "upload_models",
+    "GLDBulkUploadSourcedocumentData": "upload_models",
+    "GLDClosure": "upload_models",
+    "GLDStartregistration": "upload_models",
+    "GMNBulkUploadMetadata": "upload_models",
+    "GMNClosure": "upload_models",
+    "GMNMeasuringPoint": "upload_models",
+    "GMNMeasuringPointEndDate": "upload_models",
+    "GMNStartregistration": "upload_models",
+    "GMNTubeReference": "upload_models",
+    "GMWConstruction": "upload_models",
+    "GMWElectrodeStatus": "upload_models",
+    "GMWEvent": "upload_models",
+    "GMWGroundLevel": "upload_models",
+    "GMWGroundLevelMeasuring": "upload_models",
+    "GMWInsertion": "upload_models",
+    "GMWLengthening": "upload_models",
+    "GMWMaintainer": "upload_models",
+    "GMWOwner": "upload_models",
+    "GMWPositions": "upload_models",
+    "GMWPositionsMeasuring": "upload_models",
+    "GMWRemoval": "upload_models",
+    "GMWShift": "upload_models",
+    "GMWShortening": "upload_models",
+    "GMWTubeStatus": "upload_models",
+    "GMWWellHeadProtector": "upload_models",
+    "MeasuringPoint": "upload_models",
+    "MonitoringTube": "upload_models",
+    "MonitoringTubeLengthening": "upload_models",
+    "MonitoringTubePositions": "upload_models",
+    "MonitoringTubeShortening": "upload_models",
+    "MonitoringTubeStatus": "upload_models",
+    "TimeValuePair": "upload_models",
+    "TimeValueSeries": "upload_models",
+    "UploadTask": "upload_models",
+    "UploadTaskMetadata": "upload_models",
+}
+
+if TYPE_CHECKING:
+    from .bulk import build_gar_sourcedocuments, register_gld_starts, upload_gld_bulk
+    from .connection import (
+        BROServicesConnection,
+        BROSTARConnection,
+        ConnectionRegistry,
+        LizardConnection,
+        ThreadSafeBROSTARConnection,
+    )
+    from .deliveries import DeliveryIndex
+    from .formatter import PayloadFormatter
+    from .lizard import LizardLocationIndex
+    from .mirror import BROSTARMirror
+    from .statistics import UploadTaskStatistics
+    from .upload_models import (
+        GAR,
+        Electrode,
+        GeoOhmCable,
+        GLDAddition,
+        GLDBulkUploadMetadata,
+        GLDBulkUploadSourcedocumentData,
+        GLDClosure,
+        GLDStartregistration,
+        GMNBulkUploadMetadata,
+        GMNClosure,
+        GMNMeasuringPoint,
+        GMNMeasuringPointEndDate,
+        GMNStartregistration,
+        GMNTubeReference,
+        GMWConstruction,
+        GMWElectrodeStatus,
+        GMWEvent,
+        GMWGroundLevel,
+        GMWGroundLevelMeasuring,
+        GMWInsertion,
+        GMWLengthening,
+        GMWMaintainer,
+        GMWOwner,
+        GMWPositions,
+        GMWPositionsMeasuring,
+        GMWRemoval,
+        GMWShift,
+        GMWShortening,
+        GMWTubeStatus,
+        GMWWellHeadProtector,
+        MeasuringPoint,
+        MonitoringTube,
+        MonitoringTubeLengthening,
+        MonitoringTubePositions,
+        MonitoringTubeShortening,
+        MonitoringTubeStatus,
+        TimeValuePair,
+        TimeValueSeries,
+        UploadTask,
+        UploadTaskMetadata,
+    )
+    from .validation import WellDateIndex
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), *__all__])
@@ -0,0 +1,40 @@
+import importlib
+import importlib.util
+import sys
+import threading
+from types import ModuleType
+from typing import Any
+
+
+class _LazyModule(ModuleType):
+    """Stand-in for a module that imports it on the first attribute access.
+
+    The import is guarded by a lock, because `importlib.util.LazyLoader` is not
+    thread-safe before Python 3.12 and the first access may come from a worker
+    thread. Once imported, the module's namespace is copied in, so later lookups
+    do not go through `__getattr__` anymore.
+    """
+
+    def __init__(self, name: str) -> None:
+        super().__init__(name)
+        self._lazy_lock = threading.Lock()
+
+    def __getattr__(self, attribute: str) -> Any:
+        with self._lazy_lock:
+            module = importlib.import_module(self.__name__)
+            self.__dict__.update(module.__dict__)
+        return getattr(module, attribute)
+
+
+def lazy_import(name: str) -> ModuleType:
+    """Return a module that is only executed on its first attribute access.
+
+    Used for heavy dependencies (polars, numpy) that are only needed on DataFrame
+    or array code paths, so importing this package stays cheap.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+
+    if importlib.util.find_spec(name) is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    return _LazyModule(name)
@@ -1,20 +1,41 @@
+from __future__ import annotations
+
 import ast
 import csv
 import datetime
+import functools
 import logging
 import os
 import time
 from pathlib import Path
-from typing import Literal
+from typing import TYPE_CHECKING, Literal
+from urllib.parse import urlparse
+from zoneinfo import ZoneInfo
 
-import polars as pl
-import pytz
 import requests
-from dotenv import load_dotenv
-from requests.adapters import HTTPAdapter, Retry
 
-from .connection import BROSTARConnection
+from ._lazy import lazy_import
+from .bulk import register_gld_starts
+from .connection import (
+    BROServicesConnection,
+    BROSTARConnection,
+    LizardConnection,
+    connections,
+)
+from .deliveries import DeliveryIndex
 from .formatter import PayloadFormatter
+from .gld import (
+    ADDITION_FILTERS,
+    GLDAdditionIndex,
+    GLDRelocation,
+    assign_procedures,
+    report_procedure_coverage,
+)
+from .gmw import diff_gmw_construction, gmw_event_upload_tasks
+from .lizard import LizardEventWriter, LizardLocationIndex, fetch_events
+from .mirror import BROSTARMirror
+from .response import BROSTARResponse
+from .statistics import UploadTaskStatistics
 from .upload_models import (
     GLDAddition,
     GMWConstruction,
@@ -22,11 +43,17 @@ from .upload_models import (
     UploadTask,
     UploadTaskMetadata,
 )
+from .validation import WellDateIndex, prevalidate_gmw_events
+
+if TYPE_CHECKING:
+    import polars as pl
+else:
+    pl = lazy_import("polars")
 
 logger = logging.getLogger(__name__)
 RequestTypeOptions = Literal["registration", "replace", "insert", "move", "delete"]
 RegistrationTypeOptions = Literal["GMW_Construction"]
-AMS_TZ = pytz.timezone("Europe/Amsterdam")
+AMS_TZ = ZoneInfo("Europe/Amsterdam")
 CHUNK_SIZE = 7000
 VALIDATION_MAPPING = {
     "goedgekeurd": 2,
@@ -37,7 +64,23 @@ VALIDATION_MAPPING = {
     # Any above 100 are corrected values
 }
 
-load_dotenv()
+
+@functools.cache
+def _load_dotenv() -> None:
+    """Load the .env file once, on the first lookup instead of at import time."""
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+
+def _getenv(key: str) -> str | None:
+    _load_dotenv()
+    return os.getenv(key)
+
+
+def setup_brostar_connection(production: bool = True) -> BROSTARConnection:
+    """Shared connection for the BROSTAR_API_KEY, handed out by the connection registry."""
+    return connections.get(_getenv("BROSTAR_API_KEY"), production=production)
 
 
 def _move_gmw(
@@ -70,35 +113,40 @@ def _correct_gmw(brostar: BROSTARConnection, upload_task: UploadTask) -> None:
     brostar.await_completed(uuid=uuid)
 
 
-def delete_invalid_upload_tasks() -> None:
+def delete_invalid_upload_tasks(brostar: BROSTARConnection | None = None) -> None:
     """Delete all upload tasks that are not valid."""
-    brostar_api_key = os.getenv("BROSTAR_API_KEY")
-    brostar = BROSTARConnection(brostar_api_key)  # BROSTAR API Key
-    brostar.set_website(production=True)
+    if brostar is None:
+        brostar = setup_brostar_connection()
 
     next = ""
     while next is not None:
         r = brostar.get("uploadtasks", params={"status": "PROCESSING", "log": "XML is not valid"})
         r.raise_for_status()
-        tasks = r.json()["results"]
-
-        for task in tasks:
+        for task in r.results:
             uuid = task["uuid"]
             logger.info(f"Deleting invalid upload task {uuid}")
             delete_r = brostar.s.delete(url=f"{brostar.website}/uploadtasks/{uuid}")
             delete_r.raise_for_status()
 
-        next = r.json().get("next")
+        next = r.next
+
 
+def _iso_date(value: str | datetime.date | None) -> str | None:
+    """Date cell from Excel as an ISO date, datetimes are cut off at the day."""
+    if isinstance(value, datetime.datetime):
+        value = value.date()
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    return value
 
-def bulk_move_request(excel_file: str) -> None:
+
+def bulk_move_request(excel_file: str, brostar: BROSTARConnection | None = None) -> None:
     """Use an excel to move multiple GMWs.
 
     Columns: internal_id, gmw, old_date, new_date"""
     # Access your API key
-    brostar_api_key = os.getenv("BROSTAR_API_KEY")
-    brostar = BROSTARConnection(brostar_api_key)  # BROSTAR API Key
-    brostar.set_website(production=True)
+    if brostar is None:
+        brostar = setup_brostar_connection()
 
     df = pl.read_excel(excel_file, has_header=True)
     filtered_df = df.filter(pl.col("gmw").str.starts_with("GMW"))
@@ -109,15 +157,21 @@ def bulk_move_request(excel_file: str) -> None:
 
     formatter = PayloadFormatter(brostar)
 
+    skipped = 0
     for row in filtered_df.iter_rows(named=True):
         logger.info(row)
         intern_id = row.get("internal_id")
         bro_id = row.get("gmw")
-        date_to_be_corrected = row.get("old_date")
-        actual_date = row.get("new_date")
+        date_to_be_corrected = _iso_date(row.get("old_date"))
+        actual_date = _iso_date(row.get("new_date"))
 
-        logger.info(f"Moving {bro_id} from {date_to_be_corrected} to {actual_date}")
         construction = formatter.format_gmw_construction(bro_id)
+        if construction.well_construction_date == actual_date:
+            logger.info(f"{bro_id} is already constructed on {actual_date}, skipping.")
+            skipped += 1
+            continue
+
+        logger.info(f"Moving {bro_id} from {date_to_be_corrected} to {actual_date}")
         construction.object_id_accountable_party = intern_id
         construction.well_construction_date = actual_date
         construction.date_to_be_corrected = date_to_be_corrected
@@ -141,50 +195,149 @@ def bulk_move_request(excel_file: str) -> None:
         payload = payload.model_dump(mode="json", by_alias=True)
         _move_gmw(brostar, construction, metadata)
 
+    logger.info(f"Skipped {skipped} GMWs that did not have to move.")
+
+
+GMW_EVENT_WELL_COLUMNS = (
+    "owner",
+    "maintenance_responsible_party",
+    "well_head_protector",
+    "ground_level_position",
+    "ground_level_positioning_method",
+)
+GMW_EVENT_TUBE_COLUMNS = (
+    "tube_status",
+    "tube_top_position",
+    "tube_top_positioning_method",
+    "plain_tube_part_length",
+)
+
+
+def bulk_gmw_event_request(
+    excel_file: str, kvk: str, brostar: BROSTARConnection | None = None
+) -> None:
+    """Use an excel to register changes to multiple GMWs with as few events as possible.
+
+    Columns: gmw, event_date, tube_number and any of the well columns (owner,
+    maintenance_responsible_party, well_head_protector, ground_level_position,
+    ground_level_positioning_method) and tube columns (tube_status, tube_top_position,
+    tube_top_positioning_method, plain_tube_part_length). Empty cells keep the current
+    value and GMWs without changes are skipped. Events that BRO would reject because of
+    their date are corrected or rejected before sending, see `prevalidate_gmw_events`."""
+    if brostar is None:
+        brostar = setup_brostar_connection()
+
+    df = pl.read_excel(excel_file, has_header=True)
+    formatter = PayloadFormatter(brostar)
+
+    skipped = 0
+    failed = 0
+    upload_tasks: list[UploadTask] = []
+    for (bro_id, event_date), rows in df.group_by("gmw", "event_date", maintain_order=True):
+        current = formatter.format_gmw_construction(bro_id)
+        desired = current.model_copy(deep=True)
+        tubes = {tube.tube_number: tube for tube in desired.monitoring_tubes}
+        try:
+            for row in rows.iter_rows(named=True):
+                for column in GMW_EVENT_WELL_COLUMNS:
+                    if row.get(column) is not None:
+                        setattr(desired, column, row[column])
+                if row.get("tube_number") is None:
+                    continue
+                tube = tubes[int(row["tube_number"])]
+                for column in GMW_EVENT_TUBE_COLUMNS:
+                    if row.get(column) is not None:
+                        setattr(tube, column, row[column])
+
+            events = diff_gmw_construction(current, desired, event_date=_iso_date(event_date))
+        except KeyError as e:
+            logger.error(f"{bro_id} has no tube {e}, skipping.")
+            failed += 1
+            continue
+        except ValueError as e:
+            logger.error(f"{bro_id} cannot be changed with events, skipping: {e}")
+            failed += 1
+            continue
+
+        if not events:
+            logger.info(f"{bro_id} has no changes, skipping.")
+            skipped += 1
+            continue
+
+        metadata = UploadTaskMetadata(
+            request_reference="BROSTAR-API",
+            delivery_accountable_party=str(kvk),
+            quality_regime="IMBRO",
+            bro_id=bro_id,
+        )
+        upload_tasks += gmw_event_upload_tasks(events, metadata, project_number="5871")
+
+    logger.info(f"Skipped {skipped} GMWs without changes and {failed} GMWs with errors.")
+
+    index = WellDateIndex(setup_brostar_mirror(brostar))
+    index.refresh()
+    accepted, rejected = prevalidate_gmw_events(upload_tasks, index)
+    for upload_task in accepted:
+        logger.info(
+            f"Registering {upload_task.registration_type} for {upload_task.metadata.bro_id}"
+        )
+        _correct_gmw(brostar, upload_task)
+
+    logger.info(f"Sent {len(accepted)} events, rejected {len(rejected)} before sending.")
+
+
+def setup_lizard_connection(tenant: str = "vitens") -> LizardConnection:
+    lizard_api_key = _getenv("LIZARD_API_KEY")
+    return LizardConnection(lizard_api_key, tenant=tenant)
 
-def setup_lizard_session() -> requests.Session:
-    lizard_api_key = os.getenv("LIZARD_API_KEY")
-    ls = requests.Session()
-    ls.headers = {
-        "username": "__key__",
-        "password": lizard_api_key,
-        "Content-Type": "application/json",
-    }
-    retry = Retry(
-        total=6,
-        backoff_factor=0.5,
+
+def _environment_path(path: str | Path, brostar: BROSTARConnection) -> Path:
+    """Local file for `brostar`, with the BROSTAR host in its name.
+
+    Staging and production then never share a local index or cache.
+    """
+    path = Path(path)
+    return path.with_stem(f"{path.stem}_{urlparse(brostar.website).hostname}")
+
+
+def setup_brostar_mirror(brostar: BROSTARConnection) -> BROSTARMirror:
+    """Local mirror of the BROSTAR collections, stored at BROSTAR_MIRROR_PATH per environment."""
+    return BROSTARMirror(
+        brostar,
+        _environment_path(_getenv("BROSTAR_MIRROR_PATH") or "brostar_mirror.sqlite", brostar),
+    )
+
+
+def setup_delivery_index(brostar: BROSTARConnection) -> DeliveryIndex:
+    """Local index of delivered payloads, stored at BROSTAR_DELIVERY_INDEX per environment."""
+    return DeliveryIndex(
+        _environment_path(_getenv("BROSTAR_DELIVERY_INDEX") or "brostar_deliveries.sqlite", brostar)
     )
-    adapter = HTTPAdapter(pool_connections=5, pool_maxsize=5, max_retries=retry)
-    ls.mount("http://", adapter)
-    ls.mount("https://", adapter)
-    return ls
 
 
 def post_timeseries_events(
-    timeseries_url: str, events_df: pl.DataFrame, session: requests.Session
+    timeseries_url: str, events_df: pl.DataFrame, lizard: LizardConnection
 ) -> None:
-    """Post timeseries events to lizard with adjusted flag"""
-    logger.info(f"Posting timeseries to {f'{timeseries_url}events/'}.")
-    logger.info(events_df)
-    r = session.post(
-        url=f"{timeseries_url}events/",
-        json=events_df.to_dicts(),
-        timeout=30,
-    )
-    r.raise_for_status()
+    """Post timeseries events to lizard with adjusted flag
+
+    :raises requests.RequestException: When some batches could not be posted after retrying.
+    """
+    with LizardEventWriter(lizard) as writer:
+        writer.submit(timeseries_url, events_df)
+    if writer.failed:
+        raise requests.RequestException(
+            f"{len(writer.failed)} event batches could not be posted to {timeseries_url}events/"
+        )
 
 
 def create_brostar_task(url: str, payload: dict, brostar_s: requests.Session) -> dict:
-    r = brostar_s.post(url, json=payload, timeout=60)
-    print(r.url)
-    print(r.json())
+    r = BROSTARResponse(brostar_s.post(url, json=payload, timeout=60))
+    result = r.json()
+    logger.info(f"Posted uploadtask to {r.url}: {result}")
     if r.status_code < 250:
         time.sleep(10)
-        res = brostar_s.get(r.json()["url"], timeout=30)
-        res.raise_for_status()
-    else:
-        res = r
-    return r.json()
+        brostar_s.get(result["url"], timeout=30).raise_for_status()
+    return result
 
 
 def check_status(url: str, brostar_s: requests.Session) -> dict:
@@ -276,189 +429,204 @@ def setup_time_value_pairs(events_df: pl.DataFrame, limits: dict[str, str]) -> l
     return brostar_data_list
 
 
-def send_gldaddition_for_vitens_location(business_id: str, kvk: str, projectnummer: str) -> None:
-    """The GLD-ID should be available within the location metadata of the Lizard API. Otherwise this function will fail. For now this only works with IMBRO, as that was the purpose for the function."""
-    brostar_api_key = os.getenv("BROSTAR_API_KEY")
-    brostar = BROSTARConnection(brostar_api_key)  # BROSTAR API Key
-    brostar.set_website(production=True)
-
-    ls = setup_lizard_session()
-
-    # Fetch the location metadata from the Lizard API
-    r = ls.get(
-        url="https://vitens.lizard.net/api/v4/locations/", params={"code__startswith": business_id}
-    )
-    r.raise_for_status()
-    locations = r.json().get("results", [])
-    for location in locations:
-        logger.info(f"Processing location: {location}")
-        location_metadata = location.get("extra_metadata", {}).get("bro", {})
-        limits = {
-            "referenceLevel": location_metadata.get("temporal_data", [{}])[0].get(
-                "referenceLevel", None
-            ),
-            "filterBottomLevel": location_metadata.get("filterBottomDepth", None),
-        }
-        gld_id_imbro = location_metadata.get("broid_gld_imbro", None)
-        quality_regime = "IMBRO"
-        if gld_id_imbro is None:
-            logger.info(f"No GLD ID found for location {location['code']}. Skipping.")
-            continue
+def send_gldaddition_for_vitens_location(
+    business_id: str,
+    kvk: str,
+    projectnummer: str,
+    brostar: BROSTARConnection | None = None,
+    delivered: GLDAdditionIndex | None = None,
+) -> None:
+    """The GLD-ID should be available within the location metadata of the Lizard API. Otherwise this function will fail. For now this only works with IMBRO, as that was the purpose for the function.
 
-        for observation_type in [28, 911]:
-            r = ls.get(
-                url="https://vitens.lizard.net/api/v4/timeseries/",
-                params={"location__code": location["code"], "observation_type": observation_type},
-            )
-            r.raise_for_status()
-            timeseries = r.json().get("results", [])
-            if len(timeseries) != 1:
-                logger.info(
-                    f"No timeseries found for location {location['code']} and observation type {observation_type}. Skipping."
-                )
+    Pass a refreshed `delivered` index when sending for several locations, otherwise
+    one is built from the local BROSTAR mirror.
+    """
+    if brostar is None:
+        brostar = setup_brostar_connection()
+    if delivered is None:
+        with setup_brostar_mirror(brostar) as mirror:
+            delivered = GLDAdditionIndex(brostar, mirror=mirror)
+            delivered.refresh()
+
+    lizard = setup_lizard_connection(tenant="vitens")
+    # Flushes the queued validation flags, also when a location fails
+    with LizardEventWriter(lizard) as writer:
+        # Fetch the location metadata from the Lizard API
+        r = lizard.get("locations", params={"code__startswith": business_id})
+        r.raise_for_status()
+        locations = r.json().get("results", [])
+        for location in locations:
+            logger.info(f"Processing location: {location}")
+            location_metadata = location.get("extra_metadata", {}).get("bro", {})
+            limits = {
+                "referenceLevel": location_metadata.get("temporal_data", [{}])[0].get(
+                    "referenceLevel", None
+                ),
+                "filterBottomLevel": location_metadata.get("filterBottomDepth", None),
+            }
+            gld_id_imbro = location_metadata.get("broid_gld_imbro", None)
+            quality_regime = "IMBRO"
+            if gld_id_imbro is None:
+                logger.info(f"No GLD ID found for location {location['code']}. Skipping.")
                 continue
 
-            timeserie_info = timeseries[0]
-            logger.info(f"Processing timeseries: {timeserie_info}")
-            procedures = timeserie_info["extra_metadata"].get("bro", {}).get("procedure", [])
-            if not procedures:
-                logger.info(
-                    f"No procedures found for timeseries {timeserie_info['code']}. Skipping."
+            for observation_type in [28, 911]:
+                r = lizard.get(
+                    "timeseries",
+                    params={
+                        "location__code": location["code"],
+                        "observation_type": observation_type,
+                    },
                 )
-                continue
-            elif isinstance(procedures, dict):
-                procedures = [procedures]
-
-            procedures_df = pl.DataFrame(procedures)
-            procedures_df = procedures_df.with_columns(
-                pl.col("start")
-                .str.to_datetime(format="%Y-%m-%dT%H:%M:%SZ")
-                .alias("start_datetime"),
-                pl.col("eind")
-                .str.replace("None", "5000-01-01T00:00:00Z")
-                .str.to_datetime(format="%Y-%m-%dT%H:%M:%SZ")
-                .alias("eind_datetime"),
-            )
-            logger.info(procedures_df)
-
-            r = ls.get(
-                f"{timeserie_info['url']}events/", params={"validation_code!": "V", "limit": 10000}
-            )
-            r.raise_for_status()
-            events = r.json().get("results", [])
-
-            while r.json().get("next") is not None:
-                r = ls.get(r.json().get("next"))
                 r.raise_for_status()
-                events += r.json().get("results", [])
-
-            events_df = pl.DataFrame(events)
-            events_df = events_df.with_columns(
-                pl.col("time").str.to_datetime(format="%Y-%m-%dT%H:%M:%SZ").alias("datetime")
-            )
+                timeseries = r.json().get("results", [])
+                if len(timeseries) != 1:
+                    logger.info(
+                        f"No timeseries found for location {location['code']} and observation type {observation_type}. Skipping."
+                    )
+                    continue
+
+                timeserie_info = timeseries[0]
+                logger.info(f"Processing timeseries: {timeserie_info}")
+                procedures = timeserie_info["extra_metadata"].get("bro", {}).get("procedure", [])
+                if not procedures:
+                    logger.info(
+                        f"No procedures found for timeseries {timeserie_info['code']}. Skipping."
+                    )
+                    continue
+                elif isinstance(procedures, dict):
+                    procedures = [procedures]
+
+                procedures_df = pl.DataFrame(procedures)
+                procedures_df = procedures_df.with_columns(
+                    pl.col("start")
+                    .str.to_datetime(format="%Y-%m-%dT%H:%M:%SZ")
+                    .alias("start_datetime"),
+                    pl.col("eind")
+                    .str.replace("None", "5000-01-01T00:00:00Z")
+                    .str.to_datetime(format="%Y-%m-%dT%H:%M:%SZ")
+                    .alias("eind_datetime"),
+                )
+                logger.info(procedures_df)
 
-            for procedure in procedures_df.iter_rows(named=True):
-                logger.info(f"Processing procedure: {procedure}")
-                procedure_events_df = events_df.filter(
-                    pl.col("datetime").is_between(
-                        procedure["start_datetime"],
-                        procedure["eind_datetime"],
-                    ),
-                    pl.col("value").is_not_null(),
+                events_df = fetch_events(lizard, timeserie_info, params={"validation_code!": "V"})
+                events_df = events_df.with_columns(
+                    pl.col("time").str.to_datetime(format="%Y-%m-%dT%H:%M:%SZ").alias("datetime")
                 )
-                logger.info(procedure_events_df)
-
-                n_rows = procedure_events_df.height  # or len(timeseries_df)
-
-                logger.info(procedure)
-                for i in range(0, n_rows, CHUNK_SIZE):
-                    chunk = procedure_events_df.slice(i, CHUNK_SIZE)
-                    start_time = chunk["time"][0]
-                    end_time = chunk["time"][-1]
-                    result_time = chunk["time"][-1]  # Only do voorlopig and controle
-
-                    observatie_type = procedure["observationtype"]
-                    proces_referentie = procedure["processreference"]
-                    evaluatie_procedure = procedure["evaluationprocedure"]
-                    meetinstrument_type = procedure["measurementinstrumenttype"]
-                    luchtdrukcompensatie = procedure["airpressurecompensationtype"]
-                    logger.info(chunk)
-
-                    metadata = UploadTaskMetadata(
-                        bro_id=gld_id_imbro,
-                        request_reference=f"{gld_id_imbro}: {quality_regime} {observatie_type} {procedure['start']}-{procedure['eind']} ({datetime.datetime.now(tz=AMS_TZ).strftime('%Y-%m-%dT%H:%M:%SZ')})",
-                        delivery_accountable_party=kvk,
-                        quality_regime="IMBRO",
-                    )
 
-                    sourcedocument_data = GLDAddition(
-                        date=result_time.split("T")[0],
-                        investigator_kvk=kvk,
-                        validation_status="voorlopig"
-                        if observatie_type == "reguliereMeting"
-                        else None,
-                        observation_type=observatie_type,
-                        evaluation_procedure=evaluatie_procedure,
-                        process_reference=proces_referentie,
-                        measurement_instrument_type=meetinstrument_type,
-                        air_pressure_compensation_type=luchtdrukcompensatie,
-                        begin_position=start_time.split("T")[0],
-                        end_position=end_time.split("T")[0],
-                        result_time=result_time,
-                        time_value_pairs=setup_time_value_pairs(events_df=chunk, limits=limits),
-                    )
+                events_df = assign_procedures(
+                    events_df.filter(pl.col("value").is_not_null()), procedures_df
+                )
+                report_procedure_coverage(events_df)
+                events_per_procedure = events_df.filter(
+                    pl.col("procedure").is_not_null()
+                ).partition_by("procedure", as_dict=True)
+
+                for index, procedure in enumerate(procedures_df.iter_rows(named=True)):
+                    logger.info(f"Processing procedure: {procedure}")
+                    procedure_events_df = events_per_procedure.get((index,))
+                    if procedure_events_df is not None:
+                        procedure_events_df = delivered.trim(
+                            procedure_events_df,
+                            gld_id_imbro,
+                            procedure["observationtype"],
+                            quality_regime,
+                        )
+                    if procedure_events_df is None or procedure_events_df.is_empty():
+                        logger.info(f"No new events found for procedure {procedure}. Skipping.")
+                        continue
 
-                    payload = UploadTask(
-                        bro_domain="GLD",
-                        project_number=str(projectnummer),
-                        registration_type="GLD_Addition",
-                        request_type="registration",
-                        sourcedocument_data=sourcedocument_data,
-                        metadata=metadata,
-                    )
+                    n_rows = procedure_events_df.height  # or len(timeseries_df)
+
+                    logger.info(procedure)
+                    for i in range(0, n_rows, CHUNK_SIZE):
+                        chunk = procedure_events_df.slice(i, CHUNK_SIZE)
+                        start_time = chunk["time"][0]
+                        end_time = chunk["time"][-1]
+                        result_time = chunk["time"][-1]  # Only do voorlopig and controle
+
+                        observatie_type = procedure["observationtype"]
+                        proces_referentie = procedure["processreference"]
+                        evaluatie_procedure = procedure["evaluationprocedure"]
+                        meetinstrument_type = procedure["measurementinstrumenttype"]
+                        luchtdrukcompensatie = procedure["airpressurecompensationtype"]
+                        logger.info(chunk)
+
+                        metadata = UploadTaskMetadata(
+                            bro_id=gld_id_imbro,
+                            request_reference=f"{gld_id_imbro}: {quality_regime} {observatie_type} {procedure['start']}-{procedure['eind']} ({datetime.datetime.now(tz=AMS_TZ).strftime('%Y-%m-%dT%H:%M:%SZ')})",
+                            delivery_accountable_party=kvk,
+                            quality_regime="IMBRO",
+                        )
 
-                    # Create delivery
-                    try:
-                        result_dict: dict = create_brostar_task(
-                            url=f"{brostar.website}/uploadtasks/",
-                            payload=payload.model_dump(mode="json", by_alias=True),
-                            brostar_s=brostar.s,
+                        sourcedocument_data = GLDAddition(
+                            date=result_time.split("T")[0],
+                            investigator_kvk=kvk,
+                            validation_status="voorlopig"
+                            if observatie_type == "reguliereMeting"
+                            else None,
+                            observation_type=observatie_type,
+                            evaluation_procedure=evaluatie_procedure,
+                            process_reference=proces_referentie,
+                            measurement_instrument_type=meetinstrument_type,
+                            air_pressure_compensation_type=luchtdrukcompensatie,
+                            begin_position=start_time.split("T")[0],
+                            end_position=end_time.split("T")[0],
+                            result_time=result_time,
+                            time_value_pairs=setup_time_value_pairs(events_df=chunk, limits=limits),
                         )
-                    except Exception as e:
-                        logger.exception(
-                            f"Failed to post addition: {e}. Payload was: {payload.model_dump(mode='json', by_alias=True)}"
+
+                        payload = UploadTask(
+                            bro_domain="GLD",
+                            project_number=str(projectnummer),
+                            registration_type="GLD_Addition",
+                            request_type="registration",
+                            sourcedocument_data=sourcedocument_data,
+                            metadata=metadata,
                         )
-                        continue
 
-                    # Check delivery
-                    retry = 0
-                    while (
-                        result_dict.get("status", "UNKNOWN") in ["PROCESSING", "PENDING"]
-                        and retry < 10
-                    ):
+                        # Create delivery
                         try:
-                            result_dict = check_status(result_dict["url"], brostar_s=brostar.s)
+                            result_dict: dict = create_brostar_task(
+                                url=f"{brostar.website}/uploadtasks/",
+                                payload=payload.model_dump(mode="json", by_alias=True),
+                                brostar_s=brostar.s,
+                            )
                         except Exception as e:
-                            logger.exception(f"Failed to check the status at brostar: {e}.")
-
-                        retry += 1
-                        time.sleep(5)
-
-                    # Update last delivered date
-                    if result_dict["status"] in ["COMPLETED", "UNFINISHED"]:
-                        url = timeserie_info["url"]
-                        chunk = chunk.with_columns(pl.lit("V").alias("validation_code"))
-                        # Convert datetime to str (JSON-Serializeable)
-                        chunk = chunk.select(
-                            "time",
-                            "value",
-                            "validation_code",
-                            "detection_limit",
-                            "flag",
-                            "comment",
-                            "last_modified",
-                        )
-                        post_timeseries_events(url, chunk, ls)
+                            logger.exception(
+                                f"Failed to post addition: {e}. Payload was: {payload.model_dump(mode='json', by_alias=True)}"
+                            )
+                            continue
+
+                        # Check delivery
+                        retry = 0
+                        while (
+                            result_dict.get("status", "UNKNOWN") in ["PROCESSING", "PENDING"]
+                            and retry < 10
+                        ):
+                            try:
+                                result_dict = check_status(result_dict["url"], brostar_s=brostar.s)
+                            except Exception as e:
+                                logger.exception(f"Failed to check the status at brostar: {e}.")
+
+                            retry += 1
+                            time.sleep(5)
+
+                        # Flag the delivered events as validated, posted in the background
+                        if result_dict["status"] in ["COMPLETED", "UNFINISHED"]:
+                            delivered.add(
+                                gld_id_imbro,
+                                observatie_type,
+                                quality_regime,
+                                sourcedocument_data.begin_position,
+                                sourcedocument_data.end_position,
+                            )
+                            writer.submit(timeserie_info["url"], chunk, validation_code="V")
+
+    if writer.failed:
+        logger.error(
+            f"{len(writer.failed)} batches of validation flags were not written back to Lizard."
+        )
 
 
 def map_polars_to_gmw_constructions(df: pl.DataFrame, kvk: str) -> GMWConstruction:
@@ -560,29 +728,20 @@ def format_incomplete_date(incomplete_date) -> str | None:
     return str(incomplete_date)
 
 
-def bulk_gmw_correction_request(kvk: str) -> None:
+def bulk_gmw_correction_request(kvk: str, brostar: BROSTARConnection | None = None) -> None:
     """Use an excel to move multiple GMWs.
 
     Columns: gmw_id"""
-    # Access your API key
-    brostar = BROSTARConnection("HUhO9Jl2.rLXSyJq83wA9kQLT7wACNZbkZpK3eUug")  # BROSTAR API Key
-    brostar.set_website(production=True)
-    results = []
-    r = brostar.get("gmw/gmws")
-    r.raise_for_status()
-    results += r.json().get("results", [])
-    next = r.json().get("next")
-    while next is not None:
-        r = brostar.s.get(next)
-        r.raise_for_status()
-        results += r.json().get("results", [])
-        next = r.json().get("next")
+    if brostar is None:
+        brostar = setup_brostar_connection()
+    mirror = setup_brostar_mirror(brostar)
+    mirror.sync("gmw/gmws")
+    mirror.sync("gmw/monitoringtubes")
 
-    print(results)
-    df = pl.DataFrame(results, schema_overrides={"nitg_code": pl.String})
+    df = pl.DataFrame(mirror.all("gmw/gmws"), schema_overrides={"nitg_code": pl.String})
     df = df.filter(pl.col("nitg_code").is_not_null())
     df = df.select("uuid", "bro_id", "nitg_code")
-    formatter = PayloadFormatter(brostar)
+    formatter = PayloadFormatter(brostar, mirror=mirror)
 
     for row in df.iter_rows(named=True):
         logger.info(row)
@@ -613,13 +772,12 @@ def bulk_gmw_correction_request(kvk: str) -> None:
         _correct_gmw(brostar, upload_task)
 
 
-def retry_upload_task() -> None:
+def retry_upload_task(brostar: BROSTARConnection | None = None) -> None:
     """Retry all upload tasks that are in PROCESSING state."""
     import re
 
-    brostar_api_key = os.getenv("BROSTAR_API_KEY")
-    brostar = BROSTARConnection(brostar_api_key)  # BROSTAR API Key
-    brostar.set_website(production=True)
+    if brostar is None:
+        brostar = setup_brostar_connection()
 
     r = brostar.get("uploadtasks", params={"status": "FAILED"})
     for task in r.json().get("results", []):
@@ -679,90 +837,80 @@ def retry_upload_task() -> None:
         # retry_r.raise_for_status()
 
 
-def bulk_gmw_construction_request(excel_file: str | Path, kvk: str) -> None:
-    """Use an excel to create multiple GMWs."""
+def bulk_gmw_construction_request(
+    excel_file: str | Path, kvk: str, brostar: BROSTARConnection | None = None
+) -> None:
+    """Use an excel to create multiple GMWs.
+
+    Wells whose construction did not change since their last COMPLETED delivery are skipped."""
     # Access your API key
-    brostar_api_key = os.getenv("BROSTAR_API_KEY")
-    brostar = BROSTARConnection(brostar_api_key)  # BROSTAR API Key
-    brostar.set_website(production=True)
+    if brostar is None:
+        brostar = setup_brostar_connection()
 
     df = pl.read_excel(excel_file, has_header=True)
     putten = df.unique("Putnaam").to_series(0).to_list()
 
-    for put in putten:
-        construction = map_polars_to_gmw_constructions(df.filter(pl.col("Putnaam").eq(put)), kvk)
-        ### Setup the payload
-        metadata = UploadTaskMetadata(
-            request_reference=f"{put}",
-            delivery_accountable_party=kvk,
-            quality_regime="IMBRO",  # Add to row?
-        )
+    skipped = 0
+    with setup_delivery_index(brostar) as index:
+        for put in putten:
+            construction = map_polars_to_gmw_constructions(
+                df.filter(pl.col("Putnaam").eq(put)), kvk
+            )
+            ### Setup the payload
+            metadata = UploadTaskMetadata(
+                request_reference=f"{put}",
+                delivery_accountable_party=kvk,
+                quality_regime="IMBRO",  # Add to row?
+            )
 
-        ## Extract excel into GMW Construction
-        sourcedocument_data = construction
+            ## Extract excel into GMW Construction
+            sourcedocument_data = construction
 
-        payload = UploadTask(
-            bro_domain="GMW",
-            project_number="1",
-            registration_type="GMW_Construction",
-            request_type="registration",
-            sourcedocument_data=sourcedocument_data,
-            metadata=metadata,
-        )
-        payload = payload.model_dump(mode="json", by_alias=True)
-        print(payload)
-        r = brostar.post_upload(payload=payload, is_json=True)
-        r.raise_for_status()
+            payload = UploadTask(
+                bro_domain="GMW",
+                project_number="1",
+                registration_type="GMW_Construction",
+                request_type="registration",
+                sourcedocument_data=sourcedocument_data,
+                metadata=metadata,
+            )
+            payload = payload.model_dump(mode="json", by_alias=True)
+            if index.unchanged(payload) is not None:
+                logger.info(f"{put} has not changed since its last delivery, skipping.")
+                skipped += 1
+                continue
 
-        uuid: str = r.json()["uuid"]
-        brostar.await_completed(uuid=uuid)
-    return
+            logger.debug(payload)
+            r = brostar.post_upload(payload=payload, is_json=True)
+            r.raise_for_status()
 
+            uuid: str = r.json()["uuid"]
+            result = brostar.await_completed(uuid=uuid).json()
+            index.record(
+                payload, result.get("status", "UNKNOWN"), uuid=uuid, bro_id=result.get("bro_id")
+            )
 
-def pop_upload_task_fields(upload_task: dict) -> dict:
-    """Remove unnecessary fields from the upload task."""
-    upload_task.pop("uuid", None)
-    upload_task.pop("created_at", None)
-    upload_task.pop("updated_at", None)
-    upload_task.pop("data_owner", None)
-    return upload_task
+    logger.info(f"Skipped {skipped} of {len(putten)} GMWs without changes.")
+    return
 
 
-def total_events_delivered() -> int:
+def total_events_delivered(brostar: BROSTARConnection | None = None) -> int:
     """Retrieve the total number of events delivered."""
-    brostar_api_key = os.getenv("BROSTAR_API_KEY")
-    brostar = BROSTARConnection(brostar_api_key)  # BROSTAR API Key
-    brostar.set_website(production=True)
-
-    r = brostar.get(
-        "uploadtasks", params={"status": "COMPLETED", "registration_type": "GLD_Addition"}
+    if brostar is None:
+        brostar = setup_brostar_connection()
+
+    statistics = UploadTaskStatistics(
+        brostar,
+        cache_path=_environment_path(
+            _getenv("BROSTAR_STATISTICS_CACHE") or "uploadtask_statistics.parquet", brostar
+        ),
+        filters=ADDITION_FILTERS,
     )
-    r.raise_for_status()
+    statistics.refresh()
+    events_per_gld = statistics.events_delivered_per_gld()
+    logger.info(f"Total unique GLD IDs: {events_per_gld.height}")
 
-    total_count = 0
-    next = r.json().get("next")
-    bro_ids = []
-    for result in r.json().get("results", []):
-        bro_id = result.get("bro_id", None)
-        events_count = result.get("sourcedocument_data", {}).get("timeValuePairsCount", 0)
-        total_count += events_count
-        bro_ids.append(bro_id)
-
-    while next is not None:
-        r = brostar.s.get(next)
-        r.raise_for_status()
-        for result in r.json().get("results", []):
-            bro_id = result.get("bro_id", None)
-            events_count = result.get("sourcedocument_data", {}).get("timeValuePairsCount", 0)
-            total_count += events_count
-            bro_ids.append(bro_id)
-
-        next = r.json().get("next")
-
-    bro_ids = list(set(bro_ids))  # Remove duplicates
-    logger.info(f"Total unique GLD IDs: {len(bro_ids)}")
-
-    return total_count
+    return int(events_per_gld["events"].sum())
 
 
 def deliver_gld_start_registration(
@@ -770,99 +918,52 @@ def deliver_gld_start_registration(
     bro_id: str,
     tube_number: int,
     delivery_accountable_party: str,
-    monitoring_nets: list[str],
+    monitoring_nets: list[str] | str,
     project_number: str,
+    brostar: BROSTARConnection | None = None,
 ) -> str | None:
     """Send a gld start registration request that corrects the dates."""
 
-    brostar_api_key = os.getenv("BROSTAR_API_KEY")
-    brostar = BROSTARConnection(brostar_api_key)
-    brostar.set_website(production=True)
-    sourcedocument_data = {
-        "gmwBroId": bro_id,
-        "tubeNumber": tube_number,
-        "groundwaterMonitoringNets": eval(monitoring_nets),
-        "objectIdAccountableParty": internal_id,
-    }
-    metadata = UploadTaskMetadata(
-        request_reference="MeetnettenVitens-BROSTAR",
-        delivery_accountable_party=delivery_accountable_party,
-        quality_regime="IMBRO",
-    )
-
-    payload = UploadTask(
-        bro_domain="GLD",
-        project_number=str(project_number),
-        registration_type="GLD_StartRegistration",
-        request_type="registration",
-        sourcedocument_data=sourcedocument_data,
-        metadata=metadata,
+    if brostar is None:
+        brostar = setup_brostar_connection()
+    df = pl.DataFrame(
+        {
+            "objectIdAccountableParty": [internal_id],
+            "gmwBroId": [bro_id],
+            "tubeNumber": [tube_number],
+            "deliveryAccountableParty": [delivery_accountable_party],
+            "groundwaterMonitoringNets": [monitoring_nets],
+            "projectNumber": [project_number],
+        }
     )
-    payload = payload.model_dump(mode="json", by_alias=True)
-    r = brostar.post_upload(payload)
-    logger.info(r.json())
-    r.raise_for_status()
-
-    uuid: str = r.json()["uuid"]
-    r = brostar.await_completed(uuid=uuid)
-
-    return r.json().get("broId")
-
-
-def clear_fields_for_upload(upload_task: dict) -> dict:
-    """Clear fields that should not be set for a new upload task."""
-    upload_task["status"] = "PENDING"
-    upload_task["log"] = ""
-    upload_task["progress"] = 0
-    upload_task["bro_id"] = ""
-    upload_task["bro_delivery_url"] = ""
-    return upload_task
+    return register_gld_starts(brostar, df)["broId"][0]
 
 
 def correct_gld_dossier_for_observation_request(
     current_id: str,
     target_id: str,
-):
-    brostar_api_key = os.getenv("BROSTAR_API_KEY")
-    brostar = BROSTARConnection(brostar_api_key)  # BROSTAR API Key
-    brostar.set_website(production=True)
+    brostar: BROSTARConnection | None = None,
+) -> list[dict]:
+    return relocate_gld_dossiers({current_id: target_id}, brostar=brostar)
 
-    r = brostar.get(
-        "uploadtasks",
-        params={
-            "registration_type": "GLD_Addition",
-            "bro_id": current_id,
-        },
-    )
-    for result in r.json().get("results", []):
-        result = brostar.get_detail(endpoint="uploadtasks", uuid=result["uuid"]).json()
-        result = pop_upload_task_fields(result)
-        result = clear_fields_for_upload(result)
-        result["request_type"] = "delete"
-        result["metadata"].update({"correctionReason": "eigenCorrectie"})
-        r = brostar.post_upload(payload=result, is_json=True)
-        r.raise_for_status()
 
-        uuid: str = r.json()["uuid"]
-        brostar.await_completed(uuid=uuid)
+def relocate_gld_dossiers(
+    mappings: dict[str, str], brostar: BROSTARConnection | None = None
+) -> list[dict]:
+    """Move all GLD_Addition dossiers of many GLDs, {current_id: target_id}, in one run."""
+    if brostar is None:
+        brostar = setup_brostar_connection()
 
-        result["request_type"] = "registration"
-        result["metadata"]["requestReference"].replace(current_id, target_id)
-        result["metadata"]["broId"] = target_id
-        result["metadata"].pop("correctionReason")
-        result["status"] = "PENDING"
-        r = brostar.post_upload(payload=result, is_json=True)
-        r.raise_for_status()
-
-        uuid: str = r.json()["uuid"]
-        brostar.await_completed(uuid=uuid)
+    relocation = GLDRelocation(brostar)
+    relocation.plan(mappings)
+    return relocation.run()
 
 
 def convert_to_list(s):
     return ast.literal_eval(s)
 
 
-def correct_bulk_gld(excel_file: str | Path) -> None:
+def correct_bulk_gld(excel_file: str | Path, brostar: BROSTARConnection | None = None) -> None:
     df = pl.read_excel(excel_file, has_header=True)
     df_converted = df.with_columns(
         pl.col("broId").map_elements(convert_to_list, return_dtype=pl.List(pl.String))
@@ -881,27 +982,42 @@ def correct_bulk_gld(excel_file: str | Path) -> None:
     )
     total = result.height
     logger.info(f"Total rows to process: {total}")
+
+    # Look up all observation summaries at once, instead of one request per row. The cache
+    # is only used when BRO_SERVICES_CACHE_DIR is set, GLDs that were empty are always fetched.
+    bro_services = BROServicesConnection(cache_dir=_getenv("BRO_SERVICES_CACHE_DIR"))
+    summaries = bro_services.prefetch_gld_observations_summaries(result["current_id"])
+
     skip_count = 0
-    delete_ids = []
+    mappings = {}
     for i, row in enumerate(result.iter_rows(named=True)):
         logger.info(f"Processing row {i + 1}/{total}: {row}")
-        r = requests.get(
-            f"https://publiek.broservices.nl/gm/gld/v1/objects/{row['current_id']}/observationsSummary"
-        )
-        if len(r.json()) == 0:
+        if row["current_id"] not in summaries:
+            skip_count += 1
+            logger.info(f"Observations of {row['current_id']} could not be looked up. Skipping.")
+            continue
+        if len(summaries[row["current_id"]]) == 0:
             skip_count += 1
             logger.info(f"No observations found for {row['current_id']}. Skipping.")
-            delete_ids += [row["current_id"]]
             continue
 
-        correct_gld_dossier_for_observation_request(
-            current_id=row["current_id"],
-            target_id=row["target_id"],
-        )
-        logger.info(f"Completed processing row {i + 1}/{total}")
-        delete_ids += [row["current_id"]]
+        mappings[row["current_id"]] = row["target_id"]
+
+    # Relocate all dossiers in one pipelined run
+    relocations = relocate_gld_dossiers(mappings, brostar=brostar)
+
+    print(f"Skipped {skip_count} rows due to no observations found or a failed lookup.")
 
-    print(f"Skipped {skip_count} rows due to no observations found.")
+    # Only GLDs whose additions were all relocated can be deleted
+    statuses: dict[str, list[str]] = {}
+    for relocation in relocations:
+        statuses.setdefault(relocation["current_id"], []).append(relocation["status"])
+    delete_ids = [
+        current_id
+        for current_id, relocation_statuses in statuses.items()
+        if all(status == "COMPLETED" for status in relocation_statuses)
+    ]
+    logger.info(f"{len(delete_ids)} of {len(mappings)} relocated GLDs can be deleted.")
 
     # Write to a CSV file
     with open(
@@ -913,84 +1029,57 @@ def correct_bulk_gld(excel_file: str | Path) -> None:
             writer.writerow([bro_id])
 
 
-def create_bulk_gld(excel_file: str | Path) -> None:
+def create_bulk_gld(excel_file: str | Path, brostar: BROSTARConnection | None = None) -> None:
     df = pl.read_excel(excel_file, has_header=True)
-    brostar_api_key = os.getenv("BROSTAR_API_KEY")
-    brostar = BROSTARConnection(brostar_api_key)
-    brostar.set_website(production=True)
-
-    r = brostar.get("uploadtasks", params={"registration_type": "GLD_StartRegistration"})
-    r.raise_for_status()
+    if brostar is None:
+        brostar = setup_brostar_connection()
 
-    results = []
-    next = r.json().get("next")
-    results += r.json().get("results", [])
-    while next is not None:
-        r = brostar.s.get(next)
-        r.raise_for_status()
-        results += r.json().get("results", [])
-        next = r.json().get("next")
+    mirror = setup_brostar_mirror(brostar)
+    mirror.sync("uploadtasks", params={"registration_type": "GLD_StartRegistration"})
 
-    df2 = pl.DataFrame(results)
+    df2 = pl.DataFrame(mirror.filter("uploadtasks", registration_type="GLD_StartRegistration"))
     df2 = df2.with_columns(
         pl.col("sourcedocument_data").struct.field("objectIdAccountableParty").alias("business_id"),
     )
     df2 = df2.select(
         "bro_id",
         "business_id",
-    )
-    print(df2)
+    ).unique("business_id")
 
+    # Rows with an existing registration get its bro_id and are not delivered again
     df = df.join(df2, left_on="objectIdAccountableParty", right_on="business_id", how="left")
-    print(df)
-
-    bro_ids = []
-    for _i, row in enumerate(df.iter_rows(named=True)):
-        if row["groundwaterMonitoringNets"] is None:
-            bro_ids.append(None)
-            continue
-
-        bro_id = deliver_gld_start_registration(
-            internal_id=row["objectIdAccountableParty"],
-            bro_id=row["gmwBroId"],
-            tube_number=row["tubeNumber"],
-            delivery_accountable_party=str(row["deliveryAccountableParty"]),
-            monitoring_nets=row["groundwaterMonitoringNets"],
-            project_number=row["projectNumber"],
-        )
-        bro_ids.append(bro_id)
-        logger.info(bro_id)
+    with setup_delivery_index(brostar) as index:
+        registrations = register_gld_starts(brostar, df, index=index)
+    logger.info(registrations)
+    unchanged = registrations.filter(pl.col("status") == "UNCHANGED").height
+    logger.info(f"Skipped {unchanged} GLD start registrations without changes.")
 
     # Save to new Excel file with "v2" suffix
     new_filename = excel_file.replace(".xlsx", "_v2.xlsx")
-    df = df.with_columns(pl.Series("broId", bro_ids))
+    df = df.with_columns(registrations["broId"], registrations["status"])
     df.write_excel(new_filename)
 
     logger.info(f"Saved updated DataFrame to {new_filename}")
 
 
-def process_result(result: dict) -> None:
-    lizard_api_key = os.getenv("LIZARD_API_KEY")
-    lizard_s = requests.Session()
-    lizard_s.headers = {
-        "username": "__key__",
-        "password": lizard_api_key,  # Lizard API Key
-        "Content-Type": "application/json",
-    }
+def process_result(result: dict, lizard: LizardConnection | None = None) -> None:
+    if lizard is None:
+        lizard = setup_lizard_connection(tenant="rotterdam")
 
-    r = lizard_s.get(
-        url="https://rotterdam.lizard.net/api/v4/locations/",
+    r = lizard.get(
+        "locations",
         params={
             "code": f"{result['sourcedocument_data']['gmwBroId']}-{result['sourcedocument_data']['tubeNumber']:03d}"
         },
         timeout=15,
     )
     r.raise_for_status()
-    if len(r.json()["results"]) == 0:
+    locations = r.json()["results"]
+    if len(locations) == 0:
         logger.info("No locations found.")
         return
 
-    extra_metadata = r.json()["results"][0]["extra_metadata"]
+    extra_metadata = locations[0]["extra_metadata"]
     logger.info(f"quality_regime is {result['metadata']['qualityRegime']}")
     logger.info(f"BRO-ID: {result['bro_id']}")
 
@@ -1001,61 +1090,72 @@ def process_result(result: dict) -> None:
         extra_metadata["bro"]["gldIdImbroA"] = result["bro_id"]
         logger.info(extra_metadata["bro"])
 
-    r = lizard_s.patch(
-        url=r.json()["results"][0]["url"], json={"extra_metadata": extra_metadata}, timeout=15
-    )
+    r = lizard.patch(locations[0]["url"], json={"extra_metadata": extra_metadata})
     r.raise_for_status()
-    print(r.json())
-    print("\n\n")
-
-
-def gld_to_lizard(location_code: str, gld_id: str) -> None:
-    lizard_api_key = os.getenv("LIZARD_API_KEY")
-    lizard_s = requests.Session()
-    lizard_s.headers = {
-        "username": "__key__",
-        "password": lizard_api_key,  # Lizard API Key
-        "Content-Type": "application/json",
-    }
-
-    r = lizard_s.get(
-        url="https://vitens.lizard.net/api/v4/locations/",
-        params={"code": f"{location_code}"},
-        timeout=15,
-    )
+    logger.info(r.json())
+
+
+def gld_to_lizard(location_code: str, gld_id: str, lizard: LizardConnection | None = None) -> None:
+    if lizard is None:
+        lizard = setup_lizard_connection(tenant="vitens")
+
+    r = lizard.get("locations", params={"code": f"{location_code}"}, timeout=15)
     r.raise_for_status()
-    if len(r.json()["results"]) == 0:
+    locations = r.json()["results"]
+    if len(locations) == 0:
         logger.info(r.url)
         logger.info("No locations found.")
         return
 
-    extra_metadata = r.json()["results"][0]["extra_metadata"]
+    extra_metadata = locations[0]["extra_metadata"]
 
     extra_metadata["bro"]["broid_gld_imbro"] = gld_id
     logger.info(extra_metadata["bro"])
 
-    r = lizard_s.patch(
-        url=r.json()["results"][0]["url"], json={"extra_metadata": extra_metadata}, timeout=15
-    )
+    r = lizard.patch(locations[0]["url"], json={"extra_metadata": extra_metadata})
     r.raise_for_status()
-    print(r.json())
-    print("\n\n")
+    logger.info(r.json())
+
 
+def gld_ids_to_lizard(gld_ids: dict[str, str], lizard: LizardConnection | None = None) -> int:
+    """Write many GLD ids (location code -> GLD id) into the Lizard location metadata at once."""
+    if lizard is None:
+        lizard = setup_lizard_connection(tenant="vitens")
 
-def ingest_gld_ids_into_lizard():
+    index = LizardLocationIndex(lizard)
+    index.refresh()
+    return index.update_bro_ids(
+        {code: {"broid_gld_imbro": gld_id} for code, gld_id in gld_ids.items()}
+    )
+
+
+def ingest_gld_ids_into_lizard(brostar: BROSTARConnection | None = None):
     """Retrieve all uploadtasks / registrations and ingest the information into Lizard."""
-    brostar_api_key = os.getenv("BROSTAR_API_KEY")
-    brostar = BROSTARConnection(brostar_api_key)  # BROSTAR API Key
-    brostar.set_website(production=True)
+    if brostar is None:
+        brostar = setup_brostar_connection()
+    lizard = setup_lizard_connection(tenant="rotterdam")
 
+    # Collect the GLD ids per location code, IMBRO and IMBRO/A in separate keys
+    updates: dict[str, dict[str, str]] = {}
     r = brostar.get(
         "uploadtasks", params={"registration_type": "GLD_StartRegistration", "status": "COMPLETED"}
     )
-    while r.json()["next"] is not None:
-        for result in r.json()["results"]:
-            logger.info(f"Processing {result}")
-
-            # Get the bro_id from the registration and update Lizard
-            process_result(result)
+    r.raise_for_status()
+    page = r.json()
+    while True:
+        for result in page["results"]:
+            sourcedocument_data = result["sourcedocument_data"]
+            code = f"{sourcedocument_data['gmwBroId']}-{sourcedocument_data['tubeNumber']:03d}"
+            key = "gldIdImbro" if result["metadata"]["qualityRegime"] == "IMBRO" else "gldIdImbroA"
+            updates.setdefault(code, {})[key] = result["bro_id"]
+
+        if page["next"] is None:
+            break
+        r = brostar.get_url(page["next"])
+        r.raise_for_status()
+        page = r.json()
 
-        r = brostar.s.get(url=r.json()["next"], timeout=15)
+    # Fetch all locations once and only patch the ones that changed
+    index = LizardLocationIndex(lizard)
+    index.refresh()
+    index.update_bro_ids(updates)
@@ -0,0 +1,409 @@
+from __future__ import annotations
+
+import io
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+import requests
+from pydantic import ValidationError
+
+from ._lazy import lazy_import
+from .connection import BROSTARConnection
+from .deliveries import DeliveryIndex
+from .response import BROSTARResponse
+from .upload_models import (
+    GAR,
+    GLDBulkUploadMetadata,
+    GLDBulkUploadSourcedocumentData,
+    GLDStartregistration,
+    UploadTask,
+    UploadTaskMetadata,
+    list_adapter,
+)
+
+if TYPE_CHECKING:
+    import polars as pl
+else:
+    pl = lazy_import("polars")
+
+logger = logging.getLogger(__name__)
+
+# Column order of the measurement TVP file, matching the TimeValuePair aliases.
+GLD_TVP_COLUMNS = (
+    "time",
+    "value",
+    "statusQualityControl",
+    "censorReason",
+    "censoringLimitvalue",
+)
+
+# Columns of a flat laboratory table, grouped into the nested GAR structure.
+GAR_SAMPLE_KEYS = ("gmw_bro_id", "tube_number", "sampling_date_time")
+GAR_PROCESS_KEYS = ("analysis_date", "analytical_technique", "valuation_method")
+GAR_COLUMNS = ("object_id_accountable_party", "quality_control_method")
+FIELD_RESEARCH_COLUMNS = (
+    "sampling_operator",
+    "sampling_standard",
+    "pump_type",
+    "primary_colour",
+    "secondary_colour",
+    "colour_strength",
+    "abnormality_in_cooling",
+    "abnormality_in_device",
+    "polluted_by_engine",
+    "filter_aerated",
+    "ground_water_level_dropped_too_much",
+    "abnormal_filter",
+    "sample_aerated",
+    "hose_reused",
+    "temperature_difficult_to_measure",
+)
+ANALYSIS_COLUMNS = (
+    "parameter",
+    "unit",
+    "analysis_measurement_value",
+    "limit_symbol",
+    "reporting_limit",
+    "quality_control_status",
+)
+OPTIONAL_GAR_COLUMNS = (
+    "sampling_operator",
+    "primary_colour",
+    "secondary_colour",
+    "colour_strength",
+    "limit_symbol",
+    "reporting_limit",
+    "responsible_laboratory_kvk",
+)
+
+# Columns of a GLD start registration workbook
+GLD_START_REGISTRATION_COLUMNS = (
+    "objectIdAccountableParty",
+    "gmwBroId",
+    "tubeNumber",
+    "deliveryAccountableParty",
+    "groundwaterMonitoringNets",
+    "projectNumber",
+)
+
+
+def _format_time_column(df: pl.DataFrame) -> pl.DataFrame:
+    """Format the time column to the BRO datetime notation when it is not a string yet."""
+    dtype = df.schema["time"]
+    if dtype == pl.String:
+        return df
+    if isinstance(dtype, pl.Datetime) and dtype.time_zone is not None:
+        return df.with_columns(pl.col("time").dt.strftime("%Y-%m-%dT%H:%M:%S%:z"))
+    return df.with_columns(pl.col("time").dt.strftime("%Y-%m-%dT%H:%M:%S"))
+
+
+def write_gld_timeseries_file(df: pl.DataFrame) -> io.BytesIO:
+    """Write the time value pairs of a DataFrame to an in-memory CSV file.
+
+    The DataFrame requires a `time` and `value` column. The optional columns
+    `statusQualityControl`, `censorReason` and `censoringLimitvalue` are filled when missing.
+    """
+    missing = {"time", "value"} - set(df.columns)
+    if missing:
+        raise ValueError(f"DataFrame is missing required columns: {sorted(missing)}")
+
+    defaults = {
+        "statusQualityControl": pl.lit("onbekend"),
+        "censorReason": pl.lit(None, dtype=pl.String),
+        "censoringLimitvalue": pl.lit(None, dtype=pl.Float64),
+    }
+    df = df.with_columns(
+        expr.alias(column) for column, expr in defaults.items() if column not in df.columns
+    )
+    df = _format_time_column(df).select(GLD_TVP_COLUMNS)
+
+    buffer = io.BytesIO()
+    df.write_csv(buffer)
+    buffer.seek(0)
+    return buffer
+
+
+def _fill_positions(
+    df: pl.DataFrame, sourcedocument: GLDBulkUploadSourcedocumentData
+) -> GLDBulkUploadSourcedocumentData:
+    """Derive begin, end and result time from the series when they are not set."""
+    if df.is_empty() or (
+        sourcedocument.begin_position and sourcedocument.end_position and sourcedocument.result_time
+    ):
+        return sourcedocument
+
+    times = _format_time_column(df.select("time"))["time"].sort()
+    first, last = times[0], times[-1]
+    return sourcedocument.model_copy(
+        update={
+            "begin_position": sourcedocument.begin_position or first.split("T")[0],
+            "end_position": sourcedocument.end_position or last.split("T")[0],
+            "result_time": sourcedocument.result_time or last,
+        }
+    )
+
+
+def upload_gld_bulk(
+    brostar: BROSTARConnection,
+    df: pl.DataFrame,
+    metadata: GLDBulkUploadMetadata,
+    sourcedocument: GLDBulkUploadSourcedocumentData,
+    project_number: str | int,
+) -> BROSTARResponse:
+    """Upload a complete GLD series through the bulkuploads endpoint.
+
+    The measurement TVP file is written from the DataFrame into memory and sent
+    as multipart upload, so large series do not need separate GLD_Addition tasks.
+    """
+    sourcedocument = _fill_positions(df, sourcedocument)
+    payload = {
+        "bulk_upload_type": "GLD",
+        "project_number": str(project_number),
+        "metadata": json.dumps(metadata.model_dump(mode="json", by_alias=True)),
+        "sourcedocument_data": json.dumps(sourcedocument.model_dump(mode="json", by_alias=True)),
+    }
+    timeseries_file = write_gld_timeseries_file(df)
+    logger.info(f"Uploading {df.height} time value pairs for {metadata.bro_id} in bulk.")
+
+    return brostar.post_gld_bulk(
+        payload=payload,
+        timeseries_file=(f"{metadata.bro_id}.csv", timeseries_file, "text/csv"),
+    )
+
+
+def group_laboratory_table(df: pl.DataFrame) -> pl.DataFrame:
+    """Group a flat laboratory table into one row per sample with nested GAR structs.
+
+    Every row of the input is a single analysis. Analyses are grouped per analysis
+    process, processes per laboratory and laboratories per sample, all with
+    `group_by`/`agg` so no nested models are built row by row.
+    """
+    df = df.with_columns(
+        pl.lit(None, dtype=pl.String).alias(column)
+        for column in OPTIONAL_GAR_COLUMNS
+        if column not in df.columns
+    )
+    required = (
+        set(GAR_SAMPLE_KEYS)
+        | set(GAR_PROCESS_KEYS)
+        | set(GAR_COLUMNS)
+        | set(FIELD_RESEARCH_COLUMNS)
+        | set(ANALYSIS_COLUMNS)
+    )
+    missing = required - set(df.columns)
+    if missing:
+        raise ValueError(f"DataFrame is missing required columns: {sorted(missing)}")
+
+    sample_keys = list(GAR_SAMPLE_KEYS)
+    sample_columns = [*GAR_COLUMNS, *FIELD_RESEARCH_COLUMNS]
+    if "groundwater_monitoring_nets" in df.columns:
+        sample_columns.append("groundwater_monitoring_nets")
+
+    processes = df.group_by(
+        [*sample_keys, "responsible_laboratory_kvk", *GAR_PROCESS_KEYS], maintain_order=True
+    ).agg(
+        pl.col(sample_columns).first(),
+        pl.struct(ANALYSIS_COLUMNS).alias("analyses"),
+    )
+    laboratories = processes.group_by(
+        [*sample_keys, "responsible_laboratory_kvk"], maintain_order=True
+    ).agg(
+        pl.col(sample_columns).first(),
+        pl.struct(
+            pl.col("analysis_date").alias("date"),
+            "analytical_technique",
+            "valuation_method",
+            "analyses",
+        ).alias("analysis_processes"),
+    )
+    samples = laboratories.group_by(sample_keys, maintain_order=True).agg(
+        pl.col(sample_columns).first(),
+        pl.struct("responsible_laboratory_kvk", "analysis_processes").alias("laboratory_analyses"),
+    )
+    return samples.select(
+        *GAR_COLUMNS,
+        *(["groundwater_monitoring_nets"] if "groundwater_monitoring_nets" in df.columns else []),
+        "gmw_bro_id",
+        "tube_number",
+        pl.struct("sampling_date_time", *FIELD_RESEARCH_COLUMNS).alias("field_research"),
+        "laboratory_analyses",
+    )
+
+
+def build_gar_sourcedocuments(df: pl.DataFrame) -> list[GAR]:
+    """Build GAR sourcedocuments from a flat laboratory table.
+
+    The grouped frame is validated in a single call, so the nested models are
+    constructed by pydantic-core instead of a Python loop per analysis.
+    """
+    return list_adapter(GAR).validate_python(group_laboratory_table(df).to_dicts())
+
+
+def parse_list_column(df: pl.DataFrame, column: str) -> pl.DataFrame:
+    """Parse a column of Python list notation, e.g. "['GMN1', 'GMN2']", into a list column.
+
+    Items are quoted strings, with single or double quotes and without escapes.
+
+    :raises ValueError: When a value is not in list notation.
+    """
+    if df.schema[column] != pl.String:
+        return df
+    invalid = df.filter(~pl.col(column).str.contains(r"^\s*\[.*\]\s*$"))[column]
+    if invalid.len() > 0:
+        raise ValueError(f"Column {column} has values not in list notation: {invalid.to_list()}")
+    return df.with_columns(
+        pl.col(column)
+        .str.extract_all(r"'[^']*'|\"[^\"]*\"")
+        .list.eval(pl.element().str.slice(1, pl.element().str.len_chars() - 2))
+    )
+
+
+def _await_bro_id(brostar: BROSTARConnection, payload: dict) -> tuple[str | None, str]:
+    r = brostar.post_upload(payload)
+    r.raise_for_status()
+    r = brostar.await_completed(uuid=r.json()["uuid"])
+    result = r.json()
+    return result.get("bro_id") or result.get("broId") or None, result.get("status", "UNKNOWN")
+
+
+def register_gld_starts(
+    brostar: BROSTARConnection,
+    df: pl.DataFrame,
+    request_reference: str = "MeetnettenVitens-BROSTAR",
+    quality_regime: str = "IMBRO",
+    max_workers: int = 5,
+    index: DeliveryIndex | None = None,
+) -> pl.DataFrame:
+    """Deliver a GLD start registration for every row of a DataFrame.
+
+    Rows that already have a `bro_id` (e.g. joined from the existing uploadtasks)
+    and rows without monitoring nets are skipped. The others are validated per row and
+    submitted concurrently over the shared connection; invalid rows get the status FAILED.
+
+    :param index: Delivery index to record the outcomes in. Rows whose payload did not
+        change since their last COMPLETED delivery are not sent again and get the status
+        UNCHANGED with the bro_id of that delivery.
+
+    :return: Per row of `df`, in the same order, the objectIdAccountableParty with the
+        resulting `broId` and `status`.
+    """
+    missing = set(GLD_START_REGISTRATION_COLUMNS) - set(df.columns)
+    if missing:
+        raise ValueError(f"DataFrame is missing required columns: {sorted(missing)}")
+
+    df = parse_list_column(df, "groundwaterMonitoringNets").with_row_index("_row")
+    if "bro_id" not in df.columns:
+        df = df.with_columns(pl.lit(None, dtype=pl.String).alias("bro_id"))
+
+    existing = df.filter(pl.col("bro_id").is_not_null())
+    skipped = df.filter(pl.col("bro_id").is_null(), pl.col("groundwaterMonitoringNets").is_null())
+    new = df.filter(pl.col("bro_id").is_null(), pl.col("groundwaterMonitoringNets").is_not_null())
+    logger.info(
+        f"Registering {new.height} GLDs, {existing.height} already registered "
+        f"and {skipped.height} without monitoring nets."
+    )
+
+    def build(row: dict) -> dict | None:
+        try:
+            return UploadTask(
+                bro_domain="GLD",
+                project_number=str(row["projectNumber"]),
+                registration_type="GLD_StartRegistration",
+                request_type="registration",
+                sourcedocument_data=GLDStartregistration.model_validate(
+                    {
+                        "objectIdAccountableParty": row["objectIdAccountableParty"],
+                        "gmwBroId": row["gmwBroId"],
+                        "tubeNumber": row["tubeNumber"],
+                        "groundwaterMonitoringNets": row["groundwaterMonitoringNets"],
+                    }
+                ),
+                metadata=UploadTaskMetadata(
+                    request_reference=request_reference,
+                    delivery_accountable_party=str(row["deliveryAccountableParty"]),
+                    quality_regime=quality_regime,
+                ),
+            ).model_dump(mode="json", by_alias=True)
+        except ValidationError as e:
+            logger.exception(
+                f"Invalid GLD start registration for {row['objectIdAccountableParty']}: {e}"
+            )
+            return None
+
+    rows = new.with_columns(pl.col("objectIdAccountableParty").cast(pl.String))
+    payloads = [build(row) for row in rows.iter_rows(named=True)]
+
+    def deliver(payload: dict) -> tuple[str | None, str]:
+        try:
+            return _await_bro_id(brostar, payload)
+        except (requests.RequestException, ValidationError) as e:
+            logger.exception(f"Failed to register GLD for {payload['sourcedocument_data']}: {e}")
+            return None, "FAILED"
+
+    previous = [
+        index.unchanged(payload) if index is not None and payload is not None else None
+        for payload in payloads
+    ]
+    changed = [
+        payload
+        for payload, delivery in zip(payloads, previous, strict=True)
+        if payload is not None and delivery is None
+    ]
+    unchanged = sum(delivery is not None for delivery in previous)
+    if unchanged:
+        logger.info(f"Skipping {unchanged} unchanged GLD start registrations.")
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        outcomes = list(executor.map(deliver, changed))
+
+    if index is not None:
+        for payload, (bro_id, status) in zip(changed, outcomes, strict=True):
+            index.record(payload, status, bro_id=bro_id)
+
+    remaining = iter(outcomes)
+    delivered = []
+    for payload, delivery in zip(payloads, previous, strict=True):
+        if payload is None:
+            delivered.append((None, "FAILED"))
+        elif delivery is not None:
+            delivered.append((delivery["bro_id"], "UNCHANGED"))
+        else:
+            delivered.append(next(remaining))
+
+    schema = {
+        "_row": pl.UInt32,
+        "objectIdAccountableParty": pl.String,
+        "broId": pl.String,
+        "status": pl.String,
+    }
+    return (
+        pl.concat(
+            [
+                existing.select(
+                    "_row",
+                    pl.col("objectIdAccountableParty").cast(pl.String),
+                    pl.col("bro_id").alias("broId"),
+                    pl.lit("EXISTING").alias("status"),
+                ),
+                skipped.select(
+                    "_row",
+                    pl.col("objectIdAccountableParty").cast(pl.String),
+                    pl.lit(None, dtype=pl.String).alias("broId"),
+                    pl.lit("SKIPPED").alias("status"),
+                ),
+                pl.DataFrame(
+                    {
+                        "_row": new["_row"],
+                        "objectIdAccountableParty": new["objectIdAccountableParty"].cast(pl.String),
+                        "broId": [bro_id for bro_id, _ in delivered],
+                        "status": [status for _, status in delivered],
+                    },
+                    schema=schema,
+                ),
+            ]
+        )
+        .sort("_row")
+        .drop("_row")
+    )
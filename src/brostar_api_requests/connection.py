@@ -1,11 +1,21 @@
+import datetime
+import json
 import logging
+import threading
 import time
-from typing import BinaryIO, Literal
+import weakref
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Literal, TypeVar
 
 import requests
 from requests.adapters import HTTPAdapter, Retry
 from requests.auth import HTTPBasicAuth
 
+from .multipart import FileSpec, MultipartEncoder, ProgressCallback
+from .response import BROSTARResponse
+
 logger = logging.getLogger(__name__)
 
 BrostarEndpoint = Literal[
@@ -33,6 +43,19 @@ BrostarUploadEndpoints = Literal[
 
 BroRequest = Literal["registration", "replace", "insert", "move", "delete"]
 
+LizardEndpoint = Literal[
+    "locations",
+    "timeseries",
+    "observationtypes",
+    "organisations",
+]
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+BROSTAR_PRODUCTION_URL = "https://www.brostar.nl/api"
+BROSTAR_STAGING_URL = "https://staging.brostar.nl/api"
+
 
 class BROSTARConnection:
     def __init__(self, token: str):
@@ -40,7 +63,7 @@ class BROSTARConnection:
             raise ValueError("Token must be a string.")
 
         # Session
-        self.website = "https://staging.brostar.nl/api"
+        self.website = BROSTAR_STAGING_URL
         self.s = requests.Session()
         retry = Retry(
             total=6,
@@ -57,10 +80,10 @@ class BROSTARConnection:
         :param production: True for production, False for staging.
         """
         if production:
-            self.website = "https://www.brostar.nl/api"
+            self.website = BROSTAR_PRODUCTION_URL
             logger.info("Production set.")
         else:
-            self.website = "https://staging.brostar.nl/api"
+            self.website = BROSTAR_STAGING_URL
             logger.info("Staging set.")
 
     def authenticate(self, token: str) -> None:
@@ -75,52 +98,86 @@ class BROSTARConnection:
         self.s.auth = auth
         logger.info("Authentication set.")
 
-    def get(self, endpoint: BrostarEndpoint, params: dict | None = None) -> requests.Response:
-        return self.s.get(url=f"{self.website}/{endpoint}/", params=params, timeout=15)
+    def get(self, endpoint: BrostarEndpoint, params: dict | None = None) -> BROSTARResponse:
+        r = self.s.get(url=f"{self.website}/{endpoint}/", params=params, timeout=15)
+        return BROSTARResponse(r)
 
-    def get_detail(self, endpoint: BrostarEndpoint, uuid: str) -> requests.Response:
-        return self.s.get(url=f"{self.website}/{endpoint}/{uuid}", timeout=15)
+    def get_detail(self, endpoint: BrostarEndpoint, uuid: str) -> BROSTARResponse:
+        return BROSTARResponse(self.s.get(url=f"{self.website}/{endpoint}/{uuid}", timeout=15))
 
-    def post_upload(self, payload: dict[str, str], is_json: bool = True) -> requests.Response:
+    def get_url(self, url: str) -> BROSTARResponse:
+        """GET an absolute url, e.g. the next link of a paginated response."""
+        return BROSTARResponse(self.s.get(url=url, timeout=15))
+
+    def post_upload(self, payload: dict[str, str], is_json: bool = True) -> BROSTARResponse:
         if is_json:
-            return self.s.post(url=f"{self.website}/uploadtasks/", json=payload, timeout=15)
-        return self.s.post(url=f"{self.website}/uploadtasks/", data=payload, timeout=15)
+            r = self.s.post(url=f"{self.website}/uploadtasks/", json=payload, timeout=15)
+        else:
+            r = self.s.post(url=f"{self.website}/uploadtasks/", data=payload, timeout=15)
+        return BROSTARResponse(r)
 
-    def post_gar_bulk(
-        self, payload: dict[str, str], fieldwork_file: BinaryIO, lab_file: BinaryIO
-    ) -> requests.Response:
-        return self.s.post(
+    def _post_multipart(
+        self,
+        payload: dict[str, str],
+        files: dict[str, FileSpec],
+        timeout: int,
+        progress_callback: ProgressCallback | None = None,
+    ) -> BROSTARResponse:
+        """Stream a multipart body to the bulkuploads endpoint, reading files in chunks."""
+        encoder = MultipartEncoder(fields=payload, files=files, progress_callback=progress_callback)
+        r = self.s.post(
             url=f"{self.website}/bulkuploads/",
-            data=payload,
+            data=encoder,
+            headers={"Content-Type": encoder.content_type},
+            timeout=timeout,
+        )
+        return BROSTARResponse(r)
+
+    def post_gar_bulk(
+        self,
+        payload: dict[str, str],
+        fieldwork_file: FileSpec,
+        lab_file: FileSpec,
+        progress_callback: ProgressCallback | None = None,
+    ) -> BROSTARResponse:
+        return self._post_multipart(
+            payload=payload,
             files={"fieldwork_file": fieldwork_file, "lab_file": lab_file},
             timeout=60,
+            progress_callback=progress_callback,
         )
 
     def post_gmn_bulk(
-        self, payload: dict[str, str], measuring_point_file: BinaryIO
-    ) -> requests.Response:
-        return self.s.post(
-            url=f"{self.website}/bulkuploads/",
-            data=payload,
+        self,
+        payload: dict[str, str],
+        measuring_point_file: FileSpec,
+        progress_callback: ProgressCallback | None = None,
+    ) -> BROSTARResponse:
+        return self._post_multipart(
+            payload=payload,
             files={"measurement_tvp_file": measuring_point_file},
             timeout=30,
+            progress_callback=progress_callback,
         )
 
     def post_gld_bulk(
-        self, payload: dict[str, str], timeseries_file: BinaryIO
-    ) -> requests.Response:
-        return self.s.post(
-            url=f"{self.website}/bulkuploads/",
-            data=payload,
+        self,
+        payload: dict[str, str],
+        timeseries_file: FileSpec,
+        progress_callback: ProgressCallback | None = None,
+    ) -> BROSTARResponse:
+        return self._post_multipart(
+            payload=payload,
             files={"measurement_tvp_file": timeseries_file},
             timeout=60,
+            progress_callback=progress_callback,
         )
 
     def await_bro_id(self, uuid: str) -> str | None:
         """
-        Wait for the bro_id to be available in the response. For a maximum of 45 seconds. Then return None.
+        Wait for the uploadtask to be COMPLETED or FAILED. For a maximum of 45 seconds.
         Input: uuid of uploadtask.
-        Output: bro_id or None.
+        Output: the last response on the uploadtask.
         """
         timer = 0
         r = self.s.get(url=f"{self.website}/uploadtasks/{uuid}/", timeout=15)
@@ -135,20 +192,20 @@ class BROSTARConnection:
 
         return bro_id
 
-    def await_completed(self, uuid: str) -> requests.Response:
+    def await_completed(self, uuid: str) -> BROSTARResponse:
         """
         Wait for the bro_id to be available in the response. For a maximum of 45 seconds. Then return None.
         Input: uuid of uploadtask.
         Output: bro_id or None.
         """
         timer = 0
-        r = self.s.get(url=f"{self.website}/uploadtasks/{uuid}/", timeout=15)
+        r = self.get_url(f"{self.website}/uploadtasks/{uuid}/")
         r.raise_for_status()
         status = r.json().get("status", "PENDING")
-        while status != "COMPLETED" and timer < 45:
+        while status not in ("COMPLETED", "FAILED") and timer < 45:
             time.sleep(3)
             try:
-                r = self.s.get(url=f"{self.website}/uploadtasks/{uuid}/", timeout=15)
+                r = self.get_url(f"{self.website}/uploadtasks/{uuid}/")
                 r.raise_for_status()
             except requests.exceptions.HTTPError as e:
                 logger.exception(f"Error while checking status: {e}")
@@ -160,5 +217,303 @@ class BROSTARConnection:
 
         return r
 
-    def check_status(self, uuid: str) -> requests.Response:
-        return self.s.post(url=f"{self.website}/uploadtasks/{uuid}/check_status/", timeout=15)
+    def check_status(self, uuid: str) -> BROSTARResponse:
+        r = self.s.post(url=f"{self.website}/uploadtasks/{uuid}/check_status/", timeout=15)
+        return BROSTARResponse(r)
+
+    def close(self) -> None:
+        self.s.close()
+
+
+class ThreadSafeBROSTARConnection(BROSTARConnection):
+    """BROSTAR connection that can be shared between worker threads.
+
+    Token and environment are fixed at construction. Every thread gets its own
+    session, all mounted on one HTTPAdapter, so the threads share a single
+    connection pool without sharing session state.
+    """
+
+    def __init__(self, token: str, production: bool = False, pool_size: int = 10):
+        if not isinstance(token, str):
+            raise ValueError("Token must be a string.")
+
+        self._website = BROSTAR_PRODUCTION_URL if production else BROSTAR_STAGING_URL
+        self._auth = HTTPBasicAuth(username="__key__", password=token)
+        retry = Retry(
+            total=6,
+            backoff_factor=0.5,
+        )
+        self._adapter = HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+        )
+        self._local = threading.local()
+        # Weak, so the session of a finished thread goes with its thread-local
+        self._sessions: weakref.WeakSet[requests.Session] = weakref.WeakSet()
+        self._lock = threading.Lock()
+
+    @property
+    def website(self) -> str:
+        return self._website
+
+    @property
+    def s(self) -> requests.Session:
+        """Session of the current thread."""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.mount("http://", self._adapter)
+            session.mount("https://", self._adapter)
+            session.auth = self._auth
+            self._local.session = session
+            with self._lock:
+                self._sessions.add(session)
+        return session
+
+    def set_website(self, production: bool) -> None:
+        raise AttributeError(
+            "The environment of a ThreadSafeBROSTARConnection is fixed, create a new connection."
+        )
+
+    def authenticate(self, token: str) -> None:
+        raise AttributeError(
+            "The token of a ThreadSafeBROSTARConnection is fixed, create a new connection."
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            for session in list(self._sessions):
+                session.close()
+            self._sessions.clear()
+        self._adapter.close()
+
+
+class ConnectionRegistry:
+    """Long-lived thread-safe BROSTAR connections, one per (token, environment).
+
+    Workflows that get their connection from the same registry share its session
+    and connection pool. Used as context manager, all connections are closed on exit.
+    """
+
+    def __init__(self) -> None:
+        self._connections: dict[tuple[str, bool], ThreadSafeBROSTARConnection] = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "ConnectionRegistry":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._connections)
+
+    def get(self, token: str, production: bool = True) -> ThreadSafeBROSTARConnection:
+        key = (token, production)
+        with self._lock:
+            brostar = self._connections.get(key)
+            if brostar is None:
+                brostar = ThreadSafeBROSTARConnection(token, production=production)
+                self._connections[key] = brostar
+        return brostar
+
+    def close(self) -> None:
+        with self._lock:
+            for brostar in self._connections.values():
+                brostar.close()
+            self._connections.clear()
+
+
+# Registry shared by the workflows of a job run
+connections = ConnectionRegistry()
+
+
+class LizardConnection:
+    """Pooled keep-alive connection to the Lizard API of a single tenant.
+
+    One instance should be shared for all Lizard calls of a job, so the TLS
+    connections in the pool are reused instead of set up per request.
+    """
+
+    def __init__(self, token: str, tenant: str = "vitens", max_workers: int = 8):
+        if not isinstance(token, str):
+            raise ValueError("Token must be a string.")
+
+        self.max_workers = max_workers
+        self.set_tenant(tenant)
+
+        # Session
+        self.s = requests.Session()
+        retry = Retry(
+            total=6,
+            backoff_factor=0.5,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=max_workers, pool_maxsize=max_workers, max_retries=retry
+        )
+        self.s.mount("http://", adapter)
+        self.s.mount("https://", adapter)
+        self.s.headers.update({"Content-Type": "application/json"})
+        self.authenticate(token)
+
+    def set_tenant(self, tenant: str) -> None:
+        """
+        Set the tenant, e.g. vitens or rotterdam, which determines the base url.
+        :param tenant: Subdomain of the tenant on lizard.net.
+        """
+        self.tenant = tenant
+        self.website = f"https://{tenant}.lizard.net/api/v4"
+        logger.info(f"Lizard tenant {tenant} set.")
+
+    def authenticate(self, token: str) -> None:
+        """
+        Set basic authentication for the session.
+        :param token: Lizard API key.
+        """
+        self.s.auth = HTTPBasicAuth(username="__key__", password=token)
+        logger.info("Lizard authentication set.")
+
+    def url(self, endpoint: LizardEndpoint | str) -> str:
+        """Full url for an endpoint, absolute urls (e.g. from a result) are returned as is."""
+        if endpoint.startswith("http"):
+            return endpoint
+        return f"{self.website}/{endpoint.strip('/')}/"
+
+    def get(
+        self, endpoint: LizardEndpoint | str, params: dict | None = None, timeout: int = 30
+    ) -> requests.Response:
+        return self.s.get(url=self.url(endpoint), params=params, timeout=timeout)
+
+    def post(
+        self,
+        endpoint: LizardEndpoint | str,
+        json: Any = None,
+        timeout: int = 30,
+        data: bytes | None = None,
+    ) -> requests.Response:
+        """Post a JSON body, or an already serialised JSON body as `data`."""
+        return self.s.post(url=self.url(endpoint), json=json, data=data, timeout=timeout)
+
+    def patch(
+        self, endpoint: LizardEndpoint | str, json: Any, timeout: int = 15
+    ) -> requests.Response:
+        return self.s.patch(url=self.url(endpoint), json=json, timeout=timeout)
+
+    def iter_pages(
+        self, endpoint: LizardEndpoint | str, params: dict | None = None
+    ) -> Iterator[dict]:
+        """Yield every page of a paginated endpoint by following the next links."""
+        r = self.get(endpoint, params=params)
+        r.raise_for_status()
+        page = r.json()
+        yield page
+
+        while page.get("next") is not None:
+            r = self.get(page["next"])
+            r.raise_for_status()
+            page = r.json()
+            yield page
+
+    def iter_results(
+        self, endpoint: LizardEndpoint | str, params: dict | None = None
+    ) -> Iterator[dict]:
+        for page in self.iter_pages(endpoint, params=params):
+            yield from page.get("results", [])
+
+    def get_all(self, endpoint: LizardEndpoint | str, params: dict | None = None) -> list[dict]:
+        return list(self.iter_results(endpoint, params=params))
+
+    def map_concurrent(self, func: Callable[[T], R], items: Iterable[T]) -> list[R]:
+        """Apply func to all items on a thread pool sized to the connection pool."""
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(func, items))
+
+
+class BROServicesConnection:
+    """Pooled connection to the public BRO services, with an optional on-disk cache.
+
+    Responses are cached as JSON per BRO id in `cache_dir`, so running the same
+    workbook again does not repeat the lookups. Cached entries expire after
+    `cache_ttl`, and empty responses are never served from the cache, because
+    observations may have been added since.
+    """
+
+    website = "https://publiek.broservices.nl"
+
+    def __init__(
+        self,
+        cache_dir: str | Path | None = None,
+        max_workers: int = 8,
+        cache_ttl: datetime.timedelta = datetime.timedelta(days=1),
+    ):
+        self.max_workers = max_workers
+        self.cache_ttl = cache_ttl
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        if self.cache_dir is not None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        # Session
+        self.s = requests.Session()
+        retry = Retry(
+            total=6,
+            backoff_factor=0.5,
+            status_forcelist=[429, 500, 502, 503, 504],
+        )
+        adapter = HTTPAdapter(
+            pool_connections=max_workers, pool_maxsize=max_workers, max_retries=retry
+        )
+        self.s.mount("https://", adapter)
+
+    def get(self, path: str, params: dict | None = None, timeout: int = 30) -> requests.Response:
+        return self.s.get(url=f"{self.website}/{path.strip('/')}", params=params, timeout=timeout)
+
+    def _cache_file(self, name: str, bro_id: str) -> Path | None:
+        if self.cache_dir is None:
+            return None
+        return self.cache_dir / f"{name}_{bro_id}.json"
+
+    def _read_cache(self, cache_file: Path | None) -> Any:
+        """Cached response, or None when it is missing, expired or empty."""
+        if cache_file is None or not cache_file.exists():
+            return None
+        age = time.time() - cache_file.stat().st_mtime
+        if age > self.cache_ttl.total_seconds():
+            return None
+        return json.loads(cache_file.read_text()) or None
+
+    def gld_observations_summary(self, gld_id: str, refresh: bool = False) -> list[dict]:
+        """Summary of the observations in a GLD, empty when the GLD has no observations."""
+        cache_file = self._cache_file("observationsSummary", gld_id)
+        cached = None if refresh else self._read_cache(cache_file)
+        if cached is not None:
+            return cached
+
+        r = self.get(f"gm/gld/v1/objects/{gld_id}/observationsSummary")
+        r.raise_for_status()
+        summary = r.json()
+        if cache_file is not None:
+            cache_file.write_text(json.dumps(summary))
+        return summary
+
+    def prefetch_gld_observations_summaries(
+        self, gld_ids: Iterable[str], refresh: bool = False
+    ) -> dict[str, list[dict]]:
+        """Fetch the observation summaries of many GLDs concurrently.
+
+        GLDs whose lookup failed are logged and left out of the result and the cache.
+        """
+
+        def fetch(gld_id: str) -> list[dict] | None:
+            try:
+                return self.gld_observations_summary(gld_id, refresh=refresh)
+            except requests.RequestException as e:
+                logger.error(f"Failed to fetch the observations summary of {gld_id}: {e}")
+                return None
+
+        gld_ids = list(dict.fromkeys(gld_ids))
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            summaries = executor.map(fetch, gld_ids)
+            return {
+                gld_id: summary
+                for gld_id, summary in zip(gld_ids, summaries, strict=True)
+                if summary is not None
+            }
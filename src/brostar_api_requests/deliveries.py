@@ -0,0 +1,124 @@
+import datetime
+import hashlib
+import json
+import sqlite3
+from pathlib import Path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS deliveries (
+    key TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    uuid TEXT,
+    bro_id TEXT,
+    status TEXT NOT NULL,
+    recorded_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS deliveries_key ON deliveries (key, status);
+"""
+
+# Generated with a random uuid for every new GLDAddition, so never part of the content
+GENERATED_ID_FIELDS = frozenset(
+    {"observationId", "observationProcessId", "measurementTimeseriesId"}
+)
+
+
+def content_hash(payload: dict) -> str:
+    """Canonical hash of an uploadtask payload, as dumped with `by_alias=True`.
+
+    The request reference and the generated GLD ids are left out, so building the
+    same sourcedocument again gives the same hash. Keys are sorted, so the field
+    order of the payload does not matter either.
+    """
+    metadata = {
+        key: value
+        for key, value in payload.get("metadata", {}).items()
+        if key != "requestReference"
+    }
+    sourcedocument_data = payload.get("sourcedocument_data", {})
+    if isinstance(sourcedocument_data, dict):
+        sourcedocument_data = {
+            key: value
+            for key, value in sourcedocument_data.items()
+            if key not in GENERATED_ID_FIELDS
+        }
+
+    canonical = json.dumps(
+        {
+            "bro_domain": payload.get("bro_domain"),
+            "project_number": payload.get("project_number"),
+            "registration_type": payload.get("registration_type"),
+            "request_type": payload.get("request_type"),
+            "metadata": metadata,
+            "sourcedocument_data": sourcedocument_data,
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def delivery_key(payload: dict) -> str:
+    """Identifies what a payload delivers: registration, request type and object."""
+    sourcedocument_data = payload.get("sourcedocument_data") or {}
+    subject = (
+        sourcedocument_data.get("objectIdAccountableParty")
+        or payload.get("metadata", {}).get("broId")
+        or payload.get("metadata", {}).get("requestReference")
+    )
+    return f"{payload['registration_type']}/{payload['request_type']}/{subject}"
+
+
+class DeliveryIndex:
+    """Local SQLite index of delivered payloads and their outcome.
+
+    Every delivery is recorded with the content hash of its payload. A payload
+    whose hash matches the last COMPLETED delivery of the same key is unchanged
+    and does not have to be sent again.
+    """
+
+    def __init__(self, path: str | Path = ":memory:") -> None:
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+
+    def __enter__(self) -> "DeliveryIndex":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.db.close()
+
+    def last_completed(self, key: str) -> dict | None:
+        row = self.db.execute(
+            "SELECT content_hash, uuid, bro_id, recorded_at FROM deliveries "
+            "WHERE key = ? AND status = 'COMPLETED' ORDER BY rowid DESC LIMIT 1",
+            (key,),
+        ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("content_hash", "uuid", "bro_id", "recorded_at"), row, strict=True))
+
+    def unchanged(self, payload: dict) -> dict | None:
+        """The last COMPLETED delivery of this payload if its content is the same, else None."""
+        delivery = self.last_completed(delivery_key(payload))
+        if delivery is not None and delivery["content_hash"] == content_hash(payload):
+            return delivery
+        return None
+
+    def record(
+        self, payload: dict, status: str, uuid: str | None = None, bro_id: str | None = None
+    ) -> None:
+        self.db.execute(
+            "INSERT INTO deliveries VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                delivery_key(payload),
+                content_hash(payload),
+                uuid,
+                bro_id,
+                status,
+                datetime.datetime.now(datetime.UTC).isoformat(),
+            ),
+        )
+        self.db.commit()
@@ -1,76 +1,81 @@
 from .connection import BROSTARConnection
+from .mirror import BROSTARMirror
 from .upload_models import (
     Electrode,
     GeoOhmCable,
     GMWConstruction,
     MonitoringTube,
+    list_adapter,
+    page_adapter,
 )
 
 
 def format_electrodes(electrodes_data: list[dict[str, str]]) -> list[Electrode]:
-    return [Electrode(**e) for e in electrodes_data]
+    return list_adapter(Electrode).validate_python(electrodes_data)
 
 
 def format_geo_ohm_cables(cables_data: list[dict[str, str]]) -> list[GeoOhmCable] | None:
-    geo_ohm_cables = []
-    for cable in cables_data:
-        electrodes_list = cable.pop("electrodes", [])
-        geo_ohm_cables.append(
-            GeoOhmCable(
-                **cable,
-                electrodes=format_electrodes(electrodes_list),
-            )
-        )
-    return geo_ohm_cables if geo_ohm_cables else None
+    return list_adapter(GeoOhmCable).validate_python(cables_data) or None
 
 
 def format_monitoring_tubes(tubes_data: list[dict[str, str]]) -> list[MonitoringTube]:
-    monitoring_tubes = []
-    for tube in tubes_data:
-        geo_ohm_cable_list = tube.pop("geo_ohm_cables", [])
-        monitoring_tubes.append(
-            MonitoringTube(
-                **tube,
-                geo_ohm_cables=format_geo_ohm_cables(geo_ohm_cable_list),
-            )
-        )
-    return monitoring_tubes
+    return list_adapter(MonitoringTube).validate_python(tubes_data)
 
 
 def build_gmw_construction(
-    gmw_data: dict[str, str], monitoring_tubes_data: dict[str, str]
+    gmw_data: dict[str, str], monitoring_tubes_data: list[dict[str, str]] | list[MonitoringTube]
 ) -> GMWConstruction:
-    return GMWConstruction(
+    """Combine a GMW and its monitoring tubes into a construction, without changing the input.
+
+    Nested tubes, cables and electrodes are validated in the same pass, tubes that are
+    already models are used as they are.
+    """
+    construction = {
         **gmw_data,
-        object_id_accountable_party=gmw_data.get("bro_id"),
-        number_of_monitoring_tubes=len(monitoring_tubes_data),
-        monitoringTubes=format_monitoring_tubes(monitoring_tubes_data),
-    )
+        "number_of_monitoring_tubes": len(monitoring_tubes_data),
+        "monitoring_tubes": monitoring_tubes_data,
+    }
+    if gmw_data.get("bro_id"):
+        construction["object_id_accountable_party"] = gmw_data["bro_id"]
+    return GMWConstruction.model_validate(construction)
 
 
 class PayloadFormatter:
-    def __init__(self, brostar: BROSTARConnection) -> None:
+    def __init__(self, brostar: BROSTARConnection, mirror: BROSTARMirror | None = None) -> None:
+        """
+        :param mirror: Synced local mirror to look up GMWs and tubes in, instead of the API.
+        """
         self.brostar = brostar
+        self.mirror = mirror
+
+    def _format_gmw_construction_from_mirror(self, gmw_bro_id: str) -> GMWConstruction:
+        gmw_results = self.mirror.get_by_bro_id("gmw/gmws", gmw_bro_id)
+        if not gmw_results:
+            raise ValueError(f"No GMW found with BRO-ID: {gmw_bro_id}")
+
+        monitoring_tubes_data = self.mirror.filter("gmw/monitoringtubes", gmw_bro_id=gmw_bro_id)
+        return build_gmw_construction(
+            gmw_data=gmw_results[0], monitoring_tubes_data=monitoring_tubes_data
+        )
 
     def format_gmw_construction(self, gmw_bro_id: str) -> GMWConstruction:
         """Based on a BRO-ID retrieve all information for a construction"""
-        # Get the main GMW data
+        if self.mirror is not None:
+            return self._format_gmw_construction_from_mirror(gmw_bro_id)
+
+        # Get the main GMW data. The page is decoded into dicts instead of validated from
+        # the bytes, because a GMW only becomes a GMWConstruction with its tubes merged in.
         r = self.brostar.get("gmw/gmws", params={"bro_id": gmw_bro_id})
         gmw_results = r.json()["results"]
 
         # Check if we found any results
-        if not gmw_results or len(gmw_results) == 0:
+        if not gmw_results:
             raise ValueError(f"No GMW found with BRO-ID: {gmw_bro_id}")
 
-        # Get the first (and should be only) result
-        gmw_data = gmw_results[0]
-
-        # Get all monitoring tubes for this GMW
+        # Validate the tubes, cables and electrodes straight from the response bytes
         r = self.brostar.get("gmw/monitoringtubes", params={"gmw_bro_id": gmw_bro_id})
-        monitoring_tubes_data = r.json()["results"]
+        monitoring_tubes = page_adapter(MonitoringTube).validate_json(r.content)["results"]
 
-        gmw_construction = build_gmw_construction(
-            gmw_data=gmw_data, monitoring_tubes_data=monitoring_tubes_data
+        return build_gmw_construction(
+            gmw_data=gmw_results[0], monitoring_tubes_data=monitoring_tubes
         )
-
-        return gmw_construction
@@ -0,0 +1,447 @@
+from __future__ import annotations
+
+import bisect
+import copy
+import datetime
+import logging
+from collections import Counter
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+from ._lazy import lazy_import
+from .connection import BROSTARConnection
+from .mirror import BROSTARMirror
+
+if TYPE_CHECKING:
+    import polars as pl
+else:
+    pl = lazy_import("polars")
+
+logger = logging.getLogger(__name__)
+
+# (bro_id, observation type, quality regime)
+AdditionKey = tuple[str, str, str]
+ADDITION_FILTERS = {"status": "COMPLETED", "registration_type": "GLD_Addition"}
+
+
+def assign_procedures(
+    events_df: pl.DataFrame,
+    procedures_df: pl.DataFrame,
+    time_column: str = "datetime",
+    start_column: str = "start_datetime",
+    end_column: str = "eind_datetime",
+) -> pl.DataFrame:
+    """Tag every event with the procedure whose window contains it, in one sorted pass.
+
+    The events are joined backwards as-of on the procedure start, so each event
+    is matched with the last procedure that started before it. Two columns are added:
+
+    - `procedure`: row index in `procedures_df`, null when no window contains the event.
+    - `overlapping`: the event also falls inside the window of an earlier procedure.
+
+    Events in overlapping windows stay with the procedure that started last. When
+    that window has already ended, as after a window nested inside a longer one,
+    they fall back to the earlier window that stays open the longest.
+    """
+    windows = (
+        procedures_df.with_row_index("procedure")
+        .select(
+            "procedure",
+            pl.col(start_column).alias("_start"),
+            pl.col(end_column).alias("_end"),
+        )
+        .sort("_start")
+        .with_columns(
+            pl.col("_end").cum_max().alias("_open_until"),
+            pl.col("_end").cum_max().shift(1).alias("_covered_until"),
+        )
+        # The window that is open the longest of those started so far
+        .with_columns(
+            pl.when(pl.col("_end") == pl.col("_open_until"))
+            .then(pl.col("procedure"))
+            .forward_fill()
+            .alias("_open_procedure")
+        )
+    )
+
+    return (
+        events_df.sort(time_column)
+        .join_asof(windows, left_on=time_column, right_on="_start", strategy="backward")
+        .with_columns(
+            pl.when(pl.col(time_column) <= pl.col("_end"))
+            .then(pl.col("procedure"))
+            .when(pl.col(time_column) <= pl.col("_open_until"))
+            .then(pl.col("_open_procedure")),
+            (pl.col(time_column) <= pl.col("_covered_until")).fill_null(False).alias("overlapping"),
+        )
+        .drop("_start", "_end", "_open_until", "_covered_until", "_open_procedure")
+    )
+
+
+def report_procedure_coverage(events_df: pl.DataFrame, time_column: str = "datetime") -> dict:
+    """Log and return the events outside every procedure window or inside overlapping windows."""
+    unassigned = events_df.filter(pl.col("procedure").is_null())
+    overlapping = events_df.filter(pl.col("overlapping"))
+
+    if not unassigned.is_empty():
+        logger.warning(
+            f"{unassigned.height} events fall outside every procedure window "
+            f"({unassigned[time_column].min()} - {unassigned[time_column].max()})."
+        )
+    if not overlapping.is_empty():
+        logger.warning(
+            f"{overlapping.height} events fall inside overlapping procedure windows "
+            f"({overlapping[time_column].min()} - {overlapping[time_column].max()})."
+        )
+
+    return {"unassigned": unassigned, "overlapping": overlapping}
+
+
+def _as_date(value: str | datetime.date) -> datetime.date:
+    if isinstance(value, str):
+        return datetime.date.fromisoformat(value[:10])
+    return value
+
+
+class GLDAdditionIndex:
+    """Periods already delivered as GLD_Addition, per GLD, observation type and quality regime.
+
+    Built from the completed uploadtasks and refreshed incrementally with the
+    `updated_at` filter, so chunks can be checked for overlap before they are
+    submitted instead of failing at the BRO after a full processing round trip.
+    Periods are kept as sorted (beginPosition, endPosition) date pairs. Completed
+    deletions of an addition remove its period again.
+
+    With a `mirror`, the uploadtasks are synced into it and the index is built from
+    the mirror, so the incremental sync carries over to the next run.
+
+    Periods have day resolution: the time of day of the positions is dropped. Events
+    on the first or last day of a delivered period are therefore never treated as
+    delivered, as consecutive additions may share that day. They are sent again and
+    the BRO decides on them.
+    """
+
+    def __init__(
+        self,
+        brostar: BROSTARConnection,
+        page_size: int = 1000,
+        mirror: BROSTARMirror | None = None,
+    ) -> None:
+        self.brostar = brostar
+        self.page_size = page_size
+        self.mirror = mirror
+        self.periods: dict[AdditionKey, list[tuple[datetime.date, datetime.date]]] = {}
+        self.uuids: set[str] = set()
+        self.updated_at: str | None = None
+        # Deletions whose registration has not been indexed yet
+        self._deleted: Counter[tuple[AdditionKey, tuple[datetime.date, datetime.date]]] = Counter()
+
+    def __len__(self) -> int:
+        return len(self.uuids)
+
+    def add(
+        self,
+        bro_id: str,
+        observation_type: str,
+        quality_regime: str,
+        begin_position: str | datetime.date,
+        end_position: str | datetime.date,
+    ) -> None:
+        key = (bro_id, observation_type, quality_regime)
+        period = (_as_date(begin_position), _as_date(end_position))
+        bisect.insort(self.periods.setdefault(key, []), period)
+
+    def remove(
+        self,
+        bro_id: str,
+        observation_type: str,
+        quality_regime: str,
+        begin_position: str | datetime.date,
+        end_position: str | datetime.date,
+    ) -> None:
+        """Drop a delivered period, e.g. because its addition was deleted.
+
+        A deletion that arrives before the registration it deletes cancels that
+        registration when it is added.
+        """
+        key = (bro_id, observation_type, quality_regime)
+        period = (_as_date(begin_position), _as_date(end_position))
+        periods = self.periods.get(key, [])
+        if period in periods:
+            periods.remove(period)
+        else:
+            self._deleted[(key, period)] += 1
+
+    def _add_task(self, task: dict) -> None:
+        updated_at = task.get("updated_at")
+        if updated_at and (self.updated_at is None or updated_at > self.updated_at):
+            self.updated_at = updated_at
+
+        if task["uuid"] in self.uuids:
+            return
+        self.uuids.add(task["uuid"])
+
+        metadata = task.get("metadata") or {}
+        sourcedocument_data = task.get("sourcedocument_data") or {}
+        bro_id = metadata.get("broId") or task.get("bro_id")
+        begin_position = sourcedocument_data.get("beginPosition")
+        end_position = sourcedocument_data.get("endPosition")
+        if not bro_id or not begin_position or not end_position:
+            return
+
+        period = (
+            bro_id,
+            sourcedocument_data.get("observationType"),
+            metadata.get("qualityRegime"),
+            begin_position,
+            end_position,
+        )
+        request_type = task.get("request_type", "registration")
+        if request_type == "delete":
+            self.remove(*period)
+        elif request_type == "registration":
+            key = period[:3]
+            deleted = (key, (_as_date(begin_position), _as_date(end_position)))
+            if self._deleted[deleted]:
+                self._deleted[deleted] -= 1
+            else:
+                self.add(*period)
+
+    def refresh(self) -> int:
+        """Fetch all completed additions, or only those updated since the last refresh."""
+        if self.mirror is not None:
+            return self._refresh_from_mirror()
+
+        params: dict = {**ADDITION_FILTERS, "limit": self.page_size}
+        if self.updated_at is not None:
+            params["updated_at__gt"] = self.updated_at
+
+        count = len(self)
+        r = self.brostar.get("uploadtasks", params=params)
+        r.raise_for_status()
+        page = r.json()
+        while True:
+            for task in page.get("results", []):
+                self._add_task(task)
+
+            if page.get("next") is None:
+                break
+            r = self.brostar.get_url(page["next"])
+            r.raise_for_status()
+            page = r.json()
+
+        logger.info(f"Addition index refreshed with {len(self) - count} uploadtasks.")
+        return len(self) - count
+
+    def _refresh_from_mirror(self) -> int:
+        self.mirror.sync("uploadtasks", params=ADDITION_FILTERS)
+
+        count = len(self)
+        for task in self.mirror.filter("uploadtasks", **ADDITION_FILTERS):
+            self._add_task(task)
+
+        logger.info(f"Addition index refreshed with {len(self) - count} uploadtasks.")
+        return len(self) - count
+
+    def overlaps(
+        self,
+        bro_id: str,
+        observation_type: str,
+        quality_regime: str,
+        begin_position: str | datetime.date,
+        end_position: str | datetime.date,
+    ) -> list[tuple[datetime.date, datetime.date]]:
+        """Delivered periods that overlap the given period.
+
+        Days on the boundary of a period do not count, as consecutive additions share them.
+        """
+        begin_position, end_position = _as_date(begin_position), _as_date(end_position)
+        periods = self.periods.get((bro_id, observation_type, quality_regime), [])
+        return [
+            (begin, end) for begin, end in periods if begin < end_position and end > begin_position
+        ]
+
+    def trim(
+        self,
+        events_df: pl.DataFrame,
+        bro_id: str,
+        observation_type: str,
+        quality_regime: str,
+        time_column: str = "datetime",
+    ) -> pl.DataFrame:
+        """Drop the events that lie strictly within an already delivered period."""
+        periods = self.periods.get((bro_id, observation_type, quality_regime))
+        if not periods or events_df.is_empty():
+            return events_df
+
+        delivered = pl.DataFrame(
+            periods, schema={"_begin": pl.Date, "_end": pl.Date}, orient="row"
+        ).with_columns(pl.col("_end").cum_max())
+        trimmed = (
+            events_df.sort(time_column)
+            .with_columns(pl.col(time_column).dt.date().alias("_date"))
+            .join_asof(delivered, left_on="_date", right_on="_begin", strategy="backward")
+            .filter(
+                (
+                    (pl.col("_date") <= pl.col("_begin")) | (pl.col("_date") >= pl.col("_end"))
+                ).fill_null(True)
+            )
+            .drop("_date", "_begin", "_end")
+        )
+        if trimmed.height < events_df.height:
+            logger.info(
+                f"Skipped {events_df.height - trimmed.height} events of {bro_id} "
+                f"({observation_type}, {quality_regime}) that were already delivered."
+            )
+        return trimmed
+
+
+def pop_upload_task_fields(upload_task: dict) -> dict:
+    """Remove unnecessary fields from the upload task."""
+    upload_task.pop("uuid", None)
+    upload_task.pop("created_at", None)
+    upload_task.pop("updated_at", None)
+    upload_task.pop("data_owner", None)
+    return upload_task
+
+
+def clear_fields_for_upload(upload_task: dict) -> dict:
+    """Clear fields that should not be set for a new upload task."""
+    upload_task["status"] = "PENDING"
+    upload_task["log"] = ""
+    upload_task["progress"] = 0
+    upload_task["bro_id"] = ""
+    upload_task["bro_delivery_url"] = ""
+    return upload_task
+
+
+def relocation_payloads(task: dict, current_id: str, target_id: str) -> tuple[dict, dict]:
+    """Delete payload for an addition on the current GLD and its registration on the target."""
+    delete = clear_fields_for_upload(pop_upload_task_fields(copy.deepcopy(task)))
+    delete["request_type"] = "delete"
+    delete["metadata"]["correctionReason"] = "eigenCorrectie"
+
+    register = clear_fields_for_upload(pop_upload_task_fields(copy.deepcopy(task)))
+    register["request_type"] = "registration"
+    register["metadata"]["broId"] = target_id
+    register["metadata"].pop("correctionReason", None)
+    reference = register["metadata"].get("requestReference")
+    if reference:
+        register["metadata"]["requestReference"] = reference.replace(current_id, target_id)
+    return delete, register
+
+
+class GLDRelocation:
+    """Move the GLD_Addition dossiers of many GLDs to other GLDs.
+
+    `plan` pages through all additions of every current GLD and prepares the
+    delete and registration payloads up front. `run` executes them concurrently
+    across target GLDs, while the additions for one target keep their order.
+    The deletion of the next addition is pipelined with the registration of the
+    previous one, which is only awaited before the next registration is posted.
+    """
+
+    def __init__(self, brostar: BROSTARConnection, max_workers: int = 5) -> None:
+        self.brostar = brostar
+        self.max_workers = max_workers
+        self.plans: dict[str, list[tuple[str, str, str, dict, dict]]] = {}
+
+    def _additions(self, bro_id: str) -> list[dict]:
+        tasks = []
+        r = self.brostar.get(
+            "uploadtasks",
+            params={**ADDITION_FILTERS, "request_type": "registration", "bro_id": bro_id},
+        )
+        r.raise_for_status()
+        page = r.json()
+        while True:
+            tasks += page.get("results", [])
+            if page.get("next") is None:
+                return tasks
+            r = self.brostar.get_url(page["next"])
+            r.raise_for_status()
+            page = r.json()
+
+    def _detail(self, uuid: str) -> dict:
+        r = self.brostar.get_detail(endpoint="uploadtasks", uuid=uuid)
+        r.raise_for_status()
+        return r.json()
+
+    def plan(self, mappings: dict[str, str] | Iterable[tuple[str, str]]) -> int:
+        """Prepare the relocation of all additions, per (current_id, target_id) mapping.
+
+        :return: Number of additions planned.
+        """
+        mappings = list(mappings.items() if isinstance(mappings, dict) else mappings)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            additions = list(executor.map(lambda mapping: self._additions(mapping[0]), mappings))
+            uuids = [task["uuid"] for tasks in additions for task in tasks]
+            details = dict(zip(uuids, executor.map(self._detail, uuids), strict=True))
+
+        count = 0
+        for (current_id, target_id), tasks in zip(mappings, additions, strict=True):
+            plan = self.plans.setdefault(target_id, [])
+            for task in tasks:
+                delete, register = relocation_payloads(details[task["uuid"]], current_id, target_id)
+                plan.append((task["uuid"], current_id, target_id, delete, register))
+                count += 1
+
+        logger.info(f"Planned {count} additions for {len(self.plans)} target GLDs.")
+        return count
+
+    def _post(self, payload: dict) -> str:
+        r = self.brostar.post_upload(payload=payload, is_json=True)
+        r.raise_for_status()
+        return r.json()["uuid"]
+
+    def _await(self, uuid: str) -> str:
+        r = self.brostar.await_completed(uuid=uuid)
+        return r.json().get("status", "UNKNOWN")
+
+    def _relocate(self, plan: list[tuple[str, str, str, dict, dict]]) -> list[dict]:
+        results = []
+        pending: dict | None = None
+        for task_uuid, current_id, target_id, delete, register in plan:
+            result = {
+                "task": task_uuid,
+                "current_id": current_id,
+                "target_id": target_id,
+                "delete": None,
+                "registration": None,
+                "status": "FAILED",
+            }
+            results.append(result)
+            try:
+                result["delete"] = self._post(delete)
+                delete_status = self._await(result["delete"])
+
+                # Keep the order of registrations on the target GLD
+                if pending is not None:
+                    pending["status"] = self._await(pending["registration"])
+                    pending = None
+
+                if delete_status != "COMPLETED":
+                    logger.error(f"Deleting addition {task_uuid} of {current_id} failed.")
+                    continue
+
+                result["registration"] = self._post(register)
+                result["status"] = "PENDING"
+                pending = result
+            except Exception as e:
+                logger.exception(f"Failed to relocate addition {task_uuid} to {target_id}: {e}")
+
+        if pending is not None:
+            pending["status"] = self._await(pending["registration"])
+        return results
+
+    def run(self) -> list[dict]:
+        """Execute all planned relocations and return the status per addition."""
+        plans = list(self.plans.values())
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = [result for plan in executor.map(self._relocate, plans) for result in plan]
+
+        self.plans = {}
+        completed = sum(result["status"] == "COMPLETED" for result in results)
+        logger.info(f"Relocated {completed} of {len(results)} additions.")
+        return results
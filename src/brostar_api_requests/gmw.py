@@ -0,0 +1,243 @@
+import logging
+from collections.abc import Iterable
+
+from .type_helpers import RegistrationTypeOptions
+from .upload_models import (
+    GMWConstruction,
+    GMWEvent,
+    GMWGroundLevel,
+    GMWLengthening,
+    GMWMaintainer,
+    GMWOwner,
+    GMWPositions,
+    GMWShortening,
+    GMWTubeStatus,
+    GMWWellHeadProtector,
+    MonitoringTube,
+    MonitoringTubeLengthening,
+    MonitoringTubePositions,
+    MonitoringTubeShortening,
+    MonitoringTubeStatus,
+    UploadTask,
+    UploadTaskMetadata,
+)
+
+logger = logging.getLogger(__name__)
+
+GMWEventRegistration = tuple[RegistrationTypeOptions, GMWEvent]
+
+# Construction fields that can change through an event, all other fields need a replace
+EVENT_FIELDS = {
+    "owner",
+    "maintenance_responsible_party",
+    "well_head_protector",
+    "ground_level_position",
+    "ground_level_positioning_method",
+    "monitoring_tubes",
+    "date_to_be_corrected",
+}
+TUBE_EVENT_FIELDS = {
+    "tube_number",
+    "tube_status",
+    "tube_top_position",
+    "tube_top_positioning_method",
+    "plain_tube_part_length",
+}
+# Only allowed to change when the tube is lengthened
+LENGTHENING_FIELDS = {"tube_top_diameter", "variable_diameter", "tube_material", "glue"}
+
+
+def _changed(
+    current: GMWConstruction | MonitoringTube,
+    desired: GMWConstruction | MonitoringTube,
+    fields: Iterable[str],
+) -> set[str]:
+    return {field for field in fields if getattr(current, field) != getattr(desired, field)}
+
+
+def construction_changes(current: GMWConstruction, desired: GMWConstruction) -> list[str]:
+    """Changed fields that no event can register, these need a GMW_Construction replace."""
+    changes = sorted(_changed(current, desired, set(GMWConstruction.model_fields) - EVENT_FIELDS))
+
+    current_tubes = {tube.tube_number: tube for tube in current.monitoring_tubes}
+    desired_tubes = {tube.tube_number: tube for tube in desired.monitoring_tubes}
+    if current_tubes.keys() != desired_tubes.keys():
+        return [*changes, "monitoring_tubes"]
+
+    for number, desired_tube in desired_tubes.items():
+        current_tube = current_tubes[number]
+        fields = set(MonitoringTube.model_fields) - TUBE_EVENT_FIELDS
+        if desired_tube.plain_tube_part_length > current_tube.plain_tube_part_length:
+            fields -= LENGTHENING_FIELDS
+        changes += [
+            f"monitoring_tubes[{number}].{field}"
+            for field in sorted(_changed(current_tube, desired_tube, fields))
+        ]
+    return changes
+
+
+def diff_gmw_construction(
+    current: GMWConstruction, desired: GMWConstruction, event_date: str
+) -> list[GMWEventRegistration]:
+    """The smallest set of events that brings a GMW from its current to its desired state.
+
+    Tubes are matched on their tube number. A longer or shorter plain tube part becomes a
+    lengthening or shortening, a moved tube top with the same length becomes a positions
+    event. An unchanged GMW gives an empty list.
+
+    :raises ValueError: When a change can only be registered by replacing the construction,
+        see `construction_changes`.
+    """
+    unsupported = construction_changes(current, desired)
+    if unsupported:
+        raise ValueError(f"Changes need a GMW_Construction replace: {', '.join(unsupported)}")
+
+    events: list[GMWEventRegistration] = []
+    if current.owner != desired.owner and desired.owner is not None:
+        events.append(("GMW_Owner", GMWOwner(event_date=event_date, owner=desired.owner)))
+    if (
+        current.maintenance_responsible_party != desired.maintenance_responsible_party
+        and desired.maintenance_responsible_party is not None
+    ):
+        events.append(
+            (
+                "GMW_Maintainer",
+                GMWMaintainer(
+                    event_date=event_date,
+                    maintenance_responsible_party=desired.maintenance_responsible_party,
+                ),
+            )
+        )
+
+    current_tubes = {tube.tube_number: tube for tube in current.monitoring_tubes}
+    statuses: list[MonitoringTubeStatus] = []
+    positions: list[MonitoringTubePositions] = []
+    lengthenings: list[MonitoringTubeLengthening] = []
+    shortenings: list[MonitoringTubeShortening] = []
+    for tube in desired.monitoring_tubes:
+        current_tube = current_tubes[tube.tube_number]
+        if tube.tube_status != current_tube.tube_status:
+            statuses.append(
+                MonitoringTubeStatus(tube_number=tube.tube_number, tube_status=tube.tube_status)
+            )
+
+        if tube.plain_tube_part_length > current_tube.plain_tube_part_length:
+            lengthenings.append(
+                MonitoringTubeLengthening(
+                    tube_number=tube.tube_number,
+                    variable_diameter=tube.variable_diameter or "ja",
+                    tube_top_diameter=tube.tube_top_diameter,
+                    tube_top_position=tube.tube_top_position,
+                    tube_top_positioning_method=tube.tube_top_positioning_method,
+                    tube_material=tube.tube_material,
+                    glue=tube.glue,
+                    plain_tube_part_length=tube.plain_tube_part_length,
+                )
+            )
+        elif tube.plain_tube_part_length < current_tube.plain_tube_part_length:
+            shortenings.append(
+                MonitoringTubeShortening(
+                    tube_number=tube.tube_number,
+                    tube_top_position=tube.tube_top_position,
+                    tube_top_positioning_method=tube.tube_top_positioning_method,
+                    plain_tube_part_length=tube.plain_tube_part_length,
+                )
+            )
+        elif _changed(current_tube, tube, {"tube_top_position", "tube_top_positioning_method"}):
+            positions.append(
+                MonitoringTubePositions(
+                    tube_number=tube.tube_number,
+                    tube_top_position=tube.tube_top_position,
+                    tube_top_positioning_method=tube.tube_top_positioning_method,
+                )
+            )
+
+    ground_level_changed = bool(
+        _changed(current, desired, {"ground_level_position", "ground_level_positioning_method"})
+    )
+    if positions:
+        events.append(
+            (
+                "GMW_Positions",
+                GMWPositions(
+                    event_date=event_date,
+                    ground_level_position=desired.ground_level_position,
+                    ground_level_positioning_method=desired.ground_level_positioning_method,
+                    monitoring_tubes=positions,
+                ),
+            )
+        )
+    elif ground_level_changed:
+        events.append(
+            (
+                "GMW_GroundLevel",
+                GMWGroundLevel(
+                    event_date=event_date,
+                    ground_level_position=desired.ground_level_position,
+                    ground_level_positioning_method=desired.ground_level_positioning_method,
+                ),
+            )
+        )
+
+    # A new well head protector is registered with the lengthening or shortening it comes with
+    well_head_protector = (
+        desired.well_head_protector
+        if desired.well_head_protector != current.well_head_protector
+        else None
+    )
+    if lengthenings:
+        events.append(
+            (
+                "GMW_Lengthening",
+                GMWLengthening(
+                    event_date=event_date,
+                    well_head_protector=well_head_protector,
+                    monitoring_tubes=lengthenings,
+                ),
+            )
+        )
+        well_head_protector = None
+    if shortenings:
+        events.append(
+            (
+                "GMW_Shortening",
+                GMWShortening(
+                    event_date=event_date,
+                    well_head_protector=well_head_protector,
+                    monitoring_tubes=shortenings,
+                ),
+            )
+        )
+        well_head_protector = None
+    if well_head_protector is not None:
+        events.append(
+            (
+                "GMW_WellHeadProtector",
+                GMWWellHeadProtector(
+                    event_date=event_date, well_head_protector=well_head_protector
+                ),
+            )
+        )
+
+    if statuses:
+        events.append(
+            ("GMW_TubeStatus", GMWTubeStatus(event_date=event_date, monitoring_tubes=statuses))
+        )
+    return events
+
+
+def gmw_event_upload_tasks(
+    events: list[GMWEventRegistration], metadata: UploadTaskMetadata, project_number: str
+) -> list[UploadTask]:
+    """Registration uploadtasks for the events of one GMW, in the order they have to be sent."""
+    return [
+        UploadTask(
+            bro_domain="GMW",
+            project_number=project_number,
+            registration_type=registration_type,
+            request_type="registration",
+            sourcedocument_data=event,
+            metadata=metadata,
+        )
+        for registration_type, event in events
+    ]
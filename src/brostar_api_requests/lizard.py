@@ -0,0 +1,316 @@
+from __future__ import annotations
+
+import datetime
+import io
+import logging
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+from ._lazy import lazy_import
+from .connection import LizardConnection
+
+if TYPE_CHECKING:
+    import polars as pl
+else:
+    pl = lazy_import("polars")
+
+logger = logging.getLogger(__name__)
+
+# Fields of an event that Lizard overwrites when the event is posted again
+EVENT_FIELDS = ("value", "flag", "comment", "detection_limit")
+BRO_ID_PATTERN = re.compile(r"^(GMW|GLD|GMN|GAR|FRD)\d{12}$")
+
+
+def _bro_ids(location: dict) -> list[str]:
+    """All BRO ids stored in the bro section of the location metadata."""
+    bro = (location.get("extra_metadata") or {}).get("bro") or {}
+    return [
+        value for value in bro.values() if isinstance(value, str) and BRO_ID_PATTERN.match(value)
+    ]
+
+
+class LizardLocationIndex:
+    """In-memory index of all locations of a Lizard tenant.
+
+    Locations are fetched once and kept up to date incrementally with the
+    `last_modified` filter, so looking up a location by code or by one of the
+    BRO ids in its `extra_metadata.bro` does not need a request.
+    """
+
+    def __init__(self, lizard: LizardConnection, page_size: int = 1000) -> None:
+        self.lizard = lizard
+        self.page_size = page_size
+        self.locations: dict[str, dict] = {}
+        self.codes_by_bro_id: dict[str, str] = {}
+        self.last_modified: str | None = None
+
+    def __len__(self) -> int:
+        return len(self.locations)
+
+    def _add(self, location: dict, advance_cursor: bool = True) -> None:
+        code = location["code"]
+        previous = self.locations.get(code)
+        if previous is not None:
+            for bro_id in _bro_ids(previous):
+                self.codes_by_bro_id.pop(bro_id, None)
+
+        self.locations[code] = location
+        for bro_id in _bro_ids(location):
+            self.codes_by_bro_id[bro_id] = code
+
+        # Our own patches must not move the cursor past changes made by others
+        last_modified = location.get("last_modified") if advance_cursor else None
+        if last_modified and (self.last_modified is None or last_modified > self.last_modified):
+            self.last_modified = last_modified
+
+    def refresh(self) -> int:
+        """Fetch all locations, or only those modified since the last refresh."""
+        params: dict = {"limit": self.page_size}
+        if self.last_modified is not None:
+            params["last_modified__gt"] = self.last_modified
+
+        count = 0
+        for location in self.lizard.iter_results("locations", params=params):
+            self._add(location)
+            count += 1
+
+        logger.info(f"Location index refreshed with {count} locations ({len(self)} in total).")
+        return count
+
+    def get(self, code: str) -> dict | None:
+        return self.locations.get(code)
+
+    def get_by_bro_id(self, bro_id: str) -> dict | None:
+        code = self.codes_by_bro_id.get(bro_id)
+        return self.locations.get(code) if code is not None else None
+
+    def update_bro_ids(self, updates: dict[str, dict[str, str]]) -> int:
+        """Write BRO ids into `extra_metadata.bro` of many locations at once.
+
+        :param updates: Per location code the bro keys and values to set,
+            e.g. {"46B-0735001": {"broid_gld_imbro": "GLD000000012345"}}.
+        :return: Number of locations that were patched.
+
+        Only locations whose values actually change are patched, concurrently over
+        the pooled Lizard connection. The index is updated with the patched locations.
+        """
+        changes = []
+        for code, values in updates.items():
+            location = self.locations.get(code)
+            if location is None:
+                logger.info(f"No location found with code {code}.")
+                continue
+
+            extra_metadata = location.get("extra_metadata") or {}
+            bro = extra_metadata.get("bro") or {}
+            if all(bro.get(key) == value for key, value in values.items()):
+                continue
+
+            changes.append((location, {**extra_metadata, "bro": {**bro, **values}}))
+
+        def patch(change: tuple[dict, dict]) -> dict:
+            location, extra_metadata = change
+            r = self.lizard.patch(location["url"], json={"extra_metadata": extra_metadata})
+            r.raise_for_status()
+            return {**location, **r.json(), "extra_metadata": extra_metadata}
+
+        for location in self.lizard.map_concurrent(patch, changes):
+            self._add(location, advance_cursor=False)
+
+        logger.info(f"Patched {len(changes)} of {len(updates)} locations.")
+        return len(changes)
+
+
+def _parse_lizard_datetime(value: str | datetime.datetime) -> datetime.datetime:
+    if isinstance(value, datetime.datetime):
+        return value
+    return datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def _format_lizard_datetime(value: datetime.datetime) -> str:
+    return value.astimezone(datetime.UTC).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def time_windows(
+    start: datetime.datetime, end: datetime.datetime, window: datetime.timedelta
+) -> list[tuple[datetime.datetime, datetime.datetime]]:
+    """Split [start, end) into consecutive windows of at most `window` long."""
+    windows = []
+    window_start = start
+    while window_start < end:
+        window_end = min(window_start + window, end)
+        windows.append((window_start, window_end))
+        window_start = window_end
+    return windows
+
+
+def _decode_events_page(content: bytes) -> tuple[pl.DataFrame | None, str | None]:
+    """Decode a page of events straight from the response bytes into a DataFrame."""
+    page = pl.read_json(io.BytesIO(content))
+    next_url = page["next"][0] if "next" in page.columns else None
+    results = page.schema["results"]
+    if not isinstance(results, pl.List) or not isinstance(results.inner, pl.Struct):
+        return None, next_url
+    return page.select(pl.col("results").explode()).unnest("results"), next_url
+
+
+def fetch_events(
+    lizard: LizardConnection,
+    timeseries: dict | str,
+    start: datetime.datetime | str | None = None,
+    end: datetime.datetime | str | None = None,
+    window: datetime.timedelta = datetime.timedelta(days=90),
+    params: dict | None = None,
+    page_size: int = 10000,
+) -> pl.DataFrame:
+    """Fetch all events of a timeseries in parallel time windows.
+
+    :param timeseries: Timeseries result from Lizard (with url, start and end) or its url.
+    :param start: Start of the period, defaults to the start of the timeseries.
+    :param end: End of the period, defaults to the end of the timeseries.
+    :param window: Length of the windows that are fetched concurrently.
+    :param params: Extra filters for the events endpoint, e.g. {"validation_code!": "V"}.
+
+    Every page is decoded directly into a DataFrame chunk; the chunks are
+    concatenated and sorted by time.
+    """
+    if isinstance(timeseries, str):
+        r = lizard.get(timeseries)
+        r.raise_for_status()
+        timeseries = r.json()
+
+    # Built before the worker threads start, which also finishes the lazy polars import
+    empty = pl.DataFrame(schema={"time": pl.String, "value": pl.Float64})
+    start = start or timeseries.get("start")
+    end = end or timeseries.get("end")
+    events_url = f"{timeseries['url']}events/"
+    if start is None or end is None:
+        logger.info(f"No events in timeseries {timeseries['url']}.")
+        return empty
+
+    start = _parse_lizard_datetime(start)
+    # The end is inclusive, the windows exclude their end
+    end = _parse_lizard_datetime(end) + datetime.timedelta(seconds=1)
+
+    def fetch_window(bounds: tuple[datetime.datetime, datetime.datetime]) -> list[pl.DataFrame]:
+        window_start, window_end = bounds
+        chunks = []
+        next_url: str | None = events_url
+        window_params = {
+            **(params or {}),
+            "limit": page_size,
+            "time__gte": _format_lizard_datetime(window_start),
+            "time__lt": _format_lizard_datetime(window_end),
+        }
+        while next_url is not None:
+            r = lizard.get(next_url, params=window_params if next_url == events_url else None)
+            r.raise_for_status()
+            chunk, next_url = _decode_events_page(r.content)
+            if chunk is not None:
+                chunks.append(chunk)
+        return chunks
+
+    windows = time_windows(start, end, window)
+    chunks = [chunk for chunks in lizard.map_concurrent(fetch_window, windows) for chunk in chunks]
+    logger.info(f"Fetched {len(chunks)} pages of events in {len(windows)} windows.")
+    if not chunks:
+        return empty
+
+    return pl.concat(chunks, how="diagonal_relaxed").sort("time")
+
+
+class LizardEventWriter:
+    """Background write-back of validation codes to Lizard timeseries events.
+
+    Events are serialised straight from the DataFrame to JSON bytes with the
+    `time` and `validation_code` fields and the `EVENT_FIELDS` present in the
+    DataFrame, as Lizard writes whole events. They are split into batches of `batch_size`
+    and posted on a thread pool, so `submit` returns immediately. Failed batches
+    are queued and retried by `flush`, up to `max_retries` times. Before every
+    retry round `flush` waits `backoff_factor * 2 ** (attempt - 1)` seconds.
+    """
+
+    def __init__(
+        self,
+        lizard: LizardConnection,
+        batch_size: int = 2000,
+        max_retries: int = 3,
+        timeout: int = 30,
+        backoff_factor: float = 1.0,
+    ) -> None:
+        self.lizard = lizard
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(max_workers=lizard.max_workers)
+        self.futures: list[Future] = []
+        self.failed: deque[tuple[str, bytes, int, int]] = deque()
+        self.posted = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> LizardEventWriter:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _post(self, url: str, body: bytes, events: int, attempt: int = 0) -> None:
+        try:
+            r = self.lizard.post(url, data=body, timeout=self.timeout)
+            r.raise_for_status()
+        except Exception as e:
+            logger.warning(f"Failed to post {events} events to {url} (attempt {attempt + 1}): {e}")
+            self.failed.append((url, body, events, attempt + 1))
+            return
+
+        with self._lock:
+            self.posted += events
+
+    def submit(
+        self, timeseries_url: str, events_df: pl.DataFrame, validation_code: str = "V"
+    ) -> None:
+        """Queue the events of a timeseries to be flagged with a validation code."""
+        url = f"{timeseries_url}events/"
+        events = events_df.select(
+            "time",
+            *(field for field in EVENT_FIELDS if field in events_df.columns),
+            pl.lit(validation_code).alias("validation_code"),
+        )
+        logger.info(f"Queueing {events.height} events for {url}.")
+
+        for i in range(0, events.height, self.batch_size):
+            batch = events.slice(i, self.batch_size)
+            body = batch.write_json().encode()
+            self.futures.append(self.executor.submit(self._post, url, body, batch.height))
+
+    def flush(self) -> int:
+        """Wait for all posts, retry failed batches and return the number still failing."""
+        while self.futures:
+            futures, self.futures = self.futures, []
+            for future in futures:
+                future.result()
+
+            retries = [batch for batch in self.failed if batch[3] <= self.max_retries]
+            self.failed = deque(batch for batch in self.failed if batch[3] > self.max_retries)
+            if not retries:
+                continue
+
+            delay = self.backoff_factor * 2 ** (min(attempt for *_, attempt in retries) - 1)
+            logger.info(f"Retrying {len(retries)} event batches in {delay:.1f} seconds.")
+            time.sleep(delay)
+            for url, body, events, attempt in retries:
+                self.futures.append(self.executor.submit(self._post, url, body, events, attempt))
+
+        if self.failed:
+            logger.error(f"{len(self.failed)} event batches could not be posted to Lizard.")
+        return len(self.failed)
+
+    def close(self) -> int:
+        failed = self.flush()
+        self.executor.shutdown()
+        return failed
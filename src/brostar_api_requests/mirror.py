@@ -0,0 +1,168 @@
+import json
+import logging
+import sqlite3
+from collections.abc import Iterator
+from pathlib import Path
+
+from .connection import BROSTARConnection, BrostarEndpoint
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    endpoint TEXT NOT NULL,
+    uuid TEXT NOT NULL,
+    bro_id TEXT,
+    object_id_accountable_party TEXT,
+    updated_at TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (endpoint, uuid)
+);
+CREATE INDEX IF NOT EXISTS records_bro_id ON records (endpoint, bro_id);
+CREATE INDEX IF NOT EXISTS records_object_id ON records (endpoint, object_id_accountable_party);
+CREATE TABLE IF NOT EXISTS sync_state (
+    collection TEXT PRIMARY KEY,
+    updated_at TEXT
+);
+"""
+
+
+def _bro_id(record: dict) -> str | None:
+    return record.get("bro_id") or (record.get("metadata") or {}).get("broId")
+
+
+def _object_id_accountable_party(record: dict) -> str | None:
+    return (
+        record.get("object_id_accountable_party")
+        or record.get("objectIdAccountableParty")
+        or (record.get("sourcedocument_data") or {}).get("objectIdAccountableParty")
+    )
+
+
+def _updated_at(record: dict) -> str | None:
+    return record.get("updated_at") or record.get("created_at")
+
+
+class BROSTARMirror:
+    """Local SQLite mirror of BROSTAR collections.
+
+    `sync` only fetches the records updated since the previous sync of the same
+    endpoint and filters, using the `updated_at__gt` filter. Records can then be
+    looked up by uuid, bro_id or objectIdAccountableParty without a request.
+    Deleted records are not detected; use `sync(..., full=True)` to rebuild.
+    """
+
+    def __init__(
+        self, brostar: BROSTARConnection, path: str | Path = ":memory:", page_size: int = 1000
+    ) -> None:
+        self.brostar = brostar
+        self.page_size = page_size
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+
+    def __enter__(self) -> "BROSTARMirror":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.db.close()
+
+    @staticmethod
+    def _collection(endpoint: BrostarEndpoint, params: dict | None) -> str:
+        if not params:
+            return endpoint
+        return f"{endpoint}?{json.dumps(params, sort_keys=True)}"
+
+    def _iter_pages(self, endpoint: BrostarEndpoint, params: dict) -> Iterator[list[dict]]:
+        r = self.brostar.get(endpoint, params=params)
+        r.raise_for_status()
+        page = r.json()
+        yield page.get("results", [])
+
+        while page.get("next") is not None:
+            r = self.brostar.get_url(page["next"])
+            r.raise_for_status()
+            page = r.json()
+            yield page.get("results", [])
+
+    def sync(
+        self, endpoint: BrostarEndpoint, params: dict | None = None, full: bool = False
+    ) -> int:
+        """Fetch the records of an endpoint that changed since the last sync.
+
+        :param params: Extra filters, e.g. {"registration_type": "GLD_StartRegistration"}.
+            Every combination of endpoint and filters keeps its own sync cursor.
+        :param full: Drop all mirrored records of the endpoint and fetch everything.
+        :return: Number of records fetched.
+        """
+        collection = self._collection(endpoint, params)
+        if full:
+            self.db.execute("DELETE FROM records WHERE endpoint = ?", (endpoint,))
+            # Other filters of this endpoint have to start over as well
+            self.db.execute(
+                "DELETE FROM sync_state WHERE collection = ? OR collection LIKE ?",
+                (endpoint, f"{endpoint}?%"),
+            )
+
+        row = self.db.execute(
+            "SELECT updated_at FROM sync_state WHERE collection = ?", (collection,)
+        ).fetchone()
+        cursor = row[0] if row else None
+
+        request_params = {**(params or {}), "limit": self.page_size}
+        if cursor is not None:
+            request_params["updated_at__gt"] = cursor
+
+        count = 0
+        for results in self._iter_pages(endpoint, request_params):
+            self.db.executemany(
+                "INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        endpoint,
+                        record["uuid"],
+                        _bro_id(record),
+                        _object_id_accountable_party(record),
+                        _updated_at(record),
+                        json.dumps(record),
+                    )
+                    for record in results
+                ],
+            )
+            cursor = max(
+                [cursor, *(_updated_at(record) for record in results)],
+                key=lambda value: value or "",
+            )
+            count += len(results)
+
+        self.db.execute("INSERT OR REPLACE INTO sync_state VALUES (?, ?)", (collection, cursor))
+        self.db.commit()
+        logger.info(f"Synced {count} records of {collection}.")
+        return count
+
+    def _select(self, where: str, parameters: tuple) -> list[dict]:
+        rows = self.db.execute(f"SELECT data FROM records WHERE {where}", parameters)
+        return [json.loads(data) for (data,) in rows]
+
+    def all(self, endpoint: BrostarEndpoint) -> list[dict]:
+        return self._select("endpoint = ?", (endpoint,))
+
+    def get(self, endpoint: BrostarEndpoint, uuid: str) -> dict | None:
+        records = self._select("endpoint = ? AND uuid = ?", (endpoint, uuid))
+        return records[0] if records else None
+
+    def get_by_bro_id(self, endpoint: BrostarEndpoint, bro_id: str) -> list[dict]:
+        return self._select("endpoint = ? AND bro_id = ?", (endpoint, bro_id))
+
+    def get_by_object_id(self, endpoint: BrostarEndpoint, object_id: str) -> list[dict]:
+        return self._select(
+            "endpoint = ? AND object_id_accountable_party = ?", (endpoint, object_id)
+        )
+
+    def filter(self, endpoint: BrostarEndpoint, **fields: str | int) -> list[dict]:
+        """Records whose top level fields match the given values."""
+        conditions = [f"json_extract(data, '$.{key}') = ?" for key in fields]
+        where = " AND ".join(["endpoint = ?", *conditions])
+        return self._select(where, (endpoint, *fields.values()))
@@ -0,0 +1,165 @@
+import io
+import logging
+import os
+import uuid
+from collections.abc import Callable, Iterator, Mapping
+from typing import BinaryIO
+
+logger = logging.getLogger(__name__)
+
+ProgressCallback = Callable[[int, int | None], None]
+FileSpec = BinaryIO | tuple[str, BinaryIO] | tuple[str, BinaryIO, str]
+
+CHUNK_SIZE = 64 * 1024
+CRLF = b"\r\n"
+
+
+def _file_parts(name: str, spec: FileSpec) -> tuple[str, BinaryIO, str]:
+    """Normalise the requests style file specification to (filename, file, content type)."""
+    if isinstance(spec, tuple):
+        filename, fileobj = spec[0], spec[1]
+        content_type = spec[2] if len(spec) > 2 else "application/octet-stream"
+        return filename, fileobj, content_type
+
+    filename = os.path.basename(getattr(spec, "name", "") or name)
+    return filename, spec, "application/octet-stream"
+
+
+def _position(fileobj: BinaryIO) -> int | None:
+    """Current position of a file, or None for non-seekable streams."""
+    try:
+        return fileobj.tell() if fileobj.seekable() else None
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def _remaining_size(fileobj: BinaryIO) -> int | None:
+    """Size from the current position to the end, or None for non-seekable streams."""
+    try:
+        position = fileobj.tell()
+        end = fileobj.seek(0, os.SEEK_END)
+        fileobj.seek(position)
+    except (AttributeError, OSError, ValueError):
+        return None
+    return end - position
+
+
+class MultipartEncoder:
+    """Streaming multipart/form-data body.
+
+    Files are read in chunks of `chunk_size` while the request is sent, so peak memory
+    does not depend on the file size. `requests` streams the body through `read`, with a
+    Content-Length when all file sizes are known and chunked transfer encoding otherwise.
+
+    The body can be rewound with `seek(0)` as long as all files are seekable, which
+    urllib3 does before it retries or redirects a request. Otherwise `seek` raises, so
+    a retry fails instead of sending a body whose files were already consumed.
+    """
+
+    def __init__(
+        self,
+        fields: Mapping[str, str] | None = None,
+        files: Mapping[str, FileSpec] | None = None,
+        chunk_size: int = CHUNK_SIZE,
+        progress_callback: ProgressCallback | None = None,
+    ) -> None:
+        self.boundary = uuid.uuid4().hex
+        self.chunk_size = chunk_size
+        self.progress_callback = progress_callback
+        self._fields = dict(fields or {})
+        self._files = {name: _file_parts(name, spec) for name, spec in (files or {}).items()}
+        self._starts = [_position(fileobj) for _, fileobj, _ in self._files.values()]
+        self.len = self._content_length()
+        self.bytes_read = 0
+        self._iterator: Iterator[bytes] | None = None
+        self._buffer = b""
+
+    @property
+    def content_type(self) -> str:
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def _field_header(self, name: str) -> bytes:
+        return (
+            f'--{self.boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n'
+        ).encode()
+
+    def _file_header(self, name: str, filename: str, content_type: str) -> bytes:
+        return (
+            f"--{self.boundary}\r\n"
+            f'Content-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n"
+        ).encode()
+
+    def _closing(self) -> bytes:
+        return f"--{self.boundary}--\r\n".encode()
+
+    def _content_length(self) -> int | None:
+        length = len(self._closing())
+        for name, value in self._fields.items():
+            length += len(self._field_header(name)) + len(str(value).encode()) + len(CRLF)
+
+        for name, (filename, fileobj, content_type) in self._files.items():
+            size = _remaining_size(fileobj)
+            if size is None:
+                return None
+            length += len(self._file_header(name, filename, content_type)) + size + len(CRLF)
+
+        return length
+
+    def _generate(self) -> Iterator[bytes]:
+        for name, value in self._fields.items():
+            yield self._field_header(name) + str(value).encode() + CRLF
+
+        for name, (filename, fileobj, content_type) in self._files.items():
+            yield self._file_header(name, filename, content_type)
+            while chunk := fileobj.read(self.chunk_size):
+                yield chunk if isinstance(chunk, bytes) else chunk.encode()
+            yield CRLF
+
+        yield self._closing()
+
+    def _report(self, chunk: bytes) -> bytes:
+        self.bytes_read += len(chunk)
+        if self.progress_callback is not None:
+            self.progress_callback(self.bytes_read, self.len)
+        return chunk
+
+    def __iter__(self) -> Iterator[bytes]:
+        for chunk in self._generate():
+            yield self._report(chunk)
+
+    def read(self, size: int = -1) -> bytes:
+        """File-like access used by http.client to send the body block by block."""
+        if self._iterator is None:
+            self._iterator = self._generate()
+
+        while size < 0 or len(self._buffer) < size:
+            chunk = next(self._iterator, None)
+            if chunk is None:
+                break
+            self._buffer += chunk
+
+        if size < 0:
+            data, self._buffer = self._buffer, b""
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return self._report(data) if data else data
+
+    def tell(self) -> int:
+        return self.bytes_read
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        """Rewind the body to the start, the only position that is supported."""
+        if offset != 0 or whence != os.SEEK_SET:
+            raise io.UnsupportedOperation("A multipart body can only be rewound to the start.")
+        if self._iterator is None and self.bytes_read == 0:
+            return 0
+        if None in self._starts:
+            raise io.UnsupportedOperation("A multipart body with a non-seekable file is one-shot.")
+
+        for (_, fileobj, _), start in zip(self._files.values(), self._starts, strict=True):
+            fileobj.seek(start)
+        self._iterator = None
+        self._buffer = b""
+        self.bytes_read = 0
+        return 0
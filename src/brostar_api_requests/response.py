@@ -0,0 +1,71 @@
+import json
+from typing import Any
+
+import requests
+
+try:
+    import orjson
+except ImportError:  # orjson is an optional speed-up, see the "fast" extra
+    orjson = None
+
+_UNSET = object()
+
+
+def loads(content: bytes | str) -> Any:
+    """Decode JSON with orjson when it is installed, otherwise with the standard library."""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+class BROSTARResponse:
+    """Response that decodes its body at most once.
+
+    `json()`, `results`, `next` and `count` share one lazily decoded body, so hot
+    loops can use them repeatedly without parsing large pages again. Everything
+    else (status_code, raise_for_status, content, ...) is taken from the wrapped
+    `requests.Response`.
+    """
+
+    __slots__ = ("response", "_data")
+
+    def __init__(self, response: requests.Response) -> None:
+        self.response = response
+        self._data = _UNSET
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.response, name)
+
+    def __bool__(self) -> bool:
+        return bool(self.response)
+
+    def __repr__(self) -> str:
+        return f"<BROSTARResponse [{self.response.status_code}]>"
+
+    def json(self, **kwargs) -> Any:
+        """The decoded body, decoded on the first call only.
+
+        Keyword arguments are passed on to `requests.Response.json`, which decodes the
+        body again without caching. An invalid body raises
+        `requests.exceptions.JSONDecodeError`, like `requests` does.
+        """
+        if kwargs:
+            return self.response.json(**kwargs)
+        if self._data is _UNSET:
+            try:
+                self._data = loads(self.response.content)
+            except json.JSONDecodeError as e:
+                raise requests.exceptions.JSONDecodeError(e.msg, e.doc, e.pos) from e
+        return self._data
+
+    @property
+    def results(self) -> list[dict]:
+        return self.json().get("results", [])
+
+    @property
+    def next(self) -> str | None:
+        return self.json().get("next")
+
+    @property
+    def count(self) -> int | None:
+        return self.json().get("count")
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from ._lazy import lazy_import
+from .connection import BROSTARConnection
+
+if TYPE_CHECKING:
+    import polars as pl
+else:
+    pl = lazy_import("polars")
+
+logger = logging.getLogger(__name__)
+
+
+def _schema() -> dict[str, pl.DataType]:
+    """Columns kept per uploadtask, the rest of the response is dropped per page."""
+    return {
+        "uuid": pl.String,
+        "bro_id": pl.String,
+        "registration_type": pl.String,
+        "request_type": pl.String,
+        "status": pl.String,
+        "created_at": pl.String,
+        "updated_at": pl.String,
+        "time_value_pairs_count": pl.Int64,
+        "error": pl.String,
+    }
+
+
+def _page_to_frame(results: list[dict]) -> pl.DataFrame:
+    """Project a page of uploadtasks onto the statistics columns."""
+    schema = _schema()
+    columns: dict[str, list] = {column: [] for column in schema}
+    for task in results:
+        metadata = task.get("metadata") or {}
+        sourcedocument_data = task.get("sourcedocument_data") or {}
+        columns["uuid"].append(task["uuid"])
+        columns["bro_id"].append(task.get("bro_id") or metadata.get("broId"))
+        columns["registration_type"].append(task.get("registration_type"))
+        columns["request_type"].append(task.get("request_type"))
+        columns["status"].append(task.get("status"))
+        columns["created_at"].append(task.get("created_at"))
+        columns["updated_at"].append(task.get("updated_at") or task.get("created_at"))
+        columns["time_value_pairs_count"].append(sourcedocument_data.get("timeValuePairsCount"))
+        error = task.get("bro_errors") or task.get("log") or None
+        if isinstance(error, list):
+            error = "; ".join(str(message) for message in error)
+        columns["error"].append(error)
+    return pl.DataFrame(columns, schema=schema)
+
+
+class UploadTaskStatistics:
+    """Columnar statistics over all uploadtasks, cached incrementally on disk.
+
+    Pages are fetched concurrently by offset and reduced to a few columns as soon
+    as they arrive. With a `cache_path` the table is stored as Parquet, and the
+    next `refresh` only fetches the tasks updated since the last one.
+
+    `filters` are sent along with every request, e.g. {"status": "COMPLETED"}, so
+    only the matching tasks are transferred. A cache then only holds those tasks.
+    """
+
+    def __init__(
+        self,
+        brostar: BROSTARConnection,
+        cache_path: str | Path | None = None,
+        page_size: int = 1000,
+        max_workers: int = 5,
+        filters: dict[str, str] | None = None,
+    ) -> None:
+        self.brostar = brostar
+        self.filters = dict(filters or {})
+        self.cache_path = Path(cache_path) if cache_path is not None else None
+        self.page_size = page_size
+        self.max_workers = max_workers
+        if self.cache_path is not None and self.cache_path.exists():
+            self.tasks = pl.read_parquet(self.cache_path)
+        else:
+            self.tasks = pl.DataFrame(schema=_schema())
+
+    @property
+    def updated_at(self) -> str | None:
+        return self.tasks["updated_at"].max()
+
+    def _fetch_page(self, params: dict) -> dict:
+        r = self.brostar.get("uploadtasks", params=params)
+        r.raise_for_status()
+        return r.json()
+
+    def refresh(self) -> int:
+        """Fetch the uploadtasks updated since the last refresh and merge them by uuid."""
+        params: dict = {**self.filters, "limit": self.page_size}
+        if self.updated_at is not None:
+            params["updated_at__gt"] = self.updated_at
+
+        first = self._fetch_page({**params, "offset": 0})
+        offsets = range(self.page_size, first.get("count") or 0, self.page_size)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pages = executor.map(
+                lambda offset: self._fetch_page({**params, "offset": offset}), offsets
+            )
+            frames = [_page_to_frame(first.get("results", []))]
+            frames += [_page_to_frame(page.get("results", [])) for page in pages]
+
+        new = pl.concat(frames).unique("uuid", keep="last")
+        self.tasks = pl.concat([self.tasks.join(new.select("uuid"), on="uuid", how="anti"), new])
+        if self.cache_path is not None:
+            self.tasks.write_parquet(self.cache_path)
+
+        logger.info(f"Fetched {new.height} uploadtasks ({self.tasks.height} in total).")
+        return new.height
+
+    def _completed_additions(self) -> pl.DataFrame:
+        return self.tasks.filter(
+            pl.col("status") == "COMPLETED", pl.col("registration_type") == "GLD_Addition"
+        )
+
+    def events_delivered_per_gld(self) -> pl.DataFrame:
+        return (
+            self._completed_additions()
+            .group_by("bro_id")
+            .agg(
+                pl.col("time_value_pairs_count").fill_null(0).sum().alias("events"),
+                pl.len().alias("additions"),
+            )
+            .sort("bro_id")
+        )
+
+    def events_delivered_per_month(self) -> pl.DataFrame:
+        return (
+            self._completed_additions()
+            .group_by(pl.col("created_at").str.slice(0, 7).alias("month"))
+            .agg(pl.col("time_value_pairs_count").fill_null(0).sum().alias("events"))
+            .sort("month")
+        )
+
+    def tasks_per_status(self) -> pl.DataFrame:
+        return (
+            self.tasks.group_by("registration_type", "status")
+            .agg(pl.len().alias("tasks"))
+            .sort("registration_type", "status")
+        )
+
+    def failure_rates(self) -> pl.DataFrame:
+        return (
+            self.tasks.group_by("registration_type")
+            .agg(
+                pl.len().alias("tasks"),
+                (pl.col("status") == "FAILED").sum().alias("failed"),
+            )
+            .with_columns((pl.col("failed") / pl.col("tasks")).alias("failure_rate"))
+            .sort("failure_rate", descending=True)
+        )
+
+    def failures_per_error(self) -> pl.DataFrame:
+        return (
+            self.tasks.filter(pl.col("status") == "FAILED")
+            .group_by("registration_type", "error")
+            .agg(pl.len().alias("tasks"))
+            .sort("tasks", descending=True)
+        )
@@ -1,10 +1,23 @@
+import functools
 import logging
 import uuid
+from collections.abc import Iterator, Sequence
 from datetime import date, datetime
-from typing import Any
-
-from pydantic import BaseModel, field_validator, model_validator
+from typing import TYPE_CHECKING, Any
+
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    GetCoreSchemaHandler,
+    TypeAdapter,
+    ValidationInfo,
+    field_validator,
+    model_validator,
+)
+from pydantic_core import core_schema
+from typing_extensions import TypedDict
 
+from ._lazy import lazy_import
 from .type_helpers import (
     BroDomainOptions,
     CorrectionReasonOptions,
@@ -13,23 +26,30 @@ from .type_helpers import (
     RequestTypeOptions,
 )
 
+if TYPE_CHECKING:
+    import numpy as np
+    import polars as pl
+else:
+    np = lazy_import("numpy")
+
 logger = logging.getLogger(__name__)
 
 
+@functools.cache
 def to_camel(string: str) -> str:
     parts = string.split("_")
     return parts[0] + "".join(word.capitalize() for word in parts[1:])
 
 
 class CamelModel(BaseModel):
-    class Config:
-        validate_by_name = True
-        extra = "ignore"
-
+    model_config = ConfigDict(
+        validate_by_name=True,
+        extra="ignore",
         # Ensure aliasing works for all fields with underscores
-        @staticmethod
-        def alias_generator(field_name: str) -> str:
-            return to_camel(field_name)
+        alias_generator=to_camel,
+        # Build the validators on first use instead of at import time
+        defer_build=True,
+    )
 
 
 ## Uploadtask models
@@ -132,7 +152,7 @@ class Electrode(CamelModel):
 
 class GeoOhmCable(CamelModel):
     cable_number: int
-    electrodes: list[Electrode] | None
+    electrodes: list[Electrode] | None = []
 
 
 class MonitoringTube(CamelModel):
@@ -156,13 +176,18 @@ class MonitoringTube(CamelModel):
     sediment_sump_length: float | None = None
     geo_ohm_cables: list[GeoOhmCable] | None = None
 
+    @field_validator("geo_ohm_cables", mode="before")
+    def empty_geo_ohm_cables_to_none(cls, value):
+        """BROSTAR lists tubes without cables as [], the sourcedocument leaves them out."""
+        return value or None
+
 
 class GMWConstruction(CamelModel):
     object_id_accountable_party: str
     delivery_context: str
     construction_standard: str
     initial_function: str
-    nitg_code: str
+    nitg_code: str | None = None
     number_of_monitoring_tubes: int
     ground_level_stable: str
     well_stability: str | None = None
@@ -381,6 +406,204 @@ class TimeValuePair(CamelModel):
         return value
 
 
+STATUS_QUALITY_CONTROL_OPTIONS = (
+    "goedgekeurd",
+    "onbeslist",
+    "afgekeurd",
+    "nogNietBeoordeeld",
+    "onbekend",
+)
+CENSOR_REASON_OPTIONS = ("groterDanLimietwaarde", "kleinerDanLimietwaarde", "onbekend")
+
+
+class TimeValueSeries:
+    """Array backed alternative to a list of TimeValuePair objects.
+
+    Times are stored as int64 epoch milliseconds (UTC), values and censoring limits as
+    float64 with NaN for missing values, and the status and censor reason as int8 codes
+    into STATUS_QUALITY_CONTROL_OPTIONS and CENSOR_REASON_OPTIONS (-1 for no censor reason).
+    Slices share memory with the original series.
+    """
+
+    __slots__ = (
+        "times",
+        "values",
+        "status_codes",
+        "censor_codes",
+        "censoring_limitvalues",
+        "time_zone",
+    )
+
+    def __init__(
+        self,
+        times: "Sequence[int] | np.ndarray",
+        values: "Sequence[float] | np.ndarray",
+        status_codes: "Sequence[int] | np.ndarray | None" = None,
+        censor_codes: "Sequence[int] | np.ndarray | None" = None,
+        censoring_limitvalues: "Sequence[float] | np.ndarray | None" = None,
+        time_zone: str = "Europe/Amsterdam",
+    ) -> None:
+        self.times = np.asarray(times, dtype=np.int64)
+        self.values = np.asarray(values, dtype=np.float64)
+        size = len(self.times)
+        if status_codes is None:
+            status_codes = np.full(size, STATUS_QUALITY_CONTROL_OPTIONS.index("onbekend"))
+        if censor_codes is None:
+            censor_codes = np.full(size, -1)
+        if censoring_limitvalues is None:
+            censoring_limitvalues = np.full(size, np.nan)
+        self.status_codes = np.asarray(status_codes, dtype=np.int8)
+        self.censor_codes = np.asarray(censor_codes, dtype=np.int8)
+        self.censoring_limitvalues = np.asarray(censoring_limitvalues, dtype=np.float64)
+        self.time_zone = time_zone
+
+        arrays = (self.values, self.status_codes, self.censor_codes, self.censoring_limitvalues)
+        if any(len(array) != size for array in arrays):
+            raise ValueError("All arrays of a TimeValueSeries must have the same length.")
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def __getitem__(self, item: int | slice) -> "TimeValueSeries | TimeValuePair":
+        if isinstance(item, slice):
+            return TimeValueSeries(
+                self.times[item],
+                self.values[item],
+                self.status_codes[item],
+                self.censor_codes[item],
+                self.censoring_limitvalues[item],
+                time_zone=self.time_zone,
+            )
+        return TimeValuePair(**self[item : item + 1 or None].to_dicts()[0])
+
+    def __repr__(self) -> str:
+        return f"TimeValueSeries(length={len(self)}, time_zone={self.time_zone!r})"
+
+    def chunks(self, size: int) -> Iterator["TimeValueSeries"]:
+        """Yield consecutive slices of at most `size` observations."""
+        for start in range(0, len(self), size):
+            yield self[start : start + size]
+
+    @classmethod
+    def concat(cls, series: Sequence["TimeValueSeries"]) -> "TimeValueSeries":
+        if not series:
+            raise ValueError("Cannot concatenate an empty sequence of series.")
+        return cls(
+            np.concatenate([s.times for s in series]),
+            np.concatenate([s.values for s in series]),
+            np.concatenate([s.status_codes for s in series]),
+            np.concatenate([s.censor_codes for s in series]),
+            np.concatenate([s.censoring_limitvalues for s in series]),
+            time_zone=series[0].time_zone,
+        )
+
+    @classmethod
+    def from_polars(
+        cls,
+        df: "pl.DataFrame",
+        time_zone: str = "Europe/Amsterdam",
+    ) -> "TimeValueSeries":
+        """Create a series from a DataFrame with TimeValuePair columns.
+
+        Requires a `time` and a numeric `value` column. The time column holds datetimes
+        or ISO 8601 strings, as returned by `fetch_events`. The optional
+        `statusQualityControl`, `censorReason` and `censoringLimitvalue` columns are
+        converted to codes. Naive datetimes are interpreted in `time_zone`.
+
+        :raises ValueError: When the time column cannot be read as datetimes.
+        """
+        import polars as pl
+
+        times = df["time"]
+        if times.dtype == pl.String:
+            try:
+                times = times.str.to_datetime(time_zone=time_zone)
+            except pl.exceptions.PolarsError as e:
+                raise ValueError(f"The time column contains invalid datetimes: {e}") from e
+        elif not isinstance(times.dtype, pl.Datetime):
+            raise ValueError(f"The time column must hold datetimes or strings, not {times.dtype}.")
+        elif times.dtype.time_zone is None:
+            times = times.dt.replace_time_zone(time_zone)
+        status_enum = pl.Enum(STATUS_QUALITY_CONTROL_OPTIONS)
+        censor_enum = pl.Enum(CENSOR_REASON_OPTIONS)
+
+        def codes(column: str, enum: pl.Enum, default: int) -> "np.ndarray | None":
+            if column not in df.columns:
+                return None
+            physical = df[column].cast(enum).to_physical().cast(pl.Int8)
+            return physical.fill_null(default).to_numpy()
+
+        limits = None
+        if "censoringLimitvalue" in df.columns:
+            limits = df["censoringLimitvalue"].cast(pl.Float64).fill_null(np.nan).to_numpy()
+
+        return cls(
+            times.dt.epoch("ms").to_numpy(),
+            df["value"].cast(pl.Float64).fill_null(np.nan).to_numpy(),
+            codes(
+                "statusQualityControl",
+                status_enum,
+                STATUS_QUALITY_CONTROL_OPTIONS.index("onbekend"),
+            ),
+            codes("censorReason", censor_enum, -1),
+            limits,
+            time_zone=time_zone,
+        )
+
+    def to_polars(self) -> "pl.DataFrame":
+        """Convert to a DataFrame, reusing the numeric buffers where possible."""
+        import polars as pl
+
+        def categories(codes: "np.ndarray", options: tuple[str, ...]) -> pl.Series:
+            indices = pl.Series(codes)
+            indices = pl.select(pl.when(pl.lit(indices) >= 0).then(pl.lit(indices))).to_series()
+            return pl.Series(options, dtype=pl.Enum(options)).gather(indices)
+
+        return pl.DataFrame(
+            {
+                "time": pl.Series(self.times)
+                .cast(pl.Datetime("ms", "UTC"))
+                .dt.convert_time_zone(self.time_zone),
+                "value": pl.Series(self.values).fill_nan(None),
+                "statusQualityControl": categories(
+                    self.status_codes, STATUS_QUALITY_CONTROL_OPTIONS
+                ),
+                "censorReason": categories(self.censor_codes, CENSOR_REASON_OPTIONS),
+                "censoringLimitvalue": pl.Series(self.censoring_limitvalues).fill_nan(None),
+            }
+        )
+
+    def to_dicts(self, by_alias: bool = True) -> list[dict[str, Any]]:
+        """Serialise to the same structure as a list of dumped TimeValuePair objects."""
+        import polars as pl
+
+        df = self.to_polars().with_columns(
+            pl.col("time").dt.strftime("%Y-%m-%dT%H:%M:%S%:z"),
+            pl.col("statusQualityControl", "censorReason").cast(pl.String),
+        )
+        if not by_alias:
+            df = df.rename(
+                {
+                    "statusQualityControl": "status_quality_control",
+                    "censorReason": "censor_reason",
+                    "censoringLimitvalue": "censoring_limitvalue",
+                }
+            )
+        return df.to_dicts()
+
+    @classmethod
+    def __get_pydantic_core_schema__(
+        cls, source: Any, handler: GetCoreSchemaHandler
+    ) -> core_schema.CoreSchema:
+        return core_schema.is_instance_schema(
+            cls,
+            serialization=core_schema.plain_serializer_function_ser_schema(
+                lambda series, info: series.to_dicts(by_alias=bool(info.by_alias)),
+                info_arg=True,
+            ),
+        )
+
+
 class GLDAddition(CamelModel):
     date: str | None = None
     observation_id: str | None = None
@@ -396,7 +619,7 @@ class GLDAddition(CamelModel):
     begin_position: str
     end_position: str
     result_time: str | None = None
-    time_value_pairs: list[TimeValuePair]
+    time_value_pairs: list[TimeValuePair] | TimeValueSeries
 
     @model_validator(mode="before")
     def generate_missing_ids(cls, data):
@@ -531,10 +754,99 @@ SourceDocumentModels = (
 )
 
 
+SOURCEDOCUMENT_MODELS: dict[RegistrationTypeOptions, type[CamelModel]] = {
+    "GMW_Construction": GMWConstruction,
+    "GMW_ElectrodeStatus": GMWElectrodeStatus,
+    "GMW_GroundLevel": GMWGroundLevel,
+    "GMW_GroundLevelMeasuring": GMWGroundLevelMeasuring,
+    "GMW_Insertion": GMWInsertion,
+    "GMW_Lengthening": GMWLengthening,
+    "GMW_Maintainer": GMWMaintainer,
+    "GMW_Owner": GMWOwner,
+    "GMW_Positions": GMWPositions,
+    "GMW_PositionsMeasuring": GMWPositionsMeasuring,
+    "GMW_Removal": GMWRemoval,
+    "GMW_Shift": GMWShift,
+    "GMW_Shortening": GMWShortening,
+    "GMW_TubeStatus": GMWTubeStatus,
+    "GMW_WellHeadProtector": GMWWellHeadProtector,
+    "GMN_Startregistration": GMNStartregistration,
+    "GMN_MeasuringPoint": GMNMeasuringPoint,
+    "GMN_MeasuringPointEndDate": GMNMeasuringPointEndDate,
+    "GMN_TubeReference": GMNTubeReference,
+    "GMN_Closure": GMNClosure,
+    "GAR": GAR,
+    "GLD_StartRegistration": GLDStartregistration,
+    "GLD_Addition": GLDAddition,
+    "GLD_Closure": GLDClosure,
+}
+
+
+@functools.cache
+def list_adapter(model: type[BaseModel]) -> TypeAdapter:
+    """TypeAdapter for a list of models, built once and reused for every payload."""
+    return TypeAdapter(list[model])
+
+
+@functools.cache
+def page_adapter(model: type[BaseModel]) -> TypeAdapter:
+    """TypeAdapter for a page of a BROSTAR list endpoint, validating only its results.
+
+    Use `page_adapter(model).validate_json(response.content)["results"]` to build the
+    models straight from the response bytes, without decoding the page into dicts first.
+    """
+
+    class Page(TypedDict):
+        results: list[model]
+
+    Page.__name__ = Page.__qualname__ = f"{model.__name__}Page"
+    return TypeAdapter(Page)
+
+
+@functools.cache
+def sourcedocument_adapter(registration_type: RegistrationTypeOptions) -> TypeAdapter:
+    """TypeAdapter for the sourcedocument model of a registration type, built once."""
+    return TypeAdapter(SOURCEDOCUMENT_MODELS[registration_type])
+
+
+@functools.cache
+def _known_fields(model: type[BaseModel]) -> frozenset[str]:
+    """Field names and their camelCase aliases that a model accepts."""
+    return frozenset(key for name in model.model_fields for key in (name, to_camel(name)))
+
+
 class UploadTask(BaseModel):
+    model_config = ConfigDict(defer_build=True)
+
     bro_domain: BroDomainOptions
     project_number: str
     registration_type: RegistrationTypeOptions
     request_type: RequestTypeOptions
-    sourcedocument_data: Any
+    sourcedocument_data: SourceDocumentModels
     metadata: UploadTaskMetadata
+
+    @field_validator("sourcedocument_data", mode="wrap")
+    def validate_sourcedocument_data(cls, value, handler, info: ValidationInfo):
+        """Validate the sourcedocument as the model that belongs to the registration type.
+
+        Raw dicts are validated once by the cached adapter of that model, instances of the
+        model are passed through without revalidation. The union handler is skipped, as
+        it would validate the sourcedocument a second time against every model of the
+        union. The union annotation is only used to compile the serializer.
+
+        The models ignore unknown fields, so sourcedocuments from the API with fields
+        this package does not know yet still validate. Those fields are logged, because
+        they are dropped when the task is dumped again.
+        """
+        registration_type = info.data.get("registration_type")
+        if registration_type is None:
+            raise ValueError("sourcedocument_data requires a valid registration_type.")
+
+        model = SOURCEDOCUMENT_MODELS[registration_type]
+        if isinstance(value, dict):
+            unknown = value.keys() - _known_fields(model)
+            if unknown:
+                logger.warning(
+                    f"Ignoring unknown {model.__name__} fields: {', '.join(sorted(unknown))}"
+                )
+        return sourcedocument_adapter(registration_type).validate_python(value)
@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import datetime
+import logging
+from typing import TYPE_CHECKING
+
+from ._lazy import lazy_import
+from .mirror import BROSTARMirror
+from .upload_models import GMWEvent, UploadTask
+
+if TYPE_CHECKING:
+    import polars as pl
+else:
+    pl = lazy_import("polars")
+
+logger = logging.getLogger(__name__)
+
+
+def _wells_schema() -> dict[str, pl.DataType]:
+    return {"bro_id": pl.String, "construction_date": pl.Date, "latest_event_date": pl.Date}
+
+
+class WellDateIndex:
+    """Construction date and latest event date of every GMW, from a synced mirror.
+
+    The dates come from the `gmw/gmws` and `gmw/events` collections of the mirror,
+    which only fetches what changed since its previous sync.
+    """
+
+    def __init__(self, mirror: BROSTARMirror) -> None:
+        self.mirror = mirror
+        self.wells = pl.DataFrame(schema=_wells_schema())
+
+    def refresh(self, sync: bool = True) -> None:
+        """Rebuild the index from the mirror, after syncing the GMWs and their events."""
+        if sync:
+            self.mirror.sync("gmw/gmws")
+            self.mirror.sync("gmw/events")
+
+        gmws = self.mirror.all("gmw/gmws")
+        constructions = pl.DataFrame(
+            {
+                "bro_id": [gmw.get("bro_id") for gmw in gmws],
+                "construction_date": [gmw.get("well_construction_date") for gmw in gmws],
+            },
+            schema={"bro_id": pl.String, "construction_date": pl.String},
+        )
+        events = self.mirror.all("gmw/events")
+        latest_events = (
+            pl.DataFrame(
+                {
+                    "bro_id": [event.get("gmw_bro_id") for event in events],
+                    "event_date": [event.get("event_date") for event in events],
+                },
+                schema={"bro_id": pl.String, "event_date": pl.String},
+            )
+            .with_columns(pl.col("event_date").str.to_date(strict=False))
+            .group_by("bro_id")
+            .agg(pl.col("event_date").max().alias("latest_event_date"))
+        )
+        self.wells = (
+            constructions.filter(pl.col("bro_id").is_not_null())
+            .unique("bro_id", keep="last")
+            .with_columns(pl.col("construction_date").str.to_date(strict=False))
+            .join(latest_events, on="bro_id", how="left")
+            .select(*_wells_schema())
+        )
+        logger.info(f"Indexed the construction and event dates of {self.wells.height} GMWs.")
+
+    def record_events(self, tasks: list[UploadTask]) -> None:
+        """Move the latest event dates forward for event registrations that were delivered."""
+        events = _events_frame(tasks).select("bro_id", "event_date")
+        if events.is_empty():
+            return
+        self.wells = (
+            self.wells.join(
+                events.group_by("bro_id").agg(pl.col("event_date").max()),
+                on="bro_id",
+                how="full",
+                coalesce=True,
+            )
+            .with_columns(
+                pl.max_horizontal("latest_event_date", "event_date").alias("latest_event_date")
+            )
+            .select(*_wells_schema())
+        )
+
+
+def _events_frame(tasks: list[UploadTask]) -> pl.DataFrame:
+    """One row per GMW event in `tasks`, with its position in the batch."""
+    rows = [
+        (
+            position,
+            task.metadata.bro_id,
+            task.request_type,
+            task.sourcedocument_data.event_date,
+        )
+        for position, task in enumerate(tasks)
+        if isinstance(task.sourcedocument_data, GMWEvent)
+    ]
+    return pl.DataFrame(
+        rows,
+        schema={
+            "position": pl.UInt32,
+            "bro_id": pl.String,
+            "request_type": pl.String,
+            "event_date": pl.String,
+        },
+        orient="row",
+    ).with_columns(
+        # An explicit format, so one odd date does not change how the others are parsed
+        pl.col("event_date").str.to_date("%Y-%m-%d", strict=False)
+    )
+
+
+def prevalidate_gmw_events(
+    tasks: list[UploadTask],
+    index: WellDateIndex,
+    fix: bool = True,
+    today: datetime.date | None = None,
+) -> tuple[list[UploadTask], list[tuple[UploadTask, str]]]:
+    """Check a batch of GMW event registrations against the rules BRO enforces.
+
+    All events of the batch are checked in one pass against the index, in batch order,
+    so an event also has to follow the earlier events of its GMW in the same batch:
+
+    - An event date that is not a valid date is rejected.
+    - An event date in the future is rejected.
+    - An event before the construction date is moved to the construction date.
+    - A registration before the latest event of the GMW becomes an insert, with
+      correction reason `eigenCorrectie`.
+
+    With `fix=False` the last two are rejected as well. Tasks that are not GMW events,
+    or that belong to a GMW that is not in the index, are passed through unchecked.
+
+    :return: The tasks to send, in batch order, and the rejected tasks with the reason.
+    """
+    today = today or datetime.date.today()
+    checked = (
+        _events_frame(tasks)
+        .join(index.wells, on="bro_id", how="left")
+        .sort("position")
+        .with_columns(
+            pl.col("event_date").is_null().alias("invalid_date"),
+            (pl.col("event_date") > today).fill_null(False).alias("in_future"),
+            (pl.col("event_date") < pl.col("construction_date"))
+            .fill_null(False)
+            .alias("before_construction"),
+        )
+    )
+    if fix:
+        checked = checked.with_columns(
+            pl.when(pl.col("before_construction"))
+            .then(pl.col("construction_date"))
+            .otherwise(pl.col("event_date"))
+            .alias("event_date")
+        )
+    checked = checked.with_columns(
+        pl.max_horizontal(
+            "latest_event_date",
+            # Rejected events in the future are not sent, so later events do not follow them
+            pl.when(~pl.col("in_future"))
+            .then(pl.col("event_date"))
+            .cum_max()
+            .forward_fill()
+            .shift(1)
+            .over("bro_id"),
+        ).alias("previous_event_date")
+    ).with_columns(
+        (
+            (pl.col("event_date") < pl.col("previous_event_date"))
+            & (pl.col("request_type") == "registration")
+        )
+        .fill_null(False)
+        .alias("before_latest_event")
+    )
+
+    rejected: dict[int, str] = {}
+    fixes: dict[int, dict] = {}
+    for row in checked.filter(
+        pl.col("invalid_date")
+        | pl.col("in_future")
+        | pl.col("before_construction")
+        | pl.col("before_latest_event")
+    ).iter_rows(named=True):
+        position = row["position"]
+        if row["invalid_date"]:
+            event_date = tasks[position].sourcedocument_data.event_date
+            rejected[position] = f"Event date {event_date!r} is not a valid date."
+        elif row["in_future"]:
+            rejected[position] = f"Event date {row['event_date']} lies in the future."
+        elif not fix and row["before_construction"]:
+            rejected[position] = (
+                f"Event date {row['event_date']} lies before the construction date "
+                f"{row['construction_date']}."
+            )
+        elif not fix:
+            rejected[position] = (
+                f"Event date {row['event_date']} lies before the latest event "
+                f"{row['previous_event_date']}."
+            )
+        else:
+            fixes[position] = row
+
+    accepted = []
+    rejections = []
+    for position, task in enumerate(tasks):
+        if position in rejected:
+            rejections.append((task, rejected[position]))
+            continue
+        if position in fixes:
+            task = _fix_task(task, fixes[position])
+        accepted.append(task)
+
+    if fixes:
+        logger.info(f"Corrected {len(fixes)} GMW events before sending them.")
+    for task, reason in rejections:
+        logger.warning(f"Rejected {task.registration_type} for {task.metadata.bro_id}: {reason}")
+    return accepted, rejections
+
+
+def _fix_task(task: UploadTask, row: dict) -> UploadTask:
+    update = {}
+    if row["before_construction"]:
+        update["sourcedocument_data"] = task.sourcedocument_data.model_copy(
+            update={"event_date": row["event_date"].isoformat()}
+        )
+    if row["before_latest_event"]:
+        update["request_type"] = "insert"
+        update["metadata"] = task.metadata.model_copy(
+            update={"correction_reason": "eigenCorrectie"}
+        )
+    return task.model_copy(update=update)
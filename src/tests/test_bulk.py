@@ -0,0 +1,319 @@
+import datetime
+
+import polars as pl
+import pytest
+import requests_mock
+
+from ..brostar_api_requests.bulk import (
+    build_gar_sourcedocuments,
+    parse_list_column,
+    register_gld_starts,
+    upload_gld_bulk,
+    write_gld_timeseries_file,
+)
+from ..brostar_api_requests.connection import BROSTARConnection
+from ..brostar_api_requests.deliveries import DeliveryIndex
+from ..brostar_api_requests.upload_models import (
+    GLDBulkUploadMetadata,
+    GLDBulkUploadSourcedocumentData,
+)
+
+
+@pytest.fixture
+def events_df() -> pl.DataFrame:
+    return pl.DataFrame(
+        {
+            "time": [
+                datetime.datetime(2024, 1, 1, 12, 0),
+                datetime.datetime(2024, 1, 2, 12, 0),
+            ],
+            "value": [1.25, None],
+        }
+    ).with_columns(pl.col("time").dt.replace_time_zone("Europe/Amsterdam"))
+
+
+@pytest.fixture
+def metadata() -> GLDBulkUploadMetadata:
+    return GLDBulkUploadMetadata(
+        request_reference="REQ123",
+        quality_regime="IMBRO",
+        delivery_accountable_party="12345678",
+        bro_id="GLD000000000001",
+    )
+
+
+@pytest.fixture
+def sourcedocument() -> GLDBulkUploadSourcedocumentData:
+    return GLDBulkUploadSourcedocumentData(
+        validation_status="voorlopig",
+        investigator_kvk="12345678",
+        observation_type="reguliereMeting",
+        evaluation_procedure="oordeelDeskundige",
+        measurement_instrument_type="druksensor",
+        process_reference="NEN5120",
+        air_pressure_compensation_type=None,
+        begin_position=None,
+        end_position=None,
+        result_time=None,
+    )
+
+
+def test_write_gld_timeseries_file(events_df):
+    buffer = write_gld_timeseries_file(events_df)
+    lines = buffer.read().decode().splitlines()
+    assert lines[0] == "time,value,statusQualityControl,censorReason,censoringLimitvalue"
+    assert lines[1] == "2024-01-01T12:00:00+01:00,1.25,onbekend,,"
+    assert len(lines) == 3
+
+
+def test_write_gld_timeseries_file_keeps_given_columns():
+    df = pl.DataFrame(
+        {
+            "value": [2.0],
+            "time": ["2024-01-01T12:00:00+01:00"],
+            "statusQualityControl": ["goedgekeurd"],
+        }
+    )
+    lines = write_gld_timeseries_file(df).read().decode().splitlines()
+    assert lines[1] == "2024-01-01T12:00:00+01:00,2.0,goedgekeurd,,"
+
+
+def test_write_gld_timeseries_file_missing_columns():
+    with pytest.raises(ValueError):
+        write_gld_timeseries_file(pl.DataFrame({"time": ["2024-01-01T12:00:00"]}))
+
+
+def test_upload_gld_bulk(events_df, metadata, sourcedocument):
+    brostar = BROSTARConnection("token")
+    with requests_mock.Mocker() as m:
+        m.post("https://staging.brostar.nl/api/bulkuploads/", status_code=201)
+        res = upload_gld_bulk(brostar, events_df, metadata, sourcedocument, project_number=1)
+
+        assert res.status_code == 201
+        body = m.last_request.body
+        body = body if isinstance(body, bytes) else body.read()
+        assert b'name="bulk_upload_type"' in body
+        assert b"2024-01-02T12:00:00+01:00" in body
+        assert b'"broId": "GLD000000000001"' in body
+        assert b'"beginPosition": "2024-01-01"' in body
+        assert b'"endPosition": "2024-01-02"' in body
+
+
+@pytest.fixture
+def laboratory_df() -> pl.DataFrame:
+    sample = {
+        "object_id_accountable_party": "PUT-1",
+        "quality_control_method": "onbekend",
+        "gmw_bro_id": "GMW000000000001",
+        "tube_number": 1,
+        "sampling_date_time": datetime.datetime(2024, 3, 1, 10, 0),
+        "sampling_standard": "onbekend",
+        "pump_type": "onbekend",
+        "abnormality_in_cooling": "nee",
+        "abnormality_in_device": "nee",
+        "polluted_by_engine": "nee",
+        "filter_aerated": "nee",
+        "ground_water_level_dropped_too_much": "nee",
+        "abnormal_filter": "nee",
+        "sample_aerated": "nee",
+        "hose_reused": "nee",
+        "temperature_difficult_to_measure": "nee",
+        "responsible_laboratory_kvk": "87654321",
+        "analysis_date": datetime.date(2024, 3, 5),
+        "analytical_technique": "ICPMS",
+        "valuation_method": "onbekend",
+        "unit": "mg/l",
+        "quality_control_status": "goedgekeurd",
+    }
+    rows = [
+        {**sample, "parameter": 1, "analysis_measurement_value": 0.5},
+        {**sample, "parameter": 2, "analysis_measurement_value": 1.5},
+        {
+            **sample,
+            "analytical_technique": "IC",
+            "parameter": 3,
+            "analysis_measurement_value": 2.5,
+        },
+        {
+            **sample,
+            "tube_number": 2,
+            "parameter": 1,
+            "analysis_measurement_value": 3.5,
+        },
+    ]
+    return pl.DataFrame(rows)
+
+
+def test_build_gar_sourcedocuments(laboratory_df):
+    gars = build_gar_sourcedocuments(laboratory_df)
+
+    assert len(gars) == 2
+    first, second = gars
+    assert first.tube_number == 1
+    assert first.field_research.sampling_date_time == "2024-03-01T10:00:00"
+    processes = first.laboratory_analyses[0].analysis_processes
+    assert [process.analytical_technique for process in processes] == ["ICPMS", "IC"]
+    assert processes[0].date == "2024-03-05"
+    assert [analysis.analysis_measurement_value for analysis in processes[0].analyses] == [
+        0.5,
+        1.5,
+    ]
+    assert second.laboratory_analyses[0].analysis_processes[0].analyses[0].parameter == 1
+
+
+def test_build_gar_sourcedocuments_missing_columns(laboratory_df):
+    with pytest.raises(ValueError):
+        build_gar_sourcedocuments(laboratory_df.drop("pump_type"))
+
+
+def test_parse_list_column():
+    df = pl.DataFrame(
+        {"nets": ["['GMN0001', 'GMN0002']", None, "[]", '["Meetnet \'s-Hertogenbosch"]']}
+    )
+
+    parsed = parse_list_column(df, "nets")
+
+    assert parsed["nets"].to_list() == [
+        ["GMN0001", "GMN0002"],
+        None,
+        [],
+        ["Meetnet 's-Hertogenbosch"],
+    ]
+
+
+def test_register_gld_starts(monkeypatch):
+    brostar = BROSTARConnection(token="dummy-token")
+    df = pl.DataFrame(
+        {
+            "objectIdAccountableParty": ["PUT-1", "PUT-2", "PUT-3", "PUT-4"],
+            "gmwBroId": ["GMW000000000001"] * 4,
+            "tubeNumber": [1, 2, 3, 4],
+            "deliveryAccountableParty": [12345678] * 4,
+            "groundwaterMonitoringNets": ["['GMN0001']", "['GMN0001']", None, "['GMN0002']"],
+            "projectNumber": [1] * 4,
+            "bro_id": [None, "GLD000000000002", None, None],
+        }
+    )
+
+    posted = []
+
+    def post(request, context):
+        posted.append(request.json())
+        return {"uuid": request.json()["sourcedocument_data"]["objectIdAccountableParty"]}
+
+    class Completed:
+        def __init__(self, uuid):
+            self.uuid = uuid
+
+        def json(self):
+            return {"status": "COMPLETED", "bro_id": f"GLD-{self.uuid}"}
+
+    monkeypatch.setattr(brostar, "await_completed", lambda uuid: Completed(uuid))
+
+    with requests_mock.Mocker() as m:
+        m.post("https://staging.brostar.nl/api/uploadtasks/", json=post)
+        registrations = register_gld_starts(brostar, df)
+
+    assert registrations.rows() == [
+        ("PUT-1", "GLD-PUT-1", "COMPLETED"),
+        ("PUT-2", "GLD000000000002", "EXISTING"),
+        ("PUT-3", None, "SKIPPED"),
+        ("PUT-4", "GLD-PUT-4", "COMPLETED"),
+    ]
+    assert len(posted) == 2
+    assert posted[0]["sourcedocument_data"]["groundwaterMonitoringNets"] == ["GMN0001"]
+    assert posted[0]["metadata"]["deliveryAccountableParty"] == "12345678"
+
+
+def test_register_gld_starts_sends_valid_rows_of_invalid_batch(monkeypatch):
+    brostar = BROSTARConnection(token="dummy-token")
+    df = pl.DataFrame(
+        {
+            "objectIdAccountableParty": ["PUT-1", "PUT-2"],
+            "gmwBroId": [None, "GMW000000000001"],
+            "tubeNumber": [1, 2],
+            "deliveryAccountableParty": [12345678] * 2,
+            "groundwaterMonitoringNets": ["['GMN0001']"] * 2,
+            "projectNumber": [1] * 2,
+        }
+    )
+
+    class Completed:
+        def __init__(self, uuid):
+            self.uuid = uuid
+
+        def json(self):
+            return {"status": "COMPLETED", "bro_id": f"GLD-{self.uuid}"}
+
+    monkeypatch.setattr(brostar, "await_completed", lambda uuid: Completed(uuid))
+
+    with requests_mock.Mocker() as m:
+        m.post("https://staging.brostar.nl/api/uploadtasks/", json={"uuid": "PUT-2"})
+        registrations = register_gld_starts(brostar, df)
+
+    assert registrations.rows() == [
+        ("PUT-1", None, "FAILED"),
+        ("PUT-2", "GLD-PUT-2", "COMPLETED"),
+    ]
+    assert m.call_count == 1
+
+
+def test_register_gld_starts_skips_unchanged_rows(monkeypatch):
+    brostar = BROSTARConnection(token="dummy-token")
+    df = pl.DataFrame(
+        {
+            "objectIdAccountableParty": ["PUT-1", "PUT-2"],
+            "gmwBroId": ["GMW000000000001"] * 2,
+            "tubeNumber": [1, 2],
+            "deliveryAccountableParty": [12345678] * 2,
+            "groundwaterMonitoringNets": ["['GMN0001']"] * 2,
+            "projectNumber": [1] * 2,
+        }
+    )
+
+    posted = []
+
+    def post(request, context):
+        posted.append(request.json())
+        return {"uuid": request.json()["sourcedocument_data"]["objectIdAccountableParty"]}
+
+    class Completed:
+        def __init__(self, uuid):
+            self.uuid = uuid
+
+        def json(self):
+            return {"status": "COMPLETED", "bro_id": f"GLD-{self.uuid}"}
+
+    monkeypatch.setattr(brostar, "await_completed", lambda uuid: Completed(uuid))
+
+    with DeliveryIndex() as index, requests_mock.Mocker() as m:
+        m.post("https://staging.brostar.nl/api/uploadtasks/", json=post)
+        register_gld_starts(brostar, df, index=index)
+        changed = df.with_columns(pl.Series("tubeNumber", [1, 3]))
+        registrations = register_gld_starts(brostar, changed, index=index)
+
+    assert registrations.rows() == [
+        ("PUT-1", "GLD-PUT-1", "UNCHANGED"),
+        ("PUT-2", "GLD-PUT-2", "COMPLETED"),
+    ]
+    assert len(posted) == 3
+
+
+def test_register_gld_starts_reports_failed_requests():
+    brostar = BROSTARConnection(token="dummy-token")
+    df = pl.DataFrame(
+        {
+            "objectIdAccountableParty": ["PUT-1"],
+            "gmwBroId": ["GMW000000000001"],
+            "tubeNumber": [1],
+            "deliveryAccountableParty": [12345678],
+            "groundwaterMonitoringNets": ["['GMN0001']"],
+            "projectNumber": [1],
+        }
+    )
+
+    with requests_mock.Mocker() as m:
+        m.post("https://staging.brostar.nl/api/uploadtasks/", status_code=400, json={})
+        registrations = register_gld_starts(brostar, df)
+
+    assert registrations.rows() == [("PUT-1", None, "FAILED")]
@@ -1,11 +1,19 @@
+import datetime
+import gc
 import io
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 import pytest
 import requests_mock
 
 from ..brostar_api_requests.connection import (
-    BROSTARConnection,  # Replace 'your_module' with actual module name
+    BROServicesConnection,
+    BROSTARConnection,
+    ConnectionRegistry,
+    LizardConnection,
+    ThreadSafeBROSTARConnection,
 )
 
 
@@ -136,8 +144,183 @@ def test_await_bro_id_timeout(monkeypatch):
     assert bro_id is None
 
 
+def test_await_completed_stops_on_failed(brostar: BROSTARConnection, monkeypatch):
+    monkeypatch.setattr("time.sleep", lambda x: None)
+    with requests_mock.Mocker() as m:
+        m.get(
+            f"{brostar.website}/uploadtasks/some-uuid/",
+            [{"json": {"status": "PENDING"}}, {"json": {"status": "FAILED"}}],
+        )
+        assert brostar.await_completed("some-uuid").json()["status"] == "FAILED"
+        assert m.call_count == 2
+
+
 def test_check_status(brostar: BROSTARConnection):
     with requests_mock.Mocker() as m:
         m.post("https://staging.brostar.nl/api/uploadtasks/abc123/check_status/", status_code=200)
         res = brostar.check_status("abc123")
         assert res.status_code == 200
+
+
+def test_post_gld_bulk_streams_multipart(brostar: BROSTARConnection):
+    progress = []
+    with requests_mock.Mocker() as m:
+        m.post("https://staging.brostar.nl/api/bulkuploads/", status_code=201)
+
+        timeseries_file = ("series.csv", io.BytesIO(b"time,value\n2024,1.0"), "text/csv")
+        res = brostar.post_gld_bulk(
+            {"bulk_upload_type": "GLD"},
+            timeseries_file=timeseries_file,
+            progress_callback=lambda sent, total: progress.append((sent, total)),
+        )
+        assert res.status_code == 201
+
+        request = m.last_request
+        assert request.headers["Content-Type"].startswith("multipart/form-data; boundary=")
+        body = request.body.read()
+        assert int(request.headers["Content-Length"]) == len(body)
+        assert b'name="bulk_upload_type"\r\n\r\nGLD\r\n' in body
+        assert (
+            b'filename="series.csv"\r\nContent-Type: text/csv\r\n\r\ntime,value\n2024,1.0' in body
+        )
+        assert progress[-1] == (len(body), len(body))
+
+
+@pytest.fixture
+def lizard():
+    return LizardConnection(token="dummy-token", tenant="vitens")
+
+
+def test_lizard_tenant_and_authentication(lizard: LizardConnection):
+    assert lizard.website == "https://vitens.lizard.net/api/v4"
+    assert lizard.s.auth.username == "__key__"
+    assert lizard.s.auth.password == "dummy-token"
+
+    lizard.set_tenant("rotterdam")
+    assert lizard.url("locations") == "https://rotterdam.lizard.net/api/v4/locations/"
+    assert lizard.url("https://example.com/events/") == "https://example.com/events/"
+
+
+def test_lizard_iter_results_follows_next(lizard: LizardConnection):
+    with requests_mock.Mocker() as m:
+        m.get(
+            "https://vitens.lizard.net/api/v4/locations/?code=abc",
+            json={"next": "https://vitens.lizard.net/api/v4/locations/?page=2", "results": [1]},
+        )
+        m.get(
+            "https://vitens.lizard.net/api/v4/locations/?page=2",
+            json={"next": None, "results": [2, 3]},
+        )
+        assert lizard.get_all("locations", params={"code": "abc"}) == [1, 2, 3]
+
+
+def test_lizard_patch_and_map_concurrent(lizard: LizardConnection):
+    with requests_mock.Mocker() as m:
+        m.patch(requests_mock.ANY, json={"ok": True})
+        urls = [f"https://vitens.lizard.net/api/v4/locations/{i}/" for i in range(5)]
+        results = lizard.map_concurrent(lambda url: lizard.patch(url, json={}).status_code, urls)
+        assert results == [200] * 5
+        assert m.call_count == 5
+
+
+SUMMARY_URL = "https://publiek.broservices.nl/gm/gld/v1/objects/{}/observationsSummary"
+
+
+def test_bro_services_prefetch_and_cache(tmp_path):
+    bro_services = BROServicesConnection(cache_dir=tmp_path)
+
+    with requests_mock.Mocker() as m:
+        m.get(SUMMARY_URL.format("GLD000000000001"), json=[{"observationId": "_1"}])
+        m.get(SUMMARY_URL.format("GLD000000000002"), json=[])
+        summaries = bro_services.prefetch_gld_observations_summaries(
+            ["GLD000000000001", "GLD000000000002", "GLD000000000001"]
+        )
+        assert m.call_count == 2
+
+    assert summaries == {"GLD000000000001": [{"observationId": "_1"}], "GLD000000000002": []}
+
+    # A new connection reads the summaries from the cache, but fetches empty ones again
+    with requests_mock.Mocker() as m:
+        m.get(SUMMARY_URL.format("GLD000000000002"), json=[{"observationId": "_2"}])
+        cached = BROServicesConnection(cache_dir=tmp_path)
+        assert cached.gld_observations_summary("GLD000000000001") == [{"observationId": "_1"}]
+        assert m.call_count == 0
+        assert cached.gld_observations_summary("GLD000000000002") == [{"observationId": "_2"}]
+        assert m.call_count == 1
+
+
+def test_bro_services_prefetch_leaves_out_failed_lookups(tmp_path):
+    bro_services = BROServicesConnection(cache_dir=tmp_path)
+
+    with requests_mock.Mocker() as m:
+        m.get(SUMMARY_URL.format("GLD000000000001"), json=[{"observationId": "_1"}])
+        m.get(SUMMARY_URL.format("GLD000000000002"), status_code=404)
+        summaries = bro_services.prefetch_gld_observations_summaries(
+            ["GLD000000000001", "GLD000000000002"]
+        )
+
+    assert summaries == {"GLD000000000001": [{"observationId": "_1"}]}
+    assert not (tmp_path / "observationsSummary_GLD000000000002.json").exists()
+
+
+def test_bro_services_cache_expires(tmp_path):
+    with requests_mock.Mocker() as m:
+        m.get(SUMMARY_URL.format("GLD000000000001"), json=[{"observationId": "_1"}])
+        bro_services = BROServicesConnection(
+            cache_dir=tmp_path, cache_ttl=datetime.timedelta(seconds=-1)
+        )
+        bro_services.gld_observations_summary("GLD000000000001")
+        bro_services.gld_observations_summary("GLD000000000001")
+        assert m.call_count == 2
+
+
+def test_connection_registry_shares_connections():
+    with ConnectionRegistry() as registry:
+        production = registry.get("token-a")
+        assert registry.get("token-a") is production
+        assert production.website == "https://www.brostar.nl/api"
+
+        staging = registry.get("token-a", production=False)
+        assert staging is not production
+        assert staging.website == "https://staging.brostar.nl/api"
+        assert registry.get("token-b") is not production
+        assert len(registry) == 3
+
+    assert len(registry) == 0
+
+
+def test_thread_safe_connection_sessions_per_thread():
+    brostar = ThreadSafeBROSTARConnection(token="dummy-token", production=True)
+    assert brostar.website == "https://www.brostar.nl/api"
+    assert brostar.s is brostar.s
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        sessions = list(executor.map(lambda _: brostar.s, range(2)))
+    assert all(session is not brostar.s for session in sessions)
+    assert all(session.get_adapter("https://") is brostar._adapter for session in sessions)
+    assert all(session.auth.password == "dummy-token" for session in sessions)
+
+    with pytest.raises(AttributeError):
+        brostar.set_website(production=False)
+
+    with requests_mock.Mocker() as m:
+        m.get("https://www.brostar.nl/api/uploadtasks/", json={"results": []})
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            responses = list(executor.map(lambda _: brostar.get("uploadtasks"), range(8)))
+        assert all(r.json() == {"results": []} for r in responses)
+        assert m.call_count == 8
+
+    brostar.close()
+
+
+def test_thread_safe_connection_releases_sessions_of_finished_threads():
+    brostar = ThreadSafeBROSTARConnection(token="dummy-token")
+
+    for _ in range(3):
+        thread = threading.Thread(target=lambda: brostar.s)
+        thread.start()
+        thread.join()
+    gc.collect()
+
+    assert len(brostar._sessions) == 0
+    brostar.close()
@@ -0,0 +1,69 @@
+from ..brostar_api_requests.deliveries import DeliveryIndex, content_hash, delivery_key
+from ..brostar_api_requests.upload_models import GLDAddition, UploadTask, UploadTaskMetadata
+
+
+def _addition_payload(request_reference: str = "run-1", value: float = 1.0) -> dict:
+    addition = GLDAddition(
+        investigator_kvk="12345678",
+        observation_type="reguliereMeting",
+        evaluation_procedure="oordeelDeskundige",
+        measurement_instrument_type="druksensor",
+        process_reference="NEN-EN-ISO22475v2006",
+        begin_position="2025-01-01",
+        end_position="2025-01-02",
+        result_time="2025-01-02T00:00:00+01:00",
+        time_value_pairs=[{"time": "2025-01-01T00:00:00+01:00", "value": value}],
+    )
+    return UploadTask(
+        bro_domain="GLD",
+        project_number="1",
+        registration_type="GLD_Addition",
+        request_type="registration",
+        sourcedocument_data=addition,
+        metadata=UploadTaskMetadata(
+            request_reference=request_reference,
+            quality_regime="IMBRO",
+            bro_id="GLD000000000001",
+        ),
+    ).model_dump(mode="json", by_alias=True)
+
+
+def test_content_hash_ignores_generated_ids_and_request_reference():
+    first = _addition_payload("run-1")
+    second = _addition_payload("run-2")
+
+    first_id = first["sourcedocument_data"]["observationId"]
+    assert first_id != second["sourcedocument_data"]["observationId"]
+    assert content_hash(first) == content_hash(second)
+    assert content_hash(first) != content_hash(_addition_payload(value=2.0))
+
+
+def test_delivery_key():
+    assert delivery_key(_addition_payload()) == "GLD_Addition/registration/GLD000000000001"
+
+
+def test_delivery_index_only_matches_completed_deliveries():
+    payload = _addition_payload()
+    with DeliveryIndex() as index:
+        assert index.unchanged(payload) is None
+
+        index.record(payload, "FAILED", uuid="uuid-1")
+        assert index.unchanged(payload) is None
+
+        index.record(payload, "COMPLETED", uuid="uuid-2", bro_id="GLD000000000001")
+        delivery = index.unchanged(_addition_payload("run-2"))
+        assert delivery["uuid"] == "uuid-2"
+
+        # A later failed attempt does not undo the completed delivery
+        index.record(_addition_payload(value=2.0), "FAILED", uuid="uuid-3")
+        assert index.unchanged(payload)["uuid"] == "uuid-2"
+        assert index.unchanged(_addition_payload(value=2.0)) is None
+
+
+def test_delivery_index_persists(tmp_path):
+    payload = _addition_payload()
+    with DeliveryIndex(tmp_path / "deliveries.sqlite") as index:
+        index.record(payload, "COMPLETED", uuid="uuid-1")
+
+    with DeliveryIndex(tmp_path / "deliveries.sqlite") as index:
+        assert index.unchanged(payload)["uuid"] == "uuid-1"
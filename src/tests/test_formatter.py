@@ -1,8 +1,11 @@
+import json
 from unittest.mock import MagicMock
 
 import pytest
+import requests_mock
 from pydantic import ValidationError
 
+from ..brostar_api_requests.connection import BROSTARConnection
 from ..brostar_api_requests.formatter import (
     PayloadFormatter,
     build_gmw_construction,
@@ -10,6 +13,7 @@ from ..brostar_api_requests.formatter import (
     format_geo_ohm_cables,
     format_monitoring_tubes,
 )
+from ..brostar_api_requests.mirror import BROSTARMirror
 from ..brostar_api_requests.upload_models import (
     Electrode,
     GeoOhmCable,
@@ -445,14 +449,18 @@ def test_build_gmw_construction_invalid_nested_tube():
         build_gmw_construction(BASE_GMW_DATA, tube_data)
 
 
+def page_response(page: dict) -> MagicMock:
+    return MagicMock(content=json.dumps(page).encode(), json=MagicMock(return_value=page))
+
+
 def test_format_gmw_construction_valid(monkeypatch):
     # Arrange
     mock_brostar = MagicMock()
 
     # Mocking API responses
     mock_brostar.get.side_effect = [
-        MagicMock(json=lambda: {"results": [BASE_GMW_DATA]}),
-        MagicMock(json=lambda: {"results": BASE_TUBE_DATA}),
+        page_response({"results": [BASE_GMW_DATA]}),
+        page_response({"results": BASE_TUBE_DATA}),
     ]
 
     formatter = PayloadFormatter(brostar=mock_brostar)
@@ -465,3 +473,74 @@ def test_format_gmw_construction_valid(monkeypatch):
     # Optionally assert UploadTaskMetadata if it’s returned
     # assert isinstance(result[1], UploadTaskMetadata)
     assert result.monitoring_tubes[0].tube_number == 2
+
+
+def test_build_gmw_construction_does_not_modify_input():
+    gmw_data = {**BASE_GMW_DATA, "bro_id": "GMW000000012345"}
+    tube_data = [{**BASE_TUBE_DATA[0], "geo_ohm_cables": []}]
+    result = build_gmw_construction(gmw_data, tube_data)
+    assert result.object_id_accountable_party == "GMW000000012345"
+    assert result.monitoring_tubes[0].geo_ohm_cables is None
+    assert gmw_data == {**BASE_GMW_DATA, "bro_id": "GMW000000012345"}
+    assert tube_data[0]["geo_ohm_cables"] == []
+
+
+def test_format_gmw_construction_validates_nested_models_from_bytes():
+    cable = {
+        "cable_number": 1,
+        "electrodes": [
+            {
+                "electrode_number": 1,
+                "electrode_packing_material": "gravel",
+                "electrode_status": "active",
+                "electrode_position": 10.0,
+            }
+        ],
+    }
+    tube = {**BASE_TUBE_DATA[0], "gmw_bro_id": "GMW000000012345", "geo_ohm_cables": [cable]}
+    mock_brostar = MagicMock()
+    mock_brostar.get.side_effect = [
+        page_response({"count": 1, "results": [BASE_GMW_DATA]}),
+        page_response({"count": 1, "results": [tube]}),
+    ]
+
+    result = PayloadFormatter(brostar=mock_brostar).format_gmw_construction("GMW000000012345")
+
+    electrode = result.monitoring_tubes[0].geo_ohm_cables[0].electrodes[0]
+    assert isinstance(electrode, Electrode)
+    assert electrode.electrode_packing_material == "gravel"
+    assert result.number_of_monitoring_tubes == 1
+
+
+def test_format_gmw_construction_not_found():
+    mock_brostar = MagicMock()
+    mock_brostar.get.return_value = page_response({"count": 0, "results": []})
+    with pytest.raises(ValueError):
+        PayloadFormatter(brostar=mock_brostar).format_gmw_construction("GMW000000012345")
+
+
+def test_format_gmw_construction_from_mirror():
+    brostar = BROSTARConnection(token="dummy-token")
+    mirror = BROSTARMirror(brostar)
+    gmw = {**BASE_GMW_DATA, "uuid": "gmw-1", "bro_id": "GMW000000000001"}
+    tubes = [
+        {**BASE_TUBE_DATA[0], "uuid": f"tube-{number}", "gmw_bro_id": bro_id, "tube_number": number}
+        for bro_id, number in [("GMW000000000001", 1), ("GMW000000000002", 2)]
+    ]
+    with requests_mock.Mocker() as m:
+        m.get("https://staging.brostar.nl/api/gmw/gmws/", json={"next": None, "results": [gmw]})
+        m.get(
+            "https://staging.brostar.nl/api/gmw/monitoringtubes/",
+            json={"next": None, "results": tubes},
+        )
+        mirror.sync("gmw/gmws")
+        mirror.sync("gmw/monitoringtubes")
+
+    # No request is mocked anymore, so everything has to come from the mirror
+    with requests_mock.Mocker():
+        result = PayloadFormatter(brostar, mirror=mirror).format_gmw_construction("GMW000000000001")
+
+    assert result.object_id_accountable_party == "GMW000000000001"
+    assert [tube.tube_number for tube in result.monitoring_tubes] == [1]
+    with pytest.raises(ValueError):
+        PayloadFormatter(brostar, mirror=mirror).format_gmw_construction("GMW000000000002")
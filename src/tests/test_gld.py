@@ -0,0 +1,315 @@
+import datetime
+import re
+
+import polars as pl
+import pytest
+import requests_mock
+
+from ..brostar_api_requests.connection import BROSTARConnection
+from ..brostar_api_requests.gld import (
+    GLDAdditionIndex,
+    GLDRelocation,
+    assign_procedures,
+    relocation_payloads,
+    report_procedure_coverage,
+)
+from ..brostar_api_requests.mirror import BROSTARMirror
+
+
+def day(n: int) -> datetime.datetime:
+    return datetime.datetime(2024, 1, n)
+
+
+@pytest.fixture
+def procedures_df() -> pl.DataFrame:
+    # Deliberately unsorted, the second window overlaps the first
+    return pl.DataFrame(
+        {
+            "start_datetime": [day(4), day(2)],
+            "eind_datetime": [day(6), day(5)],
+        }
+    )
+
+
+def test_assign_procedures(procedures_df: pl.DataFrame):
+    events_df = pl.DataFrame(
+        {"datetime": [day(n) for n in (9, 1, 2, 3, 5, 6, 8)], "value": [1.0] * 7}
+    )
+
+    df = assign_procedures(events_df, procedures_df)
+
+    assert df["datetime"].to_list() == [day(n) for n in (1, 2, 3, 5, 6, 8, 9)]
+    assert df["procedure"].to_list() == [None, 1, 1, 0, 0, None, None]
+    assert df["overlapping"].to_list() == [False, False, False, True, False, False, False]
+
+
+def test_assign_procedures_nested_windows():
+    # B = [3, 5] lies inside A = [1, 10]
+    procedures_df = pl.DataFrame(
+        {"start_datetime": [day(1), day(3)], "eind_datetime": [day(10), day(5)]}
+    )
+    events_df = pl.DataFrame({"datetime": [day(n) for n in (2, 4, 7, 11)], "value": [1.0] * 4})
+
+    df = assign_procedures(events_df, procedures_df)
+
+    assert df["procedure"].to_list() == [0, 1, 0, None]
+    assert df["overlapping"].to_list() == [False, True, True, False]
+
+
+def test_report_procedure_coverage(procedures_df: pl.DataFrame):
+    events_df = pl.DataFrame({"datetime": [day(1), day(3), day(5)], "value": [1.0, 2.0, 3.0]})
+
+    report = report_procedure_coverage(assign_procedures(events_df, procedures_df))
+
+    assert report["unassigned"]["datetime"].to_list() == [day(1)]
+    assert report["overlapping"]["datetime"].to_list() == [day(5)]
+
+
+UPLOADTASKS_URL = "https://staging.brostar.nl/api/uploadtasks/"
+
+
+def addition_task(uuid: str, begin: str, end: str, updated_at: str) -> dict:
+    return {
+        "uuid": uuid,
+        "bro_id": "GLD000000012345",
+        "updated_at": updated_at,
+        "metadata": {"broId": "GLD000000012345", "qualityRegime": "IMBRO"},
+        "sourcedocument_data": {
+            "observationType": "reguliereMeting",
+            "beginPosition": begin,
+            "endPosition": end,
+        },
+    }
+
+
+@pytest.fixture
+def addition_index() -> GLDAdditionIndex:
+    index = GLDAdditionIndex(BROSTARConnection(token="dummy-token"))
+    with requests_mock.Mocker() as m:
+        m.get(
+            UPLOADTASKS_URL,
+            json={
+                "next": f"{UPLOADTASKS_URL}?page=2",
+                "results": [addition_task("a", "2024-01-10", "2024-01-20", "2024-02-01T00:00:00Z")],
+            },
+        )
+        m.get(
+            f"{UPLOADTASKS_URL}?page=2",
+            json={
+                "next": None,
+                "results": [addition_task("b", "2024-01-01", "2024-01-05", "2024-02-02T00:00:00Z")],
+            },
+        )
+        index.refresh()
+    return index
+
+
+def test_addition_index_refresh(addition_index: GLDAdditionIndex):
+    assert len(addition_index) == 2
+    assert addition_index.updated_at == "2024-02-02T00:00:00Z"
+    assert addition_index.periods[("GLD000000012345", "reguliereMeting", "IMBRO")] == [
+        (datetime.date(2024, 1, 1), datetime.date(2024, 1, 5)),
+        (datetime.date(2024, 1, 10), datetime.date(2024, 1, 20)),
+    ]
+
+    with requests_mock.Mocker() as m:
+        m.get(
+            UPLOADTASKS_URL,
+            json={
+                "next": None,
+                "results": [addition_task("b", "2024-01-01", "2024-01-05", "2024-02-02T00:00:00Z")],
+            },
+        )
+        assert addition_index.refresh() == 0
+        assert m.last_request.qs["updated_at__gt"] == ["2024-02-02t00:00:00z"]
+
+
+def test_addition_index_drops_deleted_additions():
+    index = GLDAdditionIndex(BROSTARConnection(token="dummy-token"))
+    key = ("GLD000000012345", "reguliereMeting", "IMBRO")
+    delete = {
+        **addition_task("c", "2024-01-10", "2024-01-20", "2024-02-03T00:00:00Z"),
+        "request_type": "delete",
+    }
+    # A deletion that is paged before the registration it deletes
+    index._add_task(delete)
+    index._add_task(addition_task("a", "2024-01-10", "2024-01-20", "2024-02-01T00:00:00Z"))
+    index._add_task(addition_task("b", "2024-01-01", "2024-01-05", "2024-02-02T00:00:00Z"))
+
+    assert index.periods[key] == [(datetime.date(2024, 1, 1), datetime.date(2024, 1, 5))]
+
+    # A deletion after its registration
+    index._add_task(
+        {
+            **delete,
+            "uuid": "d",
+            "sourcedocument_data": {
+                "observationType": "reguliereMeting",
+                "beginPosition": "2024-01-01",
+                "endPosition": "2024-01-05",
+            },
+        }
+    )
+    assert index.periods[key] == []
+
+
+def test_addition_index_cursor_moves_without_positions():
+    index = GLDAdditionIndex(BROSTARConnection(token="dummy-token"))
+    index._add_task({"uuid": "a", "updated_at": "2024-03-01T00:00:00Z"})
+
+    assert index.updated_at == "2024-03-01T00:00:00Z"
+
+
+def test_addition_index_overlaps(addition_index: GLDAdditionIndex):
+    key = ("GLD000000012345", "reguliereMeting", "IMBRO")
+    assert addition_index.overlaps(*key, "2024-01-15", "2024-01-25") == [
+        (datetime.date(2024, 1, 10), datetime.date(2024, 1, 20))
+    ]
+    # Sharing a boundary day is allowed
+    assert addition_index.overlaps(*key, "2024-01-20", "2024-01-25") == []
+    other_type = ("GLD000000012345", "controlemeting", "IMBRO")
+    assert addition_index.overlaps(*other_type, "2024-01-15", "2024-01-25") == []
+
+
+def test_addition_index_trim(addition_index: GLDAdditionIndex):
+    events_df = pl.DataFrame(
+        {"datetime": [datetime.datetime(2024, 1, n, 12) for n in (3, 5, 8, 10, 15, 20, 25)]}
+    )
+
+    trimmed = addition_index.trim(events_df, "GLD000000012345", "reguliereMeting", "IMBRO")
+
+    assert [dt.day for dt in trimmed["datetime"]] == [5, 8, 10, 20, 25]
+    assert trimmed.columns == ["datetime"]
+
+
+def test_addition_index_trim_keeps_boundary_days():
+    index = GLDAdditionIndex(BROSTARConnection(token="dummy-token"))
+    key = ("GLD000000012345", "reguliereMeting", "IMBRO")
+    index.add(*key, "2024-01-10T08:00:00+01:00", "2024-01-20T08:00:00+01:00")
+    events_df = pl.DataFrame(
+        {
+            "datetime": [
+                datetime.datetime(2024, 1, 10, 6),
+                datetime.datetime(2024, 1, 10, 12),
+                datetime.datetime(2024, 1, 11, 0),
+                datetime.datetime(2024, 1, 20, 6),
+                datetime.datetime(2024, 1, 20, 12),
+            ]
+        }
+    )
+
+    trimmed = index.trim(events_df, *key)
+
+    # Periods have day resolution, so every event on a boundary day is sent again
+    assert trimmed["datetime"].dt.day().to_list() == [10, 10, 20, 20]
+
+
+def test_addition_index_from_mirror():
+    brostar = BROSTARConnection(token="dummy-token")
+    mirror = BROSTARMirror(brostar)
+    with requests_mock.Mocker() as m:
+        m.get(
+            UPLOADTASKS_URL,
+            json={
+                "next": None,
+                "results": [
+                    {
+                        **addition_task("a", "2024-01-10", "2024-01-20", "2024-02-01T00:00:00Z"),
+                        "status": "COMPLETED",
+                        "registration_type": "GLD_Addition",
+                    }
+                ],
+            },
+        )
+        assert GLDAdditionIndex(brostar, mirror=mirror).refresh() == 1
+
+        # A new index on the same mirror only fetches what changed since
+        index = GLDAdditionIndex(brostar, mirror=mirror)
+        assert index.refresh() == 1
+        assert m.last_request.qs["updated_at__gt"] == ["2024-02-01t00:00:00z"]
+        assert m.last_request.qs["status"] == ["completed"]
+    assert index.overlaps("GLD000000012345", "reguliereMeting", "IMBRO", "2024-01-15", "2024-01-16")
+
+
+def test_relocation_payloads():
+    task = {
+        "uuid": "a1",
+        "status": "COMPLETED",
+        "bro_id": "GLD000000000001",
+        "metadata": {"broId": "GLD000000000001", "requestReference": "GLD000000000001: IMBRO"},
+    }
+
+    delete, register = relocation_payloads(task, "GLD000000000001", "GLD000000000009")
+
+    assert "uuid" not in delete
+    assert delete["request_type"] == "delete"
+    assert delete["metadata"]["correctionReason"] == "eigenCorrectie"
+    assert register["request_type"] == "registration"
+    assert register["metadata"] == {
+        "broId": "GLD000000000009",
+        "requestReference": "GLD000000000009: IMBRO",
+    }
+    assert task["metadata"]["broId"] == "GLD000000000001"
+
+
+def test_relocation_keeps_order_per_target(monkeypatch):
+    brostar = BROSTARConnection(token="dummy-token")
+    additions = {
+        "GLD000000000001": [[{"uuid": "a1"}], [{"uuid": "a2"}]],
+        "GLD000000000002": [[{"uuid": "b1"}]],
+    }
+
+    def uploadtasks(request, context):
+        match = re.search(r"uploadtasks/(\w+)$", request.path)
+        if match:
+            uuid = match.group(1)
+            bro_id = "GLD000000000001" if uuid.startswith("a") else "GLD000000000002"
+            return {
+                "uuid": uuid,
+                "metadata": {"broId": bro_id, "requestReference": f"{bro_id} {uuid}"},
+            }
+        pages = additions[request.qs["bro_id"][0].upper()]
+        page = int(request.qs.get("page", ["0"])[0])
+        if page == 0:
+            assert request.qs["status"] == ["completed"]
+            assert request.qs["request_type"] == ["registration"]
+        next_url = None
+        if page + 1 < len(pages):
+            next_url = f"{UPLOADTASKS_URL}?bro_id={request.qs['bro_id'][0]}&page={page + 1}"
+        return {"next": next_url, "results": pages[page]}
+
+    posted = []
+
+    def post(request, context):
+        posted.append(request.json())
+        return {"uuid": f"new-{len(posted)}"}
+
+    class Completed:
+        def json(self):
+            return {"status": "COMPLETED"}
+
+    monkeypatch.setattr(brostar, "await_completed", lambda uuid: Completed())
+
+    with requests_mock.Mocker() as m:
+        m.get(re.compile(f"{UPLOADTASKS_URL}.*"), json=uploadtasks)
+        m.post(UPLOADTASKS_URL, json=post)
+
+        relocation = GLDRelocation(brostar)
+        assert (
+            relocation.plan(
+                {"GLD000000000001": "GLD000000000009", "GLD000000000002": "GLD000000000009"}
+            )
+            == 3
+        )
+        results = relocation.run()
+
+    assert [result["task"] for result in results] == ["a1", "a2", "b1"]
+    assert all(result["status"] == "COMPLETED" for result in results)
+    assert [(p["request_type"], p["metadata"]["requestReference"]) for p in posted] == [
+        ("delete", "GLD000000000001 a1"),
+        ("registration", "GLD000000000009 a1"),
+        ("delete", "GLD000000000001 a2"),
+        ("registration", "GLD000000000009 a2"),
+        ("delete", "GLD000000000002 b1"),
+        ("registration", "GLD000000000009 b1"),
+    ]
@@ -0,0 +1,165 @@
+import pytest
+
+from ..brostar_api_requests.gmw import (
+    construction_changes,
+    diff_gmw_construction,
+    gmw_event_upload_tasks,
+)
+from ..brostar_api_requests.upload_models import GMWConstruction, UploadTaskMetadata
+
+
+def _tube(tube_number: int, **fields) -> dict:
+    return {
+        "tube_number": tube_number,
+        "tube_type": "standaardbuis",
+        "artesian_well_cap_present": "nee",
+        "sediment_sump_present": "nee",
+        "tube_status": "gebruiksklaar",
+        "tube_top_position": 10.0,
+        "tube_top_positioning_method": "RTKGPS2tot4cm",
+        "tube_packing_material": "bentoniet",
+        "tube_material": "pvc",
+        "glue": "geen",
+        "screen_length": 1.0,
+        "sock_material": "geen",
+        "plain_tube_part_length": 5.0,
+        **fields,
+    }
+
+
+@pytest.fixture
+def current() -> GMWConstruction:
+    return GMWConstruction(
+        object_id_accountable_party="GMW000000012345",
+        delivery_context="publiekeTaak",
+        construction_standard="NEN5766",
+        initial_function="stand",
+        number_of_monitoring_tubes=2,
+        ground_level_stable="ja",
+        owner="12345678",
+        well_head_protector="koker",
+        well_construction_date="2020-01-01",
+        delivered_location="155000 463000",
+        horizontal_positioning_method="RTKGPS0tot2cm",
+        local_vertical_reference_point="NAP",
+        offset=0.0,
+        vertical_datum="NAP",
+        ground_level_position=9.0,
+        ground_level_positioning_method="RTKGPS0tot4cm",
+        monitoring_tubes=[_tube(1), _tube(2)],
+    )
+
+
+def test_diff_unchanged_gmw_has_no_events(current):
+    assert diff_gmw_construction(current, current.model_copy(deep=True), "2025-01-01") == []
+
+
+def test_diff_tube_status_only(current):
+    desired = current.model_copy(deep=True)
+    desired.monitoring_tubes[1].tube_status = "nietBruikbaar"
+
+    events = diff_gmw_construction(current, desired, "2025-01-01")
+
+    assert [registration_type for registration_type, _ in events] == ["GMW_TubeStatus"]
+    event = events[0][1]
+    assert event.event_date == "2025-01-01"
+    assert [(tube.tube_number, tube.tube_status) for tube in event.monitoring_tubes] == [
+        (2, "nietBruikbaar")
+    ]
+
+
+def test_diff_owner_and_positions(current):
+    desired = current.model_copy(deep=True)
+    desired.owner = "87654321"
+    desired.monitoring_tubes[0].tube_top_position = 10.2
+
+    events = diff_gmw_construction(current, desired, "2025-01-01")
+
+    assert [registration_type for registration_type, _ in events] == [
+        "GMW_Owner",
+        "GMW_Positions",
+    ]
+    positions = events[1][1]
+    assert [tube.tube_number for tube in positions.monitoring_tubes] == [1]
+    assert positions.ground_level_position == 9.0
+
+
+def test_diff_ground_level_only(current):
+    desired = current.model_copy(deep=True)
+    desired.ground_level_position = 9.1
+
+    events = diff_gmw_construction(current, desired, "2025-01-01")
+
+    assert [registration_type for registration_type, _ in events] == ["GMW_GroundLevel"]
+
+
+def test_diff_lengthening_carries_well_head_protector(current):
+    desired = current.model_copy(deep=True)
+    desired.well_head_protector = "pot"
+    desired.monitoring_tubes[0].plain_tube_part_length = 5.5
+    desired.monitoring_tubes[0].tube_top_position = 10.5
+    desired.monitoring_tubes[1].plain_tube_part_length = 4.5
+    desired.monitoring_tubes[1].tube_top_position = 9.5
+
+    events = diff_gmw_construction(current, desired, "2025-01-01")
+
+    assert [registration_type for registration_type, _ in events] == [
+        "GMW_Lengthening",
+        "GMW_Shortening",
+    ]
+    assert events[0][1].well_head_protector == "pot"
+    assert events[1][1].well_head_protector is None
+
+
+def test_diff_well_head_protector_only(current):
+    desired = current.model_copy(deep=True)
+    desired.well_head_protector = "pot"
+
+    events = diff_gmw_construction(current, desired, "2025-01-01")
+
+    assert [registration_type for registration_type, _ in events] == ["GMW_WellHeadProtector"]
+
+
+def test_diff_construction_change_raises(current):
+    desired = current.model_copy(deep=True)
+    desired.well_construction_date = "2021-01-01"
+    desired.monitoring_tubes[0].screen_length = 2.0
+
+    assert construction_changes(current, desired) == [
+        "well_construction_date",
+        "monitoring_tubes[1].screen_length",
+    ]
+    with pytest.raises(ValueError, match="well_construction_date"):
+        diff_gmw_construction(current, desired, "2025-01-01")
+
+
+def test_diff_removed_tube_raises(current):
+    desired = current.model_copy(deep=True)
+    desired.monitoring_tubes = desired.monitoring_tubes[:1]
+
+    with pytest.raises(ValueError, match="monitoring_tubes"):
+        diff_gmw_construction(current, desired, "2025-01-01")
+
+
+def test_gmw_event_upload_tasks(current):
+    desired = current.model_copy(deep=True)
+    desired.owner = "87654321"
+    desired.monitoring_tubes[0].tube_status = "nietBruikbaar"
+    metadata = UploadTaskMetadata(
+        request_reference="test", quality_regime="IMBRO", bro_id="GMW000000012345"
+    )
+
+    tasks = gmw_event_upload_tasks(
+        diff_gmw_construction(current, desired, "2025-01-01"), metadata, project_number="1"
+    )
+
+    payloads = [task.model_dump(mode="json", by_alias=True) for task in tasks]
+    assert [payload["registration_type"] for payload in payloads] == [
+        "GMW_Owner",
+        "GMW_TubeStatus",
+    ]
+    assert payloads[0]["request_type"] == "registration"
+    assert payloads[0]["sourcedocument_data"] == {"eventDate": "2025-01-01", "owner": "87654321"}
+    assert payloads[1]["sourcedocument_data"]["monitoringTubes"] == [
+        {"tubeNumber": 1, "tubeStatus": "nietBruikbaar"}
+    ]
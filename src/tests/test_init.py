@@ -0,0 +1,55 @@
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from .. import brostar_api_requests
+from ..brostar_api_requests._lazy import lazy_import
+
+SRC = Path(__file__).resolve().parents[1]
+
+
+def test_lazy_attribute_access():
+    from ..brostar_api_requests.connection import BROSTARConnection
+
+    assert brostar_api_requests.BROSTARConnection is BROSTARConnection
+    assert "TimeValueSeries" in dir(brostar_api_requests)
+
+
+def test_unknown_attribute():
+    with pytest.raises(AttributeError):
+        brostar_api_requests.DoesNotExist  # noqa: B018
+
+
+def test_package_import_does_not_load_heavy_modules():
+    statement = (
+        "import sys, brostar_api_requests; "
+        "print(sorted(m for m in ('polars', 'numpy', 'requests', 'pydantic') if m in sys.modules))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", statement], capture_output=True, text=True, check=True, cwd=SRC
+    )
+    assert output.stdout.strip() == "[]"
+
+
+def test_lazy_import_first_access_from_threads(tmp_path, monkeypatch):
+    # A slow import widens the window in which several threads see an unloaded module
+    (tmp_path / "slow_lazy_module.py").write_text("import time\ntime.sleep(0.2)\nVALUE = 42\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, "slow_lazy_module", raising=False)
+
+    module = lazy_import("slow_lazy_module")
+    assert "slow_lazy_module" not in sys.modules
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        values = list(executor.map(lambda _: module.VALUE, range(8)))
+
+    assert values == [42] * 8
+    assert module.VALUE == sys.modules["slow_lazy_module"].VALUE
+
+
+def test_lazy_import_missing_module():
+    with pytest.raises(ModuleNotFoundError):
+        lazy_import("does_not_exist_anywhere")
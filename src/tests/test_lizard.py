@@ -0,0 +1,210 @@
+import datetime
+import json
+import time
+
+import polars as pl
+import pytest
+import requests_mock
+
+from ..brostar_api_requests.connection import LizardConnection
+from ..brostar_api_requests.lizard import (
+    LizardEventWriter,
+    LizardLocationIndex,
+    fetch_events,
+    time_windows,
+)
+
+LOCATIONS_URL = "https://vitens.lizard.net/api/v4/locations/"
+
+
+def location(code: str, bro: dict, last_modified: str = "2024-01-01T00:00:00Z") -> dict:
+    return {
+        "url": f"{LOCATIONS_URL}{code}/",
+        "code": code,
+        "last_modified": last_modified,
+        "extra_metadata": {"bro": bro, "other": "kept"},
+    }
+
+
+@pytest.fixture
+def lizard() -> LizardConnection:
+    return LizardConnection(token="dummy-token", tenant="vitens")
+
+
+@pytest.fixture
+def index(lizard: LizardConnection) -> LizardLocationIndex:
+    with requests_mock.Mocker() as m:
+        m.get(
+            LOCATIONS_URL,
+            json={
+                "next": None,
+                "results": [
+                    location("A-001", {"broid_gld_imbro": "GLD000000000001"}),
+                    location("B-001", {"broid_gld_imbro": None}, "2024-02-01T00:00:00Z"),
+                ],
+            },
+        )
+        index = LizardLocationIndex(lizard)
+        index.refresh()
+    return index
+
+
+def test_index_lookup(index: LizardLocationIndex):
+    assert len(index) == 2
+    assert index.get("B-001")["code"] == "B-001"
+    assert index.get_by_bro_id("GLD000000000001")["code"] == "A-001"
+    assert index.get_by_bro_id("GLD000000000002") is None
+    assert index.last_modified == "2024-02-01T00:00:00Z"
+
+
+def test_index_incremental_refresh(index: LizardLocationIndex):
+    with requests_mock.Mocker() as m:
+        m.get(
+            LOCATIONS_URL,
+            json={
+                "next": None,
+                "results": [
+                    location(
+                        "A-001", {"broid_gld_imbro": "GLD000000000003"}, "2024-03-01T00:00:00Z"
+                    )
+                ],
+            },
+        )
+        assert index.refresh() == 1
+        assert m.last_request.qs["last_modified__gt"] == ["2024-02-01t00:00:00z"]
+
+    assert index.get_by_bro_id("GLD000000000001") is None
+    assert index.get_by_bro_id("GLD000000000003")["code"] == "A-001"
+
+
+def test_update_bro_ids_only_patches_changes(index: LizardLocationIndex):
+    with requests_mock.Mocker() as m:
+        m.patch(f"{LOCATIONS_URL}B-001/", json={"code": "B-001"})
+        patched = index.update_bro_ids(
+            {
+                "A-001": {"broid_gld_imbro": "GLD000000000001"},
+                "B-001": {"broid_gld_imbro": "GLD000000000002"},
+                "C-001": {"broid_gld_imbro": "GLD000000000004"},
+            }
+        )
+
+        assert patched == 1
+        assert m.call_count == 1
+        body = json.loads(m.last_request.body)
+        assert body == {
+            "extra_metadata": {"bro": {"broid_gld_imbro": "GLD000000000002"}, "other": "kept"}
+        }
+
+    assert index.get_by_bro_id("GLD000000000002")["code"] == "B-001"
+
+
+def test_time_windows():
+    start = datetime.datetime(2024, 1, 1, tzinfo=datetime.UTC)
+    windows = time_windows(start, start + datetime.timedelta(days=10), datetime.timedelta(days=4))
+    assert [(b - a).days for a, b in windows] == [4, 4, 2]
+    assert windows[0][1] == windows[1][0]
+
+
+def test_fetch_events_in_windows(lizard: LizardConnection):
+    timeseries = {
+        "url": "https://vitens.lizard.net/api/v4/timeseries/abc/",
+        "start": "2024-01-01T00:00:00Z",
+        "end": "2024-01-03T00:00:00Z",
+    }
+    events_url = f"{timeseries['url']}events/"
+
+    def events(request, context):
+        if request.qs.get("page") == ["2"]:
+            return {"next": None, "results": [{"time": "2024-01-01T12:00:00Z", "value": 2.0}]}
+        if request.qs["time__gte"] == ["2024-01-01t00:00:00z"]:
+            return {
+                "next": f"{events_url}?page=2",
+                "results": [{"time": "2024-01-01T00:00:00Z", "value": 1.0, "flag": None}],
+            }
+        if request.qs["time__gte"] == ["2024-01-02t00:00:00z"]:
+            return {"next": None, "results": [{"time": "2024-01-03T00:00:00Z", "value": 3.0}]}
+        return {"next": None, "results": []}
+
+    with requests_mock.Mocker() as m:
+        m.get(events_url, json=events)
+        df = fetch_events(
+            lizard, timeseries, window=datetime.timedelta(days=1), params={"validation_code!": "V"}
+        )
+
+        assert m.call_count == 4
+        window_requests = [r for r in m.request_history if "time__gte" in r.qs]
+        assert len(window_requests) == 3
+        assert all(r.qs["validation_code!"] == ["v"] for r in window_requests)
+
+    assert df["time"].to_list() == [
+        "2024-01-01T00:00:00Z",
+        "2024-01-01T12:00:00Z",
+        "2024-01-03T00:00:00Z",
+    ]
+    assert df["value"].to_list() == [1.0, 2.0, 3.0]
+
+
+def test_fetch_events_empty(lizard: LizardConnection):
+    df = fetch_events(lizard, {"url": "https://vitens.lizard.net/api/v4/timeseries/abc/"})
+    assert df.columns == ["time", "value"]
+    assert df.is_empty()
+
+
+def test_event_writer_posts_batches(lizard: LizardConnection):
+    events_url = "https://vitens.lizard.net/api/v4/timeseries/abc/events/"
+    df = pl.DataFrame(
+        {
+            "time": [f"2024-01-0{i}T00:00:00Z" for i in range(1, 6)],
+            "value": [1.0, 2.0, 3.0, 4.0, 5.0],
+            "comment": ["a", "b", "c", "d", "e"],
+        }
+    )
+
+    with requests_mock.Mocker() as m:
+        m.post(events_url, status_code=201)
+        with LizardEventWriter(lizard, batch_size=2) as writer:
+            writer.submit("https://vitens.lizard.net/api/v4/timeseries/abc/", df)
+
+        assert m.call_count == 3
+        bodies = [request.json() for request in m.request_history]
+
+    assert writer.posted == 5
+    assert sorted(event["time"] for body in bodies for event in body) == df["time"].to_list()
+    assert all(
+        event.keys() == {"time", "value", "comment", "validation_code"}
+        for body in bodies
+        for event in body
+    )
+    assert sorted(event["value"] for body in bodies for event in body) == df["value"].to_list()
+    assert all(event["validation_code"] == "V" for body in bodies for event in body)
+
+
+def test_event_writer_retries_failed_batches(lizard: LizardConnection):
+    events_url = "https://vitens.lizard.net/api/v4/timeseries/abc/events/"
+    df = pl.DataFrame({"time": ["2024-01-01T00:00:00Z"], "value": [1.0]})
+
+    with requests_mock.Mocker() as m:
+        m.post(events_url, [{"status_code": 400}, {"status_code": 201}])
+        writer = LizardEventWriter(lizard, backoff_factor=0)
+        writer.submit("https://vitens.lizard.net/api/v4/timeseries/abc/", df)
+        assert writer.close() == 0
+
+        assert m.call_count == 2
+    assert writer.posted == 1
+
+
+def test_event_writer_gives_up_after_max_retries(lizard: LizardConnection, monkeypatch):
+    events_url = "https://vitens.lizard.net/api/v4/timeseries/abc/events/"
+    df = pl.DataFrame({"time": ["2024-01-01T00:00:00Z"], "value": [1.0]})
+    delays = []
+    monkeypatch.setattr(time, "sleep", delays.append)
+
+    with requests_mock.Mocker() as m:
+        m.post(events_url, status_code=400)
+        writer = LizardEventWriter(lizard, max_retries=2, backoff_factor=0.5)
+        writer.submit("https://vitens.lizard.net/api/v4/timeseries/abc/", df)
+        assert writer.close() == 1
+
+        assert m.call_count == 3
+    assert writer.posted == 0
+    assert delays == [0.5, 1.0]
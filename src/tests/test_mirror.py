@@ -0,0 +1,99 @@
+import pytest
+import requests_mock
+
+from ..brostar_api_requests.connection import BROSTARConnection
+from ..brostar_api_requests.mirror import BROSTARMirror
+
+GMWS_URL = "https://staging.brostar.nl/api/gmw/gmws/"
+UPLOADTASKS_URL = "https://staging.brostar.nl/api/uploadtasks/"
+
+
+def gmw(uuid: str, bro_id: str, object_id: str, updated_at: str) -> dict:
+    return {
+        "uuid": uuid,
+        "bro_id": bro_id,
+        "object_id_accountable_party": object_id,
+        "nitg_code": None,
+        "updated_at": updated_at,
+    }
+
+
+@pytest.fixture
+def mirror() -> BROSTARMirror:
+    mirror = BROSTARMirror(BROSTARConnection(token="dummy-token"))
+    with requests_mock.Mocker() as m:
+        m.get(
+            GMWS_URL,
+            json={
+                "next": f"{GMWS_URL}?page=2",
+                "results": [gmw("1", "GMW000000000001", "PUT-1", "2024-01-01T00:00:00Z")],
+            },
+        )
+        m.get(
+            f"{GMWS_URL}?page=2",
+            json={
+                "next": None,
+                "results": [gmw("2", "GMW000000000002", "PUT-2", "2024-01-02T00:00:00Z")],
+            },
+        )
+        assert mirror.sync("gmw/gmws") == 2
+    return mirror
+
+
+def test_mirror_lookups(mirror: BROSTARMirror):
+    assert len(mirror.all("gmw/gmws")) == 2
+    assert mirror.get("gmw/gmws", "1")["bro_id"] == "GMW000000000001"
+    assert mirror.get("gmw/gmws", "3") is None
+    assert [r["uuid"] for r in mirror.get_by_bro_id("gmw/gmws", "GMW000000000002")] == ["2"]
+    assert [r["uuid"] for r in mirror.get_by_object_id("gmw/gmws", "PUT-1")] == ["1"]
+    assert [r["uuid"] for r in mirror.filter("gmw/gmws", object_id_accountable_party="PUT-2")] == [
+        "2"
+    ]
+    assert mirror.all("gmw/monitoringtubes") == []
+
+
+def test_mirror_delta_sync(mirror: BROSTARMirror):
+    with requests_mock.Mocker() as m:
+        m.get(
+            GMWS_URL,
+            json={
+                "next": None,
+                "results": [gmw("1", "GMW000000000001", "PUT-1b", "2024-01-03T00:00:00Z")],
+            },
+        )
+        assert mirror.sync("gmw/gmws") == 1
+        assert m.last_request.qs["updated_at__gt"] == ["2024-01-02t00:00:00z"]
+
+    assert len(mirror.all("gmw/gmws")) == 2
+    assert mirror.get_by_object_id("gmw/gmws", "PUT-1") == []
+    assert mirror.get_by_object_id("gmw/gmws", "PUT-1b")[0]["uuid"] == "1"
+
+
+def test_mirror_sync_per_filter(mirror: BROSTARMirror):
+    task = {
+        "uuid": "t1",
+        "registration_type": "GLD_StartRegistration",
+        "created_at": "2024-01-05T00:00:00Z",
+        "metadata": {"broId": "GLD000000000001"},
+        "sourcedocument_data": {"objectIdAccountableParty": "PUT-1-1"},
+    }
+    params = {"registration_type": "GLD_StartRegistration"}
+    with requests_mock.Mocker() as m:
+        m.get(UPLOADTASKS_URL, json={"next": None, "results": [task]})
+        mirror.sync("uploadtasks", params=params)
+        assert "updated_at__gt" not in m.last_request.qs
+
+        mirror.sync("uploadtasks", params=params)
+        assert m.last_request.qs["updated_at__gt"] == ["2024-01-05t00:00:00z"]
+
+    assert mirror.get_by_bro_id("uploadtasks", "GLD000000000001")[0]["uuid"] == "t1"
+    assert mirror.get_by_object_id("uploadtasks", "PUT-1-1")[0]["uuid"] == "t1"
+
+
+def test_mirror_full_sync(mirror: BROSTARMirror):
+    with requests_mock.Mocker() as m:
+        m.get(GMWS_URL, json={"next": None, "results": []})
+        mirror.sync("gmw/gmws", full=True)
+        assert "updated_at__gt" not in m.last_request.qs
+
+    assert mirror.all("gmw/gmws") == []
@@ -0,0 +1,78 @@
+import io
+
+import pytest
+
+from ..brostar_api_requests.multipart import MultipartEncoder
+
+
+class NonSeekable(io.RawIOBase):
+    def __init__(self, data: bytes):
+        self._stream = io.BytesIO(data)
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        return self._stream.read(size)
+
+
+def test_encoder_reads_file_in_chunks():
+    data = b"x" * 1000
+    encoder = MultipartEncoder(
+        fields={"meta": "data"},
+        files={"lab_file": ("lab.csv", io.BytesIO(data), "text/csv")},
+        chunk_size=100,
+    )
+    chunks = list(encoder)
+    assert max(len(chunk) for chunk in chunks) <= 200
+    assert sum(len(chunk) for chunk in chunks) == encoder.len
+    assert b"".join(chunks).endswith(f"--{encoder.boundary}--\r\n".encode())
+
+
+def test_encoder_read_matches_iteration():
+    files = {"measurement_tvp_file": ("series.csv", io.BytesIO(b"a,b\n1,2"), "text/csv")}
+    encoder = MultipartEncoder(fields={"meta": "data"}, files=files)
+    body = b""
+    while block := encoder.read(7):
+        body += block
+    assert len(body) == encoder.len
+    assert encoder.bytes_read == encoder.len
+
+
+def test_encoder_unknown_length_for_non_seekable_file():
+    encoder = MultipartEncoder(files={"lab_file": NonSeekable(b"abc")})
+    assert encoder.len is None
+    body = encoder.read()
+    assert b'name="lab_file"; filename="lab_file"' in body
+    assert b"\r\n\r\nabc\r\n" in body
+
+
+def test_encoder_progress_callback():
+    progress = []
+    encoder = MultipartEncoder(
+        files={"lab_file": ("lab.csv", io.BytesIO(b"abc" * 10), "text/csv")},
+        chunk_size=8,
+        progress_callback=lambda sent, total: progress.append((sent, total)),
+    )
+    list(encoder)
+    assert progress[-1] == (encoder.len, encoder.len)
+    assert [sent for sent, _ in progress] == sorted(sent for sent, _ in progress)
+
+
+def test_encoder_rewinds_for_retries():
+    files = {"measurement_tvp_file": ("series.csv", io.BytesIO(b"a,b\n1,2"), "text/csv")}
+    encoder = MultipartEncoder(fields={"meta": "data"}, files=files)
+    first = encoder.read(10) + encoder.read()
+
+    assert encoder.tell() == encoder.len
+    assert encoder.seek(0) == 0
+    assert encoder.tell() == 0
+    assert encoder.read() == first
+
+
+def test_encoder_with_non_seekable_file_is_one_shot():
+    encoder = MultipartEncoder(files={"lab_file": NonSeekable(b"abc")})
+    encoder.read()
+
+    with pytest.raises(io.UnsupportedOperation):
+        encoder.seek(0)
@@ -0,0 +1,67 @@
+import json
+
+import pytest
+import requests
+import requests_mock
+
+from ..brostar_api_requests import response
+from ..brostar_api_requests.connection import BROSTARConnection
+from ..brostar_api_requests.response import BROSTARResponse, loads
+
+PAGE = {
+    "count": 2,
+    "next": "https://staging.brostar.nl/api/uploadtasks/?page=2",
+    "results": [{"uuid": "1"}, {"uuid": "2"}],
+}
+
+
+def test_loads():
+    assert loads(json.dumps(PAGE).encode()) == PAGE
+
+
+def test_response_parses_once(monkeypatch):
+    brostar = BROSTARConnection(token="dummy-token")
+    with requests_mock.Mocker() as m:
+        m.get("https://staging.brostar.nl/api/uploadtasks/", json=PAGE)
+        r = brostar.get("uploadtasks")
+
+    calls = []
+    monkeypatch.setattr(response, "loads", lambda content: calls.append(content) or PAGE)
+    assert isinstance(r, BROSTARResponse)
+    assert r.results == PAGE["results"]
+    assert r.next == PAGE["next"]
+    assert r.count == 2
+    assert r.json() is r.json()
+    assert len(calls) == 1
+
+
+def test_response_delegates_to_requests_response():
+    brostar = BROSTARConnection(token="dummy-token")
+    with requests_mock.Mocker() as m:
+        m.get("https://staging.brostar.nl/api/uploadtasks/abc", status_code=404, json={})
+        r = brostar.get_detail("uploadtasks", "abc")
+
+    assert r.status_code == 404
+    assert not r
+    assert r.results == []
+    assert r.next is None
+
+
+def test_response_invalid_json_raises_requests_error():
+    brostar = BROSTARConnection(token="dummy-token")
+    with requests_mock.Mocker() as m:
+        m.get("https://staging.brostar.nl/api/uploadtasks/", text="<html>Bad Gateway</html>")
+        r = brostar.get("uploadtasks")
+
+    with pytest.raises(requests.exceptions.JSONDecodeError):
+        r.json()
+
+
+def test_response_json_kwargs():
+    brostar = BROSTARConnection(token="dummy-token")
+    with requests_mock.Mocker() as m:
+        m.get("https://staging.brostar.nl/api/uploadtasks/", text='{"count": 1.5}')
+        r = brostar.get("uploadtasks")
+
+    assert r.json(parse_float=str) == {"count": "1.5"}
+    assert r.json() == {"count": 1.5}
@@ -0,0 +1,100 @@
+from pathlib import Path
+
+import pytest
+import requests_mock
+
+from ..brostar_api_requests.connection import BROSTARConnection
+from ..brostar_api_requests.statistics import UploadTaskStatistics
+
+UPLOADTASKS_URL = "https://staging.brostar.nl/api/uploadtasks/"
+
+
+def task(uuid: str, status: str, updated_at: str, **kwargs) -> dict:
+    return {
+        "uuid": uuid,
+        "bro_id": kwargs.get("bro_id", "GLD000000000001"),
+        "registration_type": kwargs.get("registration_type", "GLD_Addition"),
+        "request_type": "registration",
+        "status": status,
+        "created_at": updated_at,
+        "updated_at": updated_at,
+        "bro_errors": kwargs.get("bro_errors"),
+        "sourcedocument_data": {"timeValuePairsCount": kwargs.get("count")},
+    }
+
+
+TASKS = [
+    task("1", "COMPLETED", "2024-01-05T00:00:00Z", count=100),
+    task("2", "COMPLETED", "2024-02-05T00:00:00Z", count=50),
+    task("3", "COMPLETED", "2024-02-06T00:00:00Z", bro_id="GLD000000000002", count=10),
+    task("4", "FAILED", "2024-02-07T00:00:00Z", count=10, bro_errors=["Overlap"]),
+    task("5", "FAILED", "2024-02-08T00:00:00Z", registration_type="GMW_Construction"),
+]
+
+
+def pages(request, context) -> dict:
+    offset = int(request.qs["offset"][0])
+    limit = int(request.qs["limit"][0])
+    return {"count": len(TASKS), "results": TASKS[offset : offset + limit]}
+
+
+@pytest.fixture
+def statistics(tmp_path: Path) -> UploadTaskStatistics:
+    statistics = UploadTaskStatistics(
+        BROSTARConnection(token="dummy-token"), cache_path=tmp_path / "tasks.parquet", page_size=2
+    )
+    with requests_mock.Mocker() as m:
+        m.get(UPLOADTASKS_URL, json=pages)
+        assert statistics.refresh() == 5
+        assert m.call_count == 3
+    return statistics
+
+
+def test_events_delivered(statistics: UploadTaskStatistics):
+    per_gld = statistics.events_delivered_per_gld()
+    assert per_gld.rows() == [("GLD000000000001", 150, 2), ("GLD000000000002", 10, 1)]
+
+    per_month = statistics.events_delivered_per_month()
+    assert per_month.rows() == [("2024-01", 100), ("2024-02", 60)]
+
+
+def test_failures(statistics: UploadTaskStatistics):
+    assert statistics.tasks_per_status().rows() == [
+        ("GLD_Addition", "COMPLETED", 3),
+        ("GLD_Addition", "FAILED", 1),
+        ("GMW_Construction", "FAILED", 1),
+    ]
+    assert statistics.failure_rates().rows() == [
+        ("GMW_Construction", 1, 1, 1.0),
+        ("GLD_Addition", 4, 1, 0.25),
+    ]
+    assert statistics.failures_per_error().filter(registration_type="GLD_Addition").rows() == [
+        ("GLD_Addition", "Overlap", 1)
+    ]
+
+
+def test_incremental_refresh_from_cache(statistics: UploadTaskStatistics):
+    cached = UploadTaskStatistics(statistics.brostar, cache_path=statistics.cache_path)
+    assert cached.tasks.height == 5
+
+    updated = task("4", "COMPLETED", "2024-03-01T00:00:00Z", count=10)
+    with requests_mock.Mocker() as m:
+        m.get(UPLOADTASKS_URL, json={"count": 1, "results": [updated]})
+        assert cached.refresh() == 1
+        assert m.last_request.qs["updated_at__gt"] == ["2024-02-08t00:00:00z"]
+
+    assert cached.tasks.height == 5
+    assert cached.events_delivered_per_gld()["events"].to_list() == [160, 10]
+
+
+def test_refresh_sends_filters():
+    statistics = UploadTaskStatistics(
+        BROSTARConnection(token="dummy-token"),
+        filters={"status": "COMPLETED", "registration_type": "GLD_Addition"},
+    )
+    with requests_mock.Mocker() as m:
+        m.get(UPLOADTASKS_URL, json={"count": 1, "results": TASKS[:1]})
+        assert statistics.refresh() == 1
+
+        assert m.last_request.qs["status"] == ["completed"]
+        assert m.last_request.qs["registration_type"] == ["gld_addition"]
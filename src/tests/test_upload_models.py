@@ -1,12 +1,16 @@
 from datetime import datetime
-from typing import Literal
+from typing import Literal, get_args
 from uuid import UUID
 
+import numpy as np
+import polars as pl
 import pytest
 from pydantic import ValidationError
 
 # Assume your models are imported here, like:
+from ..brostar_api_requests.type_helpers import RegistrationTypeOptions
 from ..brostar_api_requests.upload_models import (
+    SOURCEDOCUMENT_MODELS,
     GLDAddition,
     GMWLengthening,
     GMWMaintainer,
@@ -14,8 +18,11 @@ from ..brostar_api_requests.upload_models import (
     MonitoringTubeLengthening,
     MonitoringTubePositions,
     TimeValuePair,
+    TimeValueSeries,
     UploadTask,
     UploadTaskMetadata,
+    list_adapter,
+    sourcedocument_adapter,
 )
 
 
@@ -140,13 +147,70 @@ def test_upload_task_valid():
     task = UploadTask(
         bro_domain="GMW",
         project_number="PN123",
-        registration_type="GMW_Construction",
+        registration_type="GMW_Owner",
         request_type="registration",
-        sourcedocument_data={"dummy": "data"},
+        sourcedocument_data={"eventDate": "2024-01-01", "owner": "12345678"},
         metadata=metadata,
     )
     assert task.bro_domain == "GMW"
     assert task.model_dump()["metadata"]["request_reference"] == "REQ123"
+    assert isinstance(task.sourcedocument_data, GMWOwner)
+    assert task.model_dump(by_alias=True)["sourcedocument_data"] == {
+        "eventDate": "2024-01-01",
+        "owner": "12345678",
+    }
+
+
+def test_upload_task_sourcedocument_must_match_registration_type():
+    metadata = UploadTaskMetadata(request_reference="REQ123", quality_regime="IMBRO")
+    with pytest.raises(ValidationError):
+        UploadTask(
+            bro_domain="GMW",
+            project_number="PN123",
+            registration_type="GMW_Construction",
+            request_type="registration",
+            sourcedocument_data={"dummy": "data"},
+            metadata=metadata,
+        )
+
+    with pytest.raises(ValidationError):
+        UploadTask(
+            bro_domain="GMW",
+            project_number="PN123",
+            registration_type="GMW_Maintainer",
+            request_type="registration",
+            sourcedocument_data=GMWOwner(event_date="2024-01-01", owner="12345678"),
+            metadata=metadata,
+        )
+
+
+def test_upload_task_logs_unknown_sourcedocument_fields(caplog):
+    task = UploadTask(
+        bro_domain="GMW",
+        project_number="PN123",
+        registration_type="GMW_Owner",
+        request_type="registration",
+        sourcedocument_data={"eventDate": "2024-01-01", "owner": "12345678", "newField": 1},
+        metadata=UploadTaskMetadata(request_reference="REQ123", quality_regime="IMBRO"),
+    )
+
+    assert task.sourcedocument_data.owner == "12345678"
+    assert "Ignoring unknown GMWOwner fields: newField" in caplog.text
+
+
+def test_upload_task_keeps_model_instance(gld_addition_factory):
+    gld = gld_addition_factory()
+    task = UploadTask(
+        bro_domain="GLD",
+        project_number="PN123",
+        registration_type="GLD_Addition",
+        request_type="registration",
+        sourcedocument_data=gld,
+        metadata=UploadTaskMetadata(request_reference="REQ123", quality_regime="IMBRO"),
+    )
+    assert task.sourcedocument_data is gld
+    dumped = task.model_dump(mode="json", by_alias=True)["sourcedocument_data"]
+    assert dumped["timeValuePairs"][0]["value"] == 10.0
 
 
 def test_upload_task_invalid_bro_domain():
@@ -223,3 +287,112 @@ def test_gld_addition_missing_required_field():
 def test_time_value_pair_missing_time():
     with pytest.raises(ValidationError):
         TimeValuePair(value=10.0)  # Missing 'time'
+
+
+@pytest.fixture
+def time_value_series() -> TimeValueSeries:
+    df = pl.DataFrame(
+        {
+            "time": [datetime(2024, 1, 1, 12, 0), datetime(2024, 7, 1, 12, 0)],
+            "value": [1.5, None],
+            "statusQualityControl": ["goedgekeurd", "afgekeurd"],
+            "censorReason": [None, "kleinerDanLimietwaarde"],
+        }
+    )
+    return TimeValueSeries.from_polars(df)
+
+
+def test_time_value_series_from_polars(time_value_series):
+    assert len(time_value_series) == 2
+    assert time_value_series.times.dtype == np.int64
+    assert np.isnan(time_value_series.values[1])
+    assert time_value_series.to_dicts() == [
+        {
+            "time": "2024-01-01T12:00:00+01:00",
+            "value": 1.5,
+            "statusQualityControl": "goedgekeurd",
+            "censorReason": None,
+            "censoringLimitvalue": None,
+        },
+        {
+            "time": "2024-07-01T12:00:00+02:00",
+            "value": None,
+            "statusQualityControl": "afgekeurd",
+            "censorReason": "kleinerDanLimietwaarde",
+            "censoringLimitvalue": None,
+        },
+    ]
+
+
+def test_time_value_series_from_polars_strings(time_value_series):
+    # As returned by fetch_events
+    df = pl.DataFrame(
+        {"time": ["2024-01-01T11:00:00Z", "2024-07-01T10:00:00Z"], "value": [1.5, None]}
+    )
+
+    series = TimeValueSeries.from_polars(df)
+
+    assert np.array_equal(series.times, time_value_series.times)
+    with pytest.raises(ValueError):
+        TimeValueSeries.from_polars(df.with_columns(time=pl.lit("yesterday")))
+    with pytest.raises(ValueError):
+        TimeValueSeries.from_polars(df.with_columns(time=pl.lit(1)))
+
+
+def test_time_value_series_to_polars_roundtrip(time_value_series):
+    df = time_value_series.to_polars()
+    assert df["time"].dtype == pl.Datetime("ms", "Europe/Amsterdam")
+    assert df["value"].null_count() == 1
+    roundtrip = TimeValueSeries.from_polars(df)
+    assert np.array_equal(roundtrip.times, time_value_series.times)
+    assert np.array_equal(roundtrip.censor_codes, time_value_series.censor_codes)
+
+
+def test_time_value_series_slicing_and_chunks():
+    series = TimeValueSeries(times=np.arange(10) * 1000, values=np.arange(10, dtype=float))
+    head = series[:4]
+    assert isinstance(head, TimeValueSeries)
+    assert np.shares_memory(head.values, series.values)
+    assert [len(chunk) for chunk in series.chunks(4)] == [4, 4, 2]
+    assert TimeValueSeries.concat(list(series.chunks(3))).values.tolist() == list(range(10))
+
+    pair = series[-1]
+    assert isinstance(pair, TimeValuePair)
+    assert pair.value == 9.0
+    assert pair.status_quality_control == "onbekend"
+
+
+def test_time_value_series_length_mismatch():
+    with pytest.raises(ValueError):
+        TimeValueSeries(times=[0, 1], values=[1.0])
+
+
+def test_gld_addition_accepts_time_value_series(time_value_series):
+    gld = GLDAddition(
+        investigator_kvk="12345678",
+        observation_type="reguliereMeting",
+        evaluation_procedure="ProcedureA",
+        measurement_instrument_type="InstrumentX",
+        process_reference="PR123",
+        begin_position="2024-01-01",
+        end_position="2024-07-01",
+        time_value_pairs=time_value_series,
+    )
+    dumped = gld.model_dump(mode="json", by_alias=True)
+    assert dumped["timeValuePairs"][0]["statusQualityControl"] == "goedgekeurd"
+    assert gld.model_dump()["time_value_pairs"][1]["censor_reason"] == "kleinerDanLimietwaarde"
+
+
+def test_list_adapter_is_cached():
+    adapter = list_adapter(TimeValuePair)
+    assert adapter is list_adapter(TimeValuePair)
+    pairs = adapter.validate_python([{"time": "2024-01-01T00:00:00", "value": 1.0}])
+    assert isinstance(pairs[0], TimeValuePair)
+
+
+def test_sourcedocument_adapter_per_registration_type():
+    adapter = sourcedocument_adapter("GMW_Owner")
+    assert adapter is sourcedocument_adapter("GMW_Owner")
+    owner = adapter.validate_python({"eventDate": "2024-01-01", "owner": "12345678"})
+    assert isinstance(owner, GMWOwner)
+    assert set(SOURCEDOCUMENT_MODELS) == set(get_args(RegistrationTypeOptions))
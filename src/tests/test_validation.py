@@ -0,0 +1,189 @@
+import datetime
+
+import pytest
+import requests_mock
+
+from ..brostar_api_requests.connection import BROSTARConnection
+from ..brostar_api_requests.mirror import BROSTARMirror
+from ..brostar_api_requests.upload_models import (
+    GMWOwner,
+    GMWWellHeadProtector,
+    UploadTask,
+    UploadTaskMetadata,
+)
+from ..brostar_api_requests.validation import WellDateIndex, prevalidate_gmw_events
+
+GMWS_URL = "https://staging.brostar.nl/api/gmw/gmws/"
+EVENTS_URL = "https://staging.brostar.nl/api/gmw/events/"
+TODAY = datetime.date(2025, 6, 1)
+
+
+def event_task(bro_id: str, event_date: str, request_type: str = "registration") -> UploadTask:
+    return UploadTask(
+        bro_domain="GMW",
+        project_number="1",
+        registration_type="GMW_Owner",
+        request_type=request_type,
+        sourcedocument_data=GMWOwner(event_date=event_date, owner="12345678"),
+        metadata=UploadTaskMetadata(
+            request_reference="test", quality_regime="IMBRO", bro_id=bro_id
+        ),
+    )
+
+
+@pytest.fixture
+def index() -> WellDateIndex:
+    mirror = BROSTARMirror(BROSTARConnection(token="dummy-token"))
+    with requests_mock.Mocker() as m:
+        m.get(
+            GMWS_URL,
+            json={
+                "next": None,
+                "results": [
+                    {
+                        "uuid": "1",
+                        "bro_id": "GMW000000000001",
+                        "well_construction_date": "2020-01-01",
+                        "updated_at": "2024-01-01T00:00:00Z",
+                    },
+                    {
+                        "uuid": "2",
+                        "bro_id": "GMW000000000002",
+                        "well_construction_date": "2021-01-01",
+                        "updated_at": "2024-01-01T00:00:00Z",
+                    },
+                ],
+            },
+        )
+        m.get(
+            EVENTS_URL,
+            json={
+                "next": None,
+                "results": [
+                    {
+                        "uuid": "3",
+                        "gmw_bro_id": "GMW000000000001",
+                        "event_date": "2023-01-01",
+                        "updated_at": "2024-01-01T00:00:00Z",
+                    },
+                    {
+                        "uuid": "4",
+                        "gmw_bro_id": "GMW000000000001",
+                        "event_date": "2022-01-01",
+                        "updated_at": "2024-01-01T00:00:00Z",
+                    },
+                ],
+            },
+        )
+        index = WellDateIndex(mirror)
+        index.refresh()
+    return index
+
+
+def test_well_date_index(index):
+    assert index.wells.sort("bro_id").rows() == [
+        ("GMW000000000001", datetime.date(2020, 1, 1), datetime.date(2023, 1, 1)),
+        ("GMW000000000002", datetime.date(2021, 1, 1), None),
+    ]
+
+
+def test_prevalidate_fixes_events(index):
+    tasks = [
+        event_task("GMW000000000001", "2024-01-01"),
+        # Before the latest registered event
+        event_task("GMW000000000001", "2022-06-01"),
+        # Before the construction date
+        event_task("GMW000000000002", "2020-06-01"),
+        # Unknown GMW, not checked
+        event_task("GMW000000000003", "2000-01-01"),
+    ]
+
+    accepted, rejected = prevalidate_gmw_events(tasks, index, today=TODAY)
+
+    assert rejected == []
+    assert accepted[0] is tasks[0]
+    assert accepted[1].request_type == "insert"
+    assert accepted[1].metadata.correction_reason == "eigenCorrectie"
+    assert accepted[2].request_type == "registration"
+    assert accepted[2].sourcedocument_data.event_date == "2021-01-01"
+    assert accepted[3] is tasks[3]
+    # The input is not modified
+    assert tasks[2].sourcedocument_data.event_date == "2020-06-01"
+
+
+def test_prevalidate_follows_earlier_events_in_batch(index):
+    tasks = [
+        event_task("GMW000000000002", "2024-03-01"),
+        event_task("GMW000000000002", "2024-02-01"),
+        event_task("GMW000000000002", "2024-04-01"),
+    ]
+
+    accepted, _ = prevalidate_gmw_events(tasks, index, today=TODAY)
+
+    assert [task.request_type for task in accepted] == ["registration", "insert", "registration"]
+
+
+def test_prevalidate_rejects(index):
+    tasks = [
+        event_task("GMW000000000001", "2030-01-01"),
+        event_task("GMW000000000001", "2024-01-01"),
+        event_task("GMW000000000002", "2020-06-01"),
+    ]
+
+    accepted, rejected = prevalidate_gmw_events(tasks, index, fix=False, today=TODAY)
+
+    # The rejected future event does not count as the latest event of the GMW
+    assert accepted == [tasks[1]]
+    assert [(task, reason.split(" lies ")[1]) for task, reason in rejected] == [
+        (tasks[0], "in the future."),
+        (tasks[2], "before the construction date 2021-01-01."),
+    ]
+
+
+def test_prevalidate_rejects_invalid_dates(index):
+    tasks = [
+        event_task("GMW000000000001", "01-02-2024"),
+        event_task("GMW000000000003", "unknown"),
+        event_task("GMW000000000001", "2024-01-01"),
+    ]
+
+    accepted, rejected = prevalidate_gmw_events(tasks, index, today=TODAY)
+
+    assert accepted == [tasks[2]]
+    assert rejected == [
+        (tasks[0], "Event date '01-02-2024' is not a valid date."),
+        (tasks[1], "Event date 'unknown' is not a valid date."),
+    ]
+
+
+def test_prevalidate_passes_other_tasks(index):
+    construction_task = event_task("GMW000000000001", "2024-01-01").model_copy(
+        update={"sourcedocument_data": {"not": "an event"}}
+    )
+
+    accepted, rejected = prevalidate_gmw_events([construction_task], index, today=TODAY)
+
+    assert accepted == [construction_task]
+    assert rejected == []
+
+
+def test_record_events(index):
+    task = UploadTask(
+        bro_domain="GMW",
+        project_number="1",
+        registration_type="GMW_WellHeadProtector",
+        request_type="registration",
+        sourcedocument_data=GMWWellHeadProtector(
+            event_date="2024-05-01", well_head_protector="pot"
+        ),
+        metadata=UploadTaskMetadata(
+            request_reference="test", quality_regime="IMBRO", bro_id="GMW000000000002"
+        ),
+    )
+
+    index.record_events([task])
+
+    accepted, _ = prevalidate_gmw_events(
+        [event_task("GMW000000000002", "2024-04-01")], index, today=TODAY
+    )
+    assert accepted[0].request_type == "insert"